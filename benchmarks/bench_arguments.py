@@ -0,0 +1,146 @@
+"""
+Time the processing of keyword arguments by the decorators that wrap GMT
+modules.
+
+Doesn't call GMT, only the alias replacement (use_alias), the conversion to
+strings (kwargs_to_strings), and building the argument string
+(build_arg_string). The previous implementation of the decorators (one loop
+over all aliases and conversions per call) is kept here to time both side by
+side. Requires an installed GMT because importing gmt starts a session.
+
+Run with::
+
+    python benchmarks/bench_arguments.py
+
+"""
+import timeit
+import functools
+
+import numpy as np
+
+from gmt.helpers import use_alias, kwargs_to_strings, build_arg_string, \
+    is_nonstr_iter
+
+
+def old_use_alias(**aliases):
+    "The previous use_alias: loops over all aliases in every call"
+
+    def alias_decorator(module_func):
+        "Replace the aliases"
+
+        @functools.wraps(module_func)
+        def new_module(*args, **kwargs):
+            "Replace the aliases and call the module"
+            for arg, alias in aliases.items():
+                if alias in kwargs:
+                    kwargs[arg] = kwargs.pop(alias)
+            return module_func(*args, **kwargs)
+
+        return new_module
+
+    return alias_decorator
+
+
+def old_kwargs_to_strings(**conversions):
+    "The previous kwargs_to_strings: copies kwargs and loops over conversions"
+    separators = {'sequence': '/', 'sequence_comma': ','}
+
+    def converter(module_func):
+        "Convert the arguments"
+
+        @functools.wraps(module_func)
+        def new_module(*args, **kwargs):
+            "Convert the arguments and call the module"
+            kwargs = old_remove_bools(kwargs)
+            for arg, fmt in conversions.items():
+                if arg in kwargs and is_nonstr_iter(kwargs[arg]):
+                    kwargs[arg] = separators[fmt].join(
+                        '{}'.format(item) for item in kwargs[arg])
+            return module_func(*args, **kwargs)
+
+        return new_module
+
+    return converter
+
+
+def old_remove_bools(kwargs):
+    "Copy kwargs replacing True by '' and removing False"
+    new_kwargs = {}
+    for arg, value in kwargs.items():
+        if isinstance(value, bool):
+            if value:
+                new_kwargs[arg] = ''
+        else:
+            new_kwargs[arg] = value
+    return new_kwargs
+
+
+def old_build_arg_string(kwargs):
+    "The previous build_arg_string: sorts and formats in every call"
+    sorted_args = []
+    for key in sorted(kwargs):
+        if is_nonstr_iter(kwargs[key]):
+            for value in kwargs[key]:
+                sorted_args.append('-{}{}'.format(key, value))
+        else:
+            sorted_args.append('-{}{}'.format(key, kwargs[key]))
+    return ' '.join(sorted_args)
+
+
+ALIASES = dict(R='region', J='projection', B='frame', S='style', G='color',
+               W='pen', i='columns', C='cmap')
+CONVERSIONS = dict(R='sequence', i='sequence_comma')
+
+
+@use_alias(**ALIASES)
+@kwargs_to_strings(**CONVERSIONS)
+def module(**kwargs):
+    "Process the arguments like a plotting method would"
+    # Arrays of colors are passed as data columns, not as arguments
+    kwargs.pop('G', None)
+    return build_arg_string(kwargs)
+
+
+@old_use_alias(**ALIASES)
+@old_kwargs_to_strings(**CONVERSIONS)
+def old_module(**kwargs):
+    "Process the arguments with the previous implementation"
+    kwargs.pop('G', None)
+    return old_build_arg_string(kwargs)
+
+
+CASES = {
+    'few arguments': dict(region=[0, 10, 0, 10], projection='X6i',
+                          frame=True),
+    'typical plot': dict(region=[-180, 180, -90, 90], projection='W0/6i',
+                         frame=['xaf', 'yaf', 'WSen'], style='c0.1c',
+                         pen='0.5p,black', cmap='viridis', columns=[0, 1, 2]),
+    'large array': dict(region=[0, 10, 0, 10], projection='X6i',
+                        color=np.arange(1000000), frame=True),
+}
+
+
+def best_time(func):
+    "The best time of a few repetitions of func, in seconds per call"
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number))/number
+
+
+def main():
+    "Print the time per call for each case with both implementations"
+    print('{:<25} {:>10} {:>10}'.format('us per call', 'previous',
+                                        'current'))
+    for name, kwargs in CASES.items():
+        assert old_module(**kwargs) == module(**kwargs)
+        old = best_time(lambda kwargs=kwargs: old_module(**kwargs))
+        new = best_time(lambda kwargs=kwargs: module(**kwargs))
+        print('{:<25} {:10.2f} {:10.2f}'.format(name, old*1e6, new*1e6))
+    array = np.arange(1000000)
+    best = best_time(lambda: is_nonstr_iter(array))
+    print('{:<25} {:10.2f} us per call'.format('is_nonstr_iter(1e6 array)',
+                                               best*1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,18 @@
 Base class with plot generating commands.
 Does not define any special non-GMT methods (savefig, show, etc).
 """
+import numbers
+from contextlib import ExitStack
+
+import numpy as np
+
 from .clib import LibGMT
-from .exceptions import GMTInvalidInput
-from .helpers import build_arg_string, dummy_context, data_kind, \
-    fmt_docstring, use_alias, kwargs_to_strings
+from .clib.utils import dataarray_to_image
+from .exceptions import GMTInvalidInput, GMTCLibError
+from .helpers import build_arg_string, build_arg_list, data_kind, \
+    fmt_docstring, use_alias, kwargs_to_strings, projection_width, \
+    region_bounds, call_module_output, table_output, grid_block_factors, \
+    block_average_grid, crop_grid, decimate_points, clip_points, clip_line
 
 
 class BasePlotting():
@@ -108,17 +116,36 @@ class BasePlotting():
         """
         kwargs = self._preprocess(**kwargs)
         with LibGMT() as lib:
-            lib.call_module('coast', build_arg_string(kwargs))
+            lib.call_module('coast', build_arg_list(kwargs))
 
     @fmt_docstring
     @use_alias(R='region', J='projection', B='frame', I='shading', C='cmap')
     @kwargs_to_strings(R='sequence')
-    def grdimage(self, grid, **kwargs):
+    def grdimage(self, grid, dpi=None, **kwargs):
         """
         Project grids or images and plot them on maps.
 
         Takes a grid file name or an xarray.DataArray object as input.
 
+        RGB images (like satellite rasters) can also be given as a ``uint8``
+        DataArray with the 3 bands in the first or last dimension. They are
+        passed to GMT in memory as a ``GMT_IMAGE`` (see
+        :meth:`gmt.clib.LibGMT.image_to_vfile`) instead of a GeoTIFF file.
+
+        DataArrays are passed to GMT in memory (see
+        :meth:`gmt.clib.LibGMT.grid_to_vfile`). So are the intensity grid
+        (*I*) if it's a DataArray and the color palette (*C*) if it's a
+        :class:`gmt.Palette` or the text of a CPT instead of a name. Nothing is
+        written to disk.
+
+        Use *dpi* to avoid sending GMT many more grid points than there will
+        be pixels in the final figure. DataArray grids are cropped to the
+        region (in *R* or of the current figure) and, if they have more than
+        one point per pixel (for the map width in *J*), block-averaged to
+        about one point per pixel first. An intensity grid (*I*) given as a
+        DataArray is cropped and averaged in the same way. Grid files are not
+        changed.
+
         {gmt_module_docs}
 
         {aliases}
@@ -126,30 +153,52 @@ class BasePlotting():
         Parameters
         ----------
         grid : str or xarray.DataArray
-            The file name of the input grid or the grid loaded as a DataArray.
+            The file name of the input grid or the grid (or RGB image) loaded
+            as a DataArray.
+        dpi : int or None
+            The resolution (dots per inch) of the final figure. If given,
+            downsample DataArray grids (not images) to this resolution. The
+            projection (*J*) must be given by width (like ``'M6i'``).
+        I : str, bool, or xarray.DataArray
+            The intensity grid used for shading (file name or DataArray), a
+            shading specification (e.g., ``'+a45+nt1'``), or ``True`` for the
+            default shading.
+        C : str or :class:`gmt.Palette`
+            The name of a CPT, the contents of a CPT in the GMT text format
+            (one color slice per line, like ``'0 blue 10 red\\n'``), or a
+            palette made from arrays.
 
         """
         kwargs = self._preprocess(**kwargs)
         kind = data_kind(grid, None, None)
         with LibGMT() as lib:
-            if kind == 'file':
-                file_context = dummy_context(grid)
-            elif kind == 'grid':
-                raise NotImplementedError(
-                    "Sorry, DataArray support is not yet functional.")
-            else:
-                raise GMTInvalidInput("Unrecognized data type: {}"
-                                      .format(type(grid)))
-            with file_context as fname:
-                arg_str = ' '.join([fname, build_arg_string(kwargs)])
-                lib.call_module('grdimage', arg_str)
+            if kind == 'grid' and grid.ndim == 2 and dpi is not None:
+                grid = _downsample_grids(lib, grid, dpi, kwargs)
+            with ExitStack() as stack:
+                if kind == 'file':
+                    fname = grid
+                elif kind == 'grid' and grid.ndim == 3:
+                    fname = stack.enter_context(
+                        lib.image_to_vfile(*dataarray_to_image(grid)))
+                elif kind == 'grid':
+                    fname = stack.enter_context(lib.grid_to_vfile(grid))
+                else:
+                    raise GMTInvalidInput("Unrecognized data type: {}"
+                                          .format(type(grid)))
+                if kwargs.get('I') is not None and \
+                        data_kind(kwargs['I'], None, None) == 'grid':
+                    kwargs['I'] = stack.enter_context(
+                        lib.grid_to_vfile(kwargs['I']))
+                _palette_to_vfile(lib, stack, kwargs)
+                lib.call_module('grdimage',
+                                build_arg_list(kwargs, infile=fname))
 
     @fmt_docstring
     @use_alias(R='region', J='projection', B='frame', S='style', G='color',
                W='pen', i='columns', C='cmap')
     @kwargs_to_strings(R='sequence', i='sequence_comma')
     def plot(self, x=None, y=None, data=None, sizes=None, direction=None,
-             **kwargs):
+             max_points=None, dpi=None, clip=False, **kwargs):
         """
         Plot lines, polygons, and symbols on maps.
 
@@ -173,6 +222,29 @@ class BasePlotting():
         is drawn or not. If a symbol is selected, *G* and *W* determines the
         fill and outline/no outline, respectively.
 
+        Large numbers of symbols mostly draw on top of each other. Use *dpi*
+        and/or *max_points* to drop points that would land on the same pixel
+        before sending them to GMT (only for symbols given as *x* and *y*).
+        Points are binned into cells (the pixels of the map for *dpi*) and
+        only one is kept in each. If *color* (G) or *sizes* are arrays, the
+        points with the smallest and largest values in each cell are kept
+        instead so the extremes are still visible (see
+        :func:`gmt.helpers.decimate_points`).
+
+        The colormap (*C*) can be a :class:`gmt.Palette` or the text of a CPT
+        and is passed to GMT in memory, like in :meth:`grdimage`.
+
+        When plotting a small region of a large dataset, use *clip* to send
+        GMT only the data inside the region (*R* or the region of the current
+        figure) plus a margin. Symbols outside are dropped (see
+        :func:`gmt.helpers.clip_points`). For lines, only vertices with both
+        segments beyond the same edge of the region are dropped (see
+        :func:`gmt.helpers.clip_line`). Longitudes are assumed to wrap around
+        unless the projection is Cartesian (``X``). Without *J*, the
+        projection of the current figure isn't known and only y is clipped.
+        Only used for *x* and *y* arrays or a matrix (without *columns*) and
+        numerical regions.
+
         {gmt_module_docs}
 
         {aliases}
@@ -180,7 +252,10 @@ class BasePlotting():
         Parameters
         ----------
         x, y : 1d arrays
-            Arrays of x and y coordinates of the data points.
+            Arrays of x and y coordinates of the data points. Can be numpy
+            arrays, pandas Series, Apache Arrow arrays, or any object that
+            supports the buffer protocol (see
+            :meth:`gmt.clib.LibGMT.vectors_to_vfile`).
         data : str or 2d array
             Either a data file name or a 2d numpy array with the tabular data.
             Use option *columns* (i) to choose which columns are x, y, color,
@@ -193,6 +268,18 @@ class BasePlotting():
             should be a list of two 1d arrays with the vector directions. These
             can be angle and length, azimuth and length, or x and y components,
             depending on the style options chosen.
+        max_points : int or None
+            If there are more points than this, bin them into cells large
+            enough to keep only about this many.
+        dpi : int or None
+            The resolution (dots per inch) of the final figure. If given, bin
+            the points into the pixels of the map. The projection (*J*) must
+            be given by width (like ``'M6i'``).
+        clip : bool or float
+            If True or a number, drop data outside of the region before
+            sending them to GMT. A number is the size of the margin around the
+            region as a fraction of its width (for x) and height (for y). True
+            means ``0.1``.
         {J}
         {R}
         A : bool or str
@@ -219,34 +306,27 @@ class BasePlotting():
         kwargs = self._preprocess(**kwargs)
 
         kind = data_kind(data, x, y)
-
-        extra_arrays = []
-        if 'S' in kwargs and kwargs['S'][0] in 'vV' and direction is not None:
-            extra_arrays.extend(direction)
-        if 'G' in kwargs and not isinstance(kwargs['G'], str):
-            if kind != 'vectors':
-                raise GMTInvalidInput(
-                    "Can't use arrays for color if data is matrix or file.")
-            extra_arrays.append(kwargs['G'])
-            del kwargs['G']
-        if sizes is not None:
-            if kind != 'vectors':
-                raise GMTInvalidInput(
-                    "Can't use arrays for sizes if data is matrix or file.")
-            extra_arrays.append(sizes)
+        data, values = _plot_columns(kind, data, x, y, sizes, direction,
+                                     kwargs)
+        if (max_points is not None or dpi is not None) and \
+                (kind != 'vectors' or 'S' not in kwargs):
+            raise GMTInvalidInput(
+                "Can only decimate symbols (S) given as x and y arrays.")
 
         with LibGMT() as lib:
-            # Choose how data will be passed in to the module
-            if kind == 'file':
-                file_context = dummy_context(data)
-            elif kind == 'matrix':
-                file_context = lib.matrix_to_vfile(data)
-            elif kind == 'vectors':
-                file_context = lib.vectors_to_vfile(x, y, *extra_arrays)
-
-            with file_context as fname:
-                arg_str = ' '.join([fname, build_arg_string(kwargs)])
-                lib.call_module('plot', arg_str)
+            data = _subset_plot_data(lib, kind, data, values, kwargs,
+                                     clip=clip, max_points=max_points,
+                                     dpi=dpi)
+            with ExitStack() as stack:
+                # Choose how data will be passed in to the module
+                if kind == 'file':
+                    fname = data
+                elif kind == 'matrix':
+                    fname = stack.enter_context(lib.matrix_to_vfile(data))
+                else:
+                    fname = stack.enter_context(lib.vectors_to_vfile(*data))
+                _palette_to_vfile(lib, stack, kwargs)
+                lib.call_module('plot', build_arg_list(kwargs, infile=fname))
 
     @fmt_docstring
     @use_alias(R='region', J='projection', B='frame')
@@ -297,7 +377,7 @@ class BasePlotting():
             raise GMTInvalidInput(
                 "Option D requires F to be specified as well.")
         with LibGMT() as lib:
-            lib.call_module('basemap', build_arg_string(kwargs))
+            lib.call_module('basemap', build_arg_list(kwargs))
 
     @fmt_docstring
     @use_alias(R='region', J='projection')
@@ -332,4 +412,308 @@ class BasePlotting():
         if 'D' not in kwargs:
             raise GMTInvalidInput("Option D must be specified.")
         with LibGMT() as lib:
-            lib.call_module('logo', build_arg_string(kwargs))
+            lib.call_module('logo', build_arg_list(kwargs))
+
+    @fmt_docstring
+    @use_alias(D='position', F='box')
+    @kwargs_to_strings()
+    def image(self, imagefile, **kwargs):
+        """
+        Place images or EPS files on maps.
+
+        Reads an Encapsulated PostScript file or a raster image file and plots
+        it on a map.
+
+        {gmt_module_docs}
+
+        {aliases}
+
+        Parameters
+        ----------
+        imagefile : str
+            The name of the EPS or raster image file.
+        D : str
+            ``'[g|j|J|n|x]refpoint+rdpi+w[-]width[/height][+jjustify]'``.
+            Sets the reference point on the map for the image and its size.
+        F : bool or str
+            Without further options, draws a rectangular border around the
+            image.
+        {U}
+
+        """
+        kwargs = self._preprocess(**kwargs)
+        with LibGMT() as lib:
+            lib.call_module('image', build_arg_list(kwargs, infile=imagefile))
+
+    @fmt_docstring
+    @use_alias(R='region', J='projection', B='frame')
+    @kwargs_to_strings(R='sequence')
+    def text(self, x=None, y=None, text=None, textfile=None, **kwargs):
+        """
+        Plot text strings on maps.
+
+        Used to be pstext.
+
+        Takes the text as arrays of *x* and *y* coordinates and an array of
+        strings, or the name of a file with columns of x, y, and text. Arrays
+        are passed to GMT in memory as a single dataset with the strings as
+        trailing text (see :meth:`gmt.clib.LibGMT.vectors_to_vfile`), so any
+        number of labels is drawn in one module call without writing them to
+        a file. Requires GMT 6.1.0 or later.
+
+        {gmt_module_docs}
+
+        {aliases}
+
+        Parameters
+        ----------
+        x, y : 1d arrays
+            The coordinates of the text.
+        text : str or 1d array
+            The text of each point. A single string is used for all points.
+        textfile : str
+            The name of a file with the x, y, and text columns. Can't be used
+            with *x*, *y*, and *text*.
+        {J}
+        {R}
+        {B}
+        F : str
+            ``'[+a[angle]][+c[justify]][+f[font]][+j[justify]]'``.
+            Set the angle, font, and justification of the text.
+        D : str
+            ``'[j|J]dx[/dy][+v[pen]]'``.
+            Offset the text from the given positions.
+        N : bool
+            Don't clip text at the map boundaries.
+        {U}
+
+        """
+        kwargs = self._preprocess(**kwargs)
+        if textfile is not None:
+            if x is not None or y is not None or text is not None:
+                raise GMTInvalidInput(
+                    "Use either textfile or x, y, and text, not both.")
+            with LibGMT() as lib:
+                lib.call_module('text',
+                                build_arg_list(kwargs, infile=textfile))
+            return
+        if x is None or y is None or text is None:
+            raise GMTInvalidInput("Must provide x, y, and text.")
+        x = np.atleast_1d(x)
+        y = np.atleast_1d(y)
+        if isinstance(text, str):
+            text = [text]*len(x)
+        with LibGMT() as lib:
+            with lib.vectors_to_vfile(x, y, strings=text) as fname:
+                lib.call_module('text', build_arg_list(kwargs, infile=fname))
+
+
+def _palette_to_vfile(lib, stack, kwargs):
+    """
+    Pass the colormap (C) in *kwargs* to GMT in memory if it isn't a name.
+
+    Palette objects and CPT text are replaced by a virtual file that stays
+    open until *stack* is closed.
+    """
+    cmap = kwargs.get('C')
+    if hasattr(cmap, 'cpt') or '\n' in str(cmap):
+        kwargs['C'] = stack.enter_context(lib.palette_to_vfile(cmap))
+
+
+def _downsample_grids(lib, grid, dpi, kwargs):
+    """
+    Crop a grid to the map region and average it to the figure resolution.
+
+    An intensity grid (*I*) given as a DataArray in *kwargs* is replaced by a
+    cropped and averaged version as well. The region comes from *kwargs* or
+    from the current figure (see :func:`_map_region`). The map height is
+    calculated by GMT (see :func:`_map_size`) so that x and y are averaged by
+    their own pixel sizes. If there isn't a region, the whole grid is used
+    with square pixels.
+    """
+    shading = kwargs.get('I')
+    if shading is not None and data_kind(shading, None, None) != 'grid':
+        shading = None
+    region = _map_region(lib, kwargs)
+    if region is None:
+        xcoord = grid.coords[grid.dims[1]].values
+        region = [xcoord.min(), xcoord.max()]
+        width, height = _map_width(kwargs), None
+    else:
+        grid = crop_grid(grid, region)
+        if shading is not None:
+            shading = crop_grid(shading, region)
+        width, height = _map_size(lib, region, kwargs)
+    factors = grid_block_factors(grid, region, width, dpi, height)
+    if shading is not None:
+        kwargs['I'] = block_average_grid(shading, factors)
+    return block_average_grid(grid, factors)
+
+
+def _plot_columns(kind, data, x, y, sizes, direction, kwargs):
+    """
+    Gather the columns of data given to plot as x and y arrays.
+
+    Returns the list of columns (x, y, vector directions, colors, and sizes)
+    and the values used to choose which points to keep when decimating
+    (colors, sizes, or None). Colors are the most visible so their extremes
+    are kept first. For other kinds of data, returns *data* unchanged.
+    """
+    extra_arrays = []
+    color = None
+    if 'S' in kwargs and kwargs['S'][0] in 'vV' and direction is not None:
+        extra_arrays.extend(direction)
+    if 'G' in kwargs and not isinstance(kwargs['G'], str):
+        if kind != 'vectors':
+            raise GMTInvalidInput(
+                "Can't use arrays for color if data is matrix or file.")
+        color = kwargs.pop('G')
+        extra_arrays.append(color)
+    if sizes is not None:
+        if kind != 'vectors':
+            raise GMTInvalidInput(
+                "Can't use arrays for sizes if data is matrix or file.")
+        extra_arrays.append(sizes)
+    if kind != 'vectors':
+        return data, None
+    return [x, y] + extra_arrays, color if color is not None else sizes
+
+
+def _subset_plot_data(lib, kind, data, values, kwargs, clip=False,
+                      max_points=None, dpi=None):
+    """
+    Clip and decimate the data given to plot.
+
+    *data* is the list of columns (for x and y arrays), the matrix, or the
+    file name. Returns the same kind of data with only the points that will
+    be plotted. Files are returned unchanged.
+    """
+    index = None
+    if clip is not None and clip is not False:
+        index = _clip_index(lib, kind, data, clip, kwargs)
+    if max_points is not None or dpi is not None:
+        keep = slice(None) if index is None else index
+        if values is not None:
+            values = np.asarray(values)[keep]
+        decimated = _decimation_index(
+            lib, np.asarray(data[0])[keep], np.asarray(data[1])[keep], values,
+            max_points, dpi, kwargs)
+        if decimated is not None:
+            index = decimated if index is None else index[decimated]
+    if index is None:
+        return data
+    if kind == 'matrix':
+        return np.asarray(data)[index]
+    return [np.asarray(column)[index] for column in data]
+
+
+def _decimation_index(lib, x, y, values, max_points, dpi, kwargs):
+    """
+    Get the indices of the points to plot after decimation.
+
+    With *dpi*, points are binned into the pixels of the map, which have
+    different sizes in x and y (in data units) if the map scales differ.
+    With *max_points*, the x and y ranges of the points are each split into
+    the square root of that many cells. Returns None if nothing needs to be
+    dropped.
+    """
+    if x.size == 0:
+        return None
+    spacing = np.zeros(2)
+    if dpi is not None:
+        region = _map_region(lib, kwargs)
+        if region is None:
+            region = [np.nanmin(x), np.nanmax(x), np.nanmin(y), np.nanmax(y)]
+        ranges = np.abs([region[1] - region[0], region[3] - region[2]])
+        spacing = ranges/(np.array(_map_size(lib, region, kwargs))*dpi)
+    if max_points is not None and x.size > max_points:
+        ranges = np.array([np.nanmax(x) - np.nanmin(x),
+                           np.nanmax(y) - np.nanmin(y)])
+        spacing = np.maximum(spacing, ranges/np.sqrt(max_points))
+    if np.all(spacing <= 0):
+        return None
+    # All points along an axis without a range fall in the same cell
+    spacing[spacing <= 0] = np.inf
+    return decimate_points(x, y, tuple(spacing), values)
+
+
+def _clip_index(lib, kind, data, clip, kwargs):
+    """
+    Get the indices of the points (or matrix rows) to keep after clipping.
+
+    The margin is a fraction of the width and height of the region for each
+    axis. If the projection isn't in *kwargs* (it comes from the current
+    figure), it's not known if x are longitudes that wrap around so only y is
+    clipped. Returns None if the data can't be clipped.
+    """
+    if clip is True:
+        fraction = 0.1
+    elif isinstance(clip, numbers.Real) and clip >= 0:
+        fraction = clip
+    else:
+        raise GMTInvalidInput(
+            "Invalid clip '{}'. Must be True or a fraction of the region size."
+            .format(clip))
+    if kind == 'vectors':
+        x, y = np.asarray(data[0]), np.asarray(data[1])
+    elif kind == 'matrix' and 'i' not in kwargs:
+        x, y = np.asarray(data)[:, 0], np.asarray(data)[:, 1]
+    else:
+        return None
+    region = _map_region(lib, kwargs)
+    if region is None:
+        return None
+    margin = (fraction*abs(region[1] - region[0]),
+              fraction*abs(region[3] - region[2]))
+    if 'J' in kwargs:
+        geographic = kwargs['J'][:1] not in 'xX'
+    else:
+        region = [-np.inf, np.inf] + list(region[2:4])
+        geographic = False
+    if 'S' in kwargs:
+        return clip_points(x, y, region, margin, geographic)
+    return clip_line(x, y, region, margin, geographic)
+
+
+def _map_width(kwargs):
+    """
+    Get the width of the map in inches from the projection in *kwargs*.
+    """
+    width = projection_width(kwargs['J']) if 'J' in kwargs else None
+    if width is None:
+        raise GMTInvalidInput(
+            "Couldn't get the map width from projection '{}'. Using the "
+            "figure resolution needs a projection given by width (like 'M6i')."
+            .format(kwargs.get('J')))
+    return width
+
+
+def _map_size(lib, region, kwargs):
+    """
+    Get the width and height of the map in inches.
+
+    The width comes from the projection in *kwargs* (see :func:`_map_width`).
+    The height is calculated by GMT (``mapproject -W``) for the given region
+    since it depends on the projection.
+    """
+    width = _map_width(kwargs)
+    args = build_arg_string(dict(R='/'.join(str(i) for i in region[:4]),
+                                 J=kwargs['J'], W=''))
+    dimensions = call_module_output(lib, 'mapproject', args,
+                                    decoder=table_output).ravel()
+    return width, width*dimensions[1]/dimensions[0]
+
+
+def _map_region(lib, kwargs):
+    """
+    Get the numerical region of the map being plotted.
+
+    Uses the region in *kwargs* or, if there isn't one, the region of the
+    current figure. Returns None if neither is available.
+    """
+    if 'R' in kwargs:
+        return region_bounds(kwargs['R'])
+    try:
+        return lib.extract_region()
+    except GMTCLibError:
+        return None
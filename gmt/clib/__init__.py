@@ -7,3 +7,4 @@ Access to the C library is done through :py:mod:`ctypes`.
 
 """
 from .core import LibGMT
+from .handles import GMTDataset, GMTGrid, GMTPalette
@@ -3,6 +3,7 @@ ctypes wrappers for core functions from the C API
 """
 import os
 import ctypes
+from collections import OrderedDict
 from tempfile import NamedTemporaryFile
 from contextlib import contextmanager
 
@@ -11,11 +12,15 @@ import numpy as np
 
 from ..exceptions import GMTCLibError, GMTCLibNoSessionError, \
     GMTInvalidInput, GMTVersionError
+from ..helpers import parse_arg_string
+from .handles import GMTPalette
 from .utils import load_libgmt, kwargs_to_ctypes_array, vectors_to_arrays, \
-    dataarray_to_matrix, as_c_contiguous
+    dataarray_to_matrix, as_c_contiguous, dataarray_source, image_to_matrix, \
+    datetime_to_numeric
 
 
 class LibGMT():  # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-public-methods
     """
     Load and access the GMT shared library (libgmt).
 
@@ -61,6 +66,7 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
     data_families = [
         'GMT_IS_DATASET',
         'GMT_IS_GRID',
+        'GMT_IS_IMAGE',
         'GMT_IS_PALETTE',
         'GMT_IS_MATRIX',
         'GMT_IS_VECTOR',
@@ -93,6 +99,9 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
     # The minimum version of GMT required
     required_version = '6.0.0'
 
+    # The most GMT_OPTION lists kept for reuse in a session (see call_module)
+    max_option_lists = 128
+
     # Map numpy dtypes to GMT types
     _dtypes = {
         'float64': 'GMT_DOUBLE',
@@ -101,8 +110,19 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         'int32': 'GMT_INT',
         'uint64': 'GMT_ULONG',
         'uint32': 'GMT_UINT',
+        'uint8': 'GMT_UCHAR',
     }
 
+    def __init__(self):
+        # Data handles registered with pin, closed with the session
+        self._pinned = []
+        # Module options needed to read virtual files (see attach_options)
+        self._vfile_options = {}
+        # Palettes read in this session, by Palette.key (see palette_to_vfile)
+        self._palettes = {}
+        # GMT_OPTION lists made in this session, by options (see call_module)
+        self._options = OrderedDict()
+
     @property
     def current_session(self):
         """
@@ -215,7 +235,12 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         """
         Destroy the current session and set the stored session to None
         """
+        for handle in list(self._pinned):
+            handle.close()
+        self._palettes.clear()
         try:
+            while self._options:
+                self._destroy_options(self._options.popitem()[1])
             self.destroy_session(self.current_session)
         finally:
             self.current_session = None
@@ -372,6 +397,40 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
 
         return value.value.decode()
 
+    def set_default(self, name, value):
+        """
+        Set the value of a GMT default parameter of the current session.
+
+        Only the ``API_*`` parameters listed in
+        :meth:`~gmt.clib.LibGMT.get_default` that aren't read-only can be set
+        (e.g., ``"API_IMAGE_LAYOUT"``).
+
+        Parameters
+        ----------
+        name : str
+            The name of the default parameter.
+        value : str
+            The new value.
+
+        Raises
+        ------
+        GMTCLibError
+            If the parameter can't be set.
+
+        """
+        c_set_default = self.get_libgmt_func(
+            'GMT_Set_Default',
+            argtypes=[ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p],
+            restype=ctypes.c_int)
+
+        status = c_set_default(self.current_session, name.encode(),
+                               value.encode())
+
+        if status != 0:
+            raise GMTCLibError(
+                "Error setting default value for '{}' to '{}' (error code {})."
+                .format(name, value, status))
+
     @contextmanager
     def log_to_file(self, logfile=None):
         """
@@ -442,15 +501,29 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         Makes a call to ``GMT_Call_Module`` from the C API using mode
         ``GMT_MODULE_CMD`` (arguments passed as a single string).
 
+        If *args* is a list of ``(option, argument)`` pairs instead (see
+        :func:`gmt.helpers.build_arg_list`), the options are passed as a
+        ``GMT_OPTION`` linked list with mode ``GMT_MODULE_OPT``. GMT doesn't
+        have to parse them from a string and arguments can have spaces
+        without quoting. This is what the plotting methods do.
+
+        Lists are kept for the session by their options (up to
+        ``max_option_lists``, dropping the least recently used), so calling
+        modules many times with the same parameters only makes the list
+        once. In modern mode, GMT fills in a missing or empty ``-R`` or
+        ``-J`` from the current plot by changing the list. Those modules get
+        a copy (``GMT_Duplicate_Options``) that is freed after the call.
+
         Most interactions with the C API are done through this function.
 
         Parameters
         ----------
         module : str
             Module name (``'pscoast'``, ``'psbasemap'``, etc).
-        args : str
+        args : str or list
             String with the command line arguments that will be passed to the
-            module (for example, ``'-R0/5/0/10 -JM'``).
+            module (for example, ``'-R0/5/0/10 -JM'``) or a list of options
+            (for example, ``[('R', '0/5/0/10'), ('J', 'M')]``).
 
         Raises
         ------
@@ -464,17 +537,41 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
                       ctypes.c_void_p],
             restype=ctypes.c_int)
 
-        mode = self.get_constant('GMT_MODULE_CMD')
+        head = None
+        if isinstance(args, str):
+            mode = self.get_constant('GMT_MODULE_CMD')
+            options = []
+            # Only split the string if there are virtual files to look for
+            if self._vfile_options or self._pinned:
+                options = parse_arg_string(args)
+            # Add the options that modules need to read the virtual files
+            args = ' '.join([args] + [
+                '-{}{}'.format(*item)
+                for item in self._vfile_read_options(options)])
+            c_args = args.encode()
+        else:
+            mode = self.get_constant('GMT_MODULE_OPT')
+            options = list(args)
+            options.extend(self._vfile_read_options(options))
+            head = self._cached_options(options)
+            c_args = head
+            if self._options_may_change(options):
+                c_args = self._duplicate_options(head)
         # If there is no open session, this will raise an exception. Can' let
         # it happen inside the 'with' otherwise the logfile won't be deleted.
         session = self.current_session
-        with self.log_to_file() as logfile:
-            status = c_call_module(session, module.encode(), mode,
-                                   args.encode())
-            # Get the error message inside the with block before the log file
-            # is deleted
-            with open(logfile) as flog:
-                log = flog.read().strip()
+        try:
+            with self.log_to_file() as logfile:
+                status = c_call_module(session, module.encode(), mode, c_args)
+                # Get the error message inside the with block before the log
+                # file is deleted
+                with open(logfile) as flog:
+                    log = flog.read().strip()
+        finally:
+            # Modules don't free option lists. Copies aren't reused.
+            if head is not None and c_args is not head:
+                self._destroy_options(c_args)
+        self._reset_pinned(module, options)
         # Raise the exception outside the log 'with' to make sure the logfile
         # is cleaned.
         if status != 0:
@@ -489,6 +586,213 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
                 ])
             raise GMTCLibError(msg)
 
+    def _reset_pinned(self, module, options):
+        """
+        Get the pinned data given to a module ready for the next module call.
+
+        Modules mark the virtual files they read as used. Reset the ones that
+        hold pinned data so that the next module can read them too. Data that
+        the module may have changed are closed instead.
+
+        Parameters
+        ----------
+        module : str
+            The name of the module that was called.
+        options : list of tuples
+            The ``(option, argument)`` pairs given to the module.
+
+        """
+        arguments = set(argument for _, argument in options)
+        for handle in list(self._pinned):
+            if handle.vfile not in arguments:
+                continue
+            if module in handle.modified_by:
+                handle.close()
+            elif handle.vfile.startswith('@GMTAPI@'):
+                self.init_virtual_file(handle.vfile)
+
+    def _vfile_read_options(self, options):
+        """
+        Get the options needed to read the virtual files given to a module.
+
+        Virtual files are found by matching whole arguments, so
+        ``'@GMTAPI@-000001'`` doesn't match ``'@GMTAPI@-0000010'``. Options
+        that the module call already has (like ``-f`` or
+        ``--TIME_UNIT=...``) are skipped so that the caller's take precedence.
+
+        Parameters
+        ----------
+        options : list of tuples
+            The ``(option, argument)`` pairs given to the module.
+
+        Returns
+        -------
+        extra : list of tuples
+            The ``(option, argument)`` pairs to add to the module call.
+
+        """
+        def name(option, argument):
+            "The option flag or the name of a --PAR=value setting"
+            return argument.split('=')[0] if option == '-' else option
+
+        arguments = set(argument for _, argument in options)
+        present = set(name(*item) for item in options)
+        extra = []
+        for vfile, vfile_options in self._vfile_options.items():
+            if vfile not in arguments:
+                continue
+            for item in parse_arg_string(vfile_options):
+                if name(*item) not in present:
+                    present.add(name(*item))
+                    extra.append(item)
+        return extra
+
+    def _cached_options(self, options):
+        """
+        Get the GMT_OPTION linked list for the options, making it if needed.
+
+        Lists are kept in ``_options`` until the session ends. When there are
+        more than ``max_option_lists``, the least recently used are freed.
+
+        Parameters
+        ----------
+        options : list of tuples
+            ``(option, argument)`` pairs (see ``_create_options``).
+
+        Returns
+        -------
+        head : int
+            The ctypes pointer to the first ``GMT_OPTION`` of the list.
+
+        """
+        key = tuple((str(option), str(argument))
+                    for option, argument in options)
+        head = self._options.pop(key, None)
+        if head is None:
+            head = self._create_options(key)
+            while len(self._options) >= max(self.max_option_lists, 1):
+                self._destroy_options(self._options.popitem(last=False)[1])
+        self._options[key] = head
+        return head
+
+    @staticmethod
+    def _options_may_change(options):
+        """
+        Check if GMT may change the option list given to a module.
+
+        In modern mode, GMT adds ``-R`` and ``-J`` from the current plot to
+        the options of modules that don't have them and fills in their
+        arguments if they are empty.
+        """
+        given = dict(options)
+        return not (given.get('R') and given.get('J'))
+
+    def _create_options(self, options):
+        """
+        Make a GMT_OPTION linked list to pass options to modules.
+
+        Wraps ``GMT_Make_Option`` and ``GMT_Append_Option``. Used by
+        :meth:`~gmt.clib.LibGMT.call_module` with mode ``GMT_MODULE_OPT``
+        (through ``_cached_options``). Free the list with
+        ``_destroy_options``.
+
+        Parameters
+        ----------
+        options : list of tuples
+            ``(option, argument)`` pairs, where *option* is a single character
+            (``'<'`` for input files, ``'-'`` for ``--PAR=value`` settings).
+
+        Returns
+        -------
+        head : int
+            The ctypes pointer to the first ``GMT_OPTION`` of the list.
+
+        Raises
+        ------
+        GMTInvalidInput
+            If an option isn't a single character.
+        GMTCLibError
+            If GMT can't make the list.
+
+        """
+        c_make_option = self.get_libgmt_func(
+            'GMT_Make_Option',
+            argtypes=[ctypes.c_void_p, ctypes.c_char, ctypes.c_char_p],
+            restype=ctypes.c_void_p)
+        c_append_option = self.get_libgmt_func(
+            'GMT_Append_Option',
+            argtypes=[ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p],
+            restype=ctypes.c_void_p)
+
+        head = None
+        try:
+            for option, argument in options:
+                option, argument = str(option), str(argument)
+                if len(option) != 1:
+                    raise GMTInvalidInput(
+                        "Invalid option '{}'. Must be a single character."
+                        .format(option))
+                current = c_make_option(self.current_session, option.encode(),
+                                        argument.encode())
+                if current is None:
+                    raise GMTCLibError("Failed to make option '-{}{}'."
+                                       .format(option, argument))
+                appended = c_append_option(self.current_session, current,
+                                           head)
+                if appended is None:
+                    raise GMTCLibError("Failed to append option '-{}{}'."
+                                       .format(option, argument))
+                head = appended
+        except (GMTInvalidInput, GMTCLibError):
+            self._destroy_options(head)
+            raise
+        return head
+
+    def _duplicate_options(self, head):
+        """
+        Copy a GMT_OPTION linked list made by ``_create_options``.
+
+        Wraps ``GMT_Duplicate_Options``. Free the copy with
+        ``_destroy_options``.
+
+        Raises
+        ------
+        GMTCLibError
+            If GMT can't copy the list.
+
+        """
+        c_duplicate_options = self.get_libgmt_func(
+            'GMT_Duplicate_Options',
+            argtypes=[ctypes.c_void_p, ctypes.c_void_p],
+            restype=ctypes.c_void_p)
+        copy = c_duplicate_options(self.current_session, head)
+        if copy is None:
+            raise GMTCLibError("Failed to copy the module options.")
+        return copy
+
+    def _destroy_options(self, head):
+        """
+        Free a GMT_OPTION linked list made by ``_create_options``.
+
+        Wraps ``GMT_Destroy_Options``. Nothing is done if *head* is None.
+
+        Raises
+        ------
+        GMTCLibError
+            If GMT can't free the list.
+
+        """
+        if head is None:
+            return
+        c_destroy_options = self.get_libgmt_func(
+            'GMT_Destroy_Options',
+            argtypes=[ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p)],
+            restype=ctypes.c_int)
+        status = c_destroy_options(self.current_session,
+                                   ctypes.byref(ctypes.c_void_p(head)))
+        if status != 0:
+            raise GMTCLibError("Failed to free the module options.")
+
     def create_data(self, family, geometry, mode, **kwargs):
         """
         Create an empty GMT data container.
@@ -799,6 +1103,67 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
             raise GMTCLibError(
                 "Failed to put matrix of type {}.".format(matrix.dtype))
 
+    def put_strings(self, dataset, family, strings):
+        """
+        Attach an array of strings to a GMT dataset as its trailing text.
+
+        Use this function to add a column of text (labels, for example) to a
+        dataset made of vectors and pass it to GMT modules. Wraps
+        ``GMT_Put_Strings``, which is only available in GMT 6.1.0 or later.
+
+        The dataset must be created by :meth:`~gmt.clib.LibGMT.create_data`
+        first with ``family='GMT_IS_DATASET|GMT_VIA_VECTOR'``. GMT copies the
+        strings (use ``'GMT_IS_VECTOR|GMT_IS_DUPLICATE'`` as the family) so the
+        array can be discarded after this call.
+
+        Parameters
+        ----------
+        dataset : :py:class:`ctypes.c_void_p`
+            The ctypes void pointer to a ``GMT_Dataset``. Create it with
+            :meth:`~gmt.clib.LibGMT.create_data`.
+        family : str
+            The family of the dataset container with how to store the strings
+            (e.g., ``'GMT_IS_VECTOR|GMT_IS_DUPLICATE'``).
+        strings : 1d array
+            The strings, one per row of the dataset. Non-string values are
+            converted to strings.
+
+        Raises
+        ------
+        GMTCLibError
+            If given invalid input or ``GMT_Put_Strings`` exits with status !=
+            0.
+        GMTVersionError
+            If the GMT version is older than 6.1.0.
+
+        """
+        version = self.get_default('API_VERSION')
+        if Version(version) < Version('6.1.0'):
+            raise GMTVersionError(
+                "Passing strings to GMT requires GMT 6.1.0 or newer, got {}."
+                .format(version))
+        c_put_strings = self.get_libgmt_func(
+            'GMT_Put_Strings',
+            argtypes=[ctypes.c_void_p, ctypes.c_uint, ctypes.c_void_p,
+                      ctypes.POINTER(ctypes.c_char_p)],
+            restype=ctypes.c_int)
+
+        family_int = self._parse_constant(
+            family, valid=self.data_families,
+            valid_modifiers=['GMT_IS_DUPLICATE', 'GMT_IS_REFERENCE'])
+        strings = np.asarray(strings)
+        if strings.ndim != 1:
+            raise GMTInvalidInput(
+                "Expected a numpy 1d array of strings, got {}d."
+                .format(strings.ndim))
+        strings_pointer = (ctypes.c_char_p*strings.size)()
+        strings_pointer[:] = [str(string).encode() for string in strings]
+        status = c_put_strings(self.current_session, family_int, dataset,
+                               strings_pointer)
+        if status != 0:
+            raise GMTCLibError("Failed to put {} strings in the dataset."
+                               .format(strings.size))
+
     def write_data(self, family, geometry, mode, wesn, output, data):
         """
         Write a GMT data container to a file.
@@ -860,6 +1225,61 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
             raise GMTCLibError(
                 "Failed to write dataset to '{}'".format(output))
 
+    def read_data(self, family, geometry, source, wesn=None):
+        """
+        Read a file into a GMT data container.
+
+        Wraps ``GMT_Read_Data`` but only allows reading from a file. So the
+        ``method`` argument is omitted. The container is owned by the session
+        and freed when it ends.
+
+        Parameters
+        ----------
+        family : str
+            A valid GMT data family name (e.g., ``'GMT_IS_PALETTE'``). See the
+            ``data_families`` attribute for valid names.
+        geometry : str
+            A valid GMT data geometry name (e.g., ``'GMT_IS_NONE'``). See the
+            ``data_geometries`` attribute for valid names.
+        source : str
+            The input file name.
+        wesn : list or None
+            Only read the data inside ``[xmin, xmax, ymin, ymax]``. If
+            ``None``, will read everything.
+
+        Returns
+        -------
+        data_ptr : int
+            A ctypes pointer (an integer) to the GMT data container.
+
+        Raises
+        ------
+        GMTCLibError
+            If GMT fails to read the file.
+
+        """
+        c_read_data = self.get_libgmt_func(
+            'GMT_Read_Data',
+            argtypes=[ctypes.c_void_p, ctypes.c_uint, ctypes.c_uint,
+                      ctypes.c_uint, ctypes.c_uint,
+                      ctypes.POINTER(ctypes.c_double), ctypes.c_char_p,
+                      ctypes.c_void_p],
+            restype=ctypes.c_void_p)
+
+        family_int = self._parse_constant(family, valid=self.data_families)
+        geometry_int = self._parse_constant(geometry,
+                                            valid=self.data_geometries)
+        if wesn is not None:
+            wesn = (ctypes.c_double*4)(*wesn)
+        data_ptr = c_read_data(self.current_session, family_int,
+                               self.get_constant('GMT_IS_FILE'), geometry_int,
+                               self.get_constant('GMT_READ_NORMAL'), wesn,
+                               source.encode(), None)
+        if data_ptr is None:
+            raise GMTCLibError(
+                "Failed to read data from '{}'.".format(source))
+        return data_ptr
+
     @contextmanager
     def open_virtual_file(self, family, geometry, direction, data):
         """
@@ -960,8 +1380,90 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
                 raise GMTCLibError(
                     "Failed to close virtual file '{}'.".format(vfname))
 
+    def init_virtual_file(self, vfname):
+        """
+        Reset a virtual file so that modules can read it again.
+
+        Wraps ``GMT_Init_VirtualFile``. GMT only lets one module read an input
+        virtual file unless it's reset after each module call.
+
+        Parameters
+        ----------
+        vfname : str
+            The name of the virtual file.
+
+        Raises
+        ------
+        GMTCLibError
+            If GMT fails to reset the virtual file.
+
+        """
+        c_init_virtualfile = self.get_libgmt_func(
+            'GMT_Init_VirtualFile',
+            argtypes=[ctypes.c_void_p, ctypes.c_uint, ctypes.c_char_p],
+            restype=ctypes.c_int)
+        status = c_init_virtualfile(self.current_session, 0, vfname.encode())
+        if status != 0:
+            raise GMTCLibError(
+                "Failed to reset virtual file '{}'.".format(vfname))
+
+    @contextmanager
+    def attach_options(self, vfile, options):
+        """
+        Add options to all module calls that read a virtual file.
+
+        Some data need module options to be read correctly (for example, the
+        ``-f`` option to mark columns as absolute time). While in the ``with``
+        block, :meth:`~gmt.clib.LibGMT.call_module` appends *options* to the
+        arguments of any module call that includes *vfile*. Options that the
+        module call already has (like ``-f``) aren't added again.
+
+        Parameters
+        ----------
+        vfile : str
+            The name of the virtual file.
+        options : str
+            The module options. Nothing is done if empty.
+
+        """
+        if not options:
+            yield
+            return
+        self._vfile_options[vfile] = options
+        try:
+            yield
+        finally:
+            self._vfile_options.pop(vfile, None)
+
+    def pin(self, handle):
+        """
+        Register data that will be used by many module calls in this session.
+
+        Used by the data handles in :mod:`gmt.clib.handles`
+        (:class:`~gmt.clib.handles.GMTDataset` and
+        :class:`~gmt.clib.handles.GMTGrid`). Their virtual files are reset
+        after each module call that uses them and closed when the session
+        ends.
+
+        Parameters
+        ----------
+        handle : :class:`~gmt.clib.handles.GMTDataHandle`
+            The data handle. Must have a ``vfile`` attribute and a ``close``
+            method.
+
+        """
+        self._pinned.append(handle)
+
+    def unpin(self, handle):
+        """
+        Stop tracking a data handle registered with
+        :meth:`~gmt.clib.LibGMT.pin`.
+        """
+        if handle in self._pinned:
+            self._pinned.remove(handle)
+
     @contextmanager
-    def vectors_to_vfile(self, *vectors):
+    def vectors_to_vfile(self, *vectors, strings=None):
         """
         Store 1d arrays in a GMT virtual file to use as a module input.
 
@@ -978,13 +1480,30 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
 
         If the arrays are C contiguous blocks of memory, they will be passed
         without copying to GMT. If they are not (e.g., they are columns of a 2D
-        array), they will need to be copied to a contiguous block.
+        array), they will need to be copied to a contiguous block. Objects that
+        support the buffer protocol and Apache Arrow arrays (from record
+        batches, for example) without nulls are passed without copying as
+        well. Nulls in Arrow arrays are converted to NaN.
+
+        Arrays of ``datetime64`` are passed as absolute time (numbers of
+        seconds, minutes, hours, or days since 1970) with the options GMT needs
+        to read them added to the module calls (see
+        :func:`gmt.clib.utils.datetime_to_numeric` and
+        :meth:`~gmt.clib.LibGMT.attach_options`). Times in seconds or coarser
+        units aren't copied. They are never formatted as text.
+
+        A column of text can be added after the numerical columns with
+        *strings* (see :meth:`~gmt.clib.LibGMT.put_strings`). This is how
+        modules like ``text`` get the labels for each point in a single call.
 
         Parameters
         ----------
         vectors : 1d arrays
             The vectors that will be included in the array. All must be of the
             same size.
+        strings : 1d array or None
+            The trailing text of each row. Must be of the same size as the
+            vectors.
 
         Yields
         ------
@@ -1009,6 +1528,13 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         ...             lib.call_module('info', args)
         ...             print(ofile.read().strip())
         <vector memory>: N = 3 <1/3> <4/6> <7/9>
+        >>> with LibGMT() as lib:
+        ...     with lib.vectors_to_vfile(x, y, strings=['a', 'b', 'c']) as vf:
+        ...         with GMTTempFile() as ofile:
+        ...             lib.call_module('convert', '{} ->{}'.format(
+        ...                 vf, ofile.name))
+        ...             print(ofile.read().split())
+        ['1', '4', 'a', '2', '5', 'b', '3', '6', 'c']
 
         """
         # Conversion to a C-contiguous array needs to be done here and not in
@@ -1018,7 +1544,7 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         # guarantees that the copy will be around until the virtual file is
         # closed.
         # The conversion is implicit in vectors_to_arrays.
-        arrays = vectors_to_arrays(vectors)
+        arrays, options = datetime_to_numeric(vectors_to_arrays(vectors))
 
         columns = len(arrays)
         rows = len(arrays[0])
@@ -1034,9 +1560,16 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         for col, array in enumerate(arrays):
             self.put_vector(dataset, column=col, vector=array)
 
+        if strings is not None:
+            if len(strings) != rows:
+                raise GMTInvalidInput("All arrays must have same size.")
+            self.put_strings(dataset, family='GMT_IS_VECTOR|GMT_IS_DUPLICATE',
+                             strings=strings)
+
         vf_args = (family, geometry, 'GMT_IN', dataset)
         with self.open_virtual_file(*vf_args) as vfile:
-            yield vfile
+            with self.attach_options(vfile, options):
+                yield vfile
 
     @contextmanager
     def matrix_to_vfile(self, matrix):
@@ -1141,6 +1674,11 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         (e.g., it is a slice of a larger array), the array will be copied to
         make sure it is.
 
+        Grids that hold the unmodified data of a file that GMT can read (like
+        the ones returned by :func:`gmt.datasets.load_earth_relief`) aren't
+        copied at all. The name of the file is yielded instead of a virtual
+        file (see :func:`gmt.clib.utils.dataarray_source`).
+
         Parameters
         ----------
         grid : xarray.DataArraw
@@ -1149,8 +1687,8 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         Yields
         ------
         vfile : str
-            The name of virtual file. Pass this as a file name argument to a
-            GMT module.
+            The name of virtual file (or of the grid file). Pass this as a file
+            name argument to a GMT module.
 
         Examples
         --------
@@ -1177,6 +1715,11 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         >>> # The output is: w e s n z0 z1 dx dy n_columns n_rows
 
         """
+        # GMT can read the grid straight from the file it came from
+        source = dataarray_source(grid)
+        if source is not None:
+            yield source
+            return
         # Conversion to a C-contiguous array needs to be done here and not in
         # put_matrix because we need to maintain a reference to the copy while
         # it is being used by the C API. Otherwise, the array would be garbage
@@ -1195,6 +1738,135 @@ class LibGMT():  # pylint: disable=too-many-instance-attributes
         with self.open_virtual_file(*args) as vfile:
             yield vfile
 
+    @contextmanager
+    def image_to_vfile(self, image, region):
+        """
+        Store an RGB image in a GMT virtual file to use as a module input.
+
+        Used to pass images (like satellite rasters) to modules that read
+        ``GMT_IMAGE`` data, like ``grdimage``, without writing a GeoTIFF file
+        first.
+
+        Context manager (use in a ``with`` block). Yields the virtual file name
+        that you can pass as an argument to a GMT module call. Closes the
+        virtual file upon exit of the ``with`` block.
+
+        The image must be a ``uint8`` array with the top row (North) first. It
+        can be pixel-interleaved, with shape ``(rows, columns, 3)``, or
+        band-interleaved, with shape ``(3, rows, columns)`` (see
+        :func:`gmt.clib.utils.image_layout`). The image is passed to GMT by
+        reference through a ``GMT_MATRIX``, so C contiguous arrays aren't
+        copied. Other arrays are copied to make them contiguous.
+
+        Parameters
+        ----------
+        image : 3d array
+            The red, green, and blue bands of the image.
+        region : list
+            ``[west, east, south, north]``: the extent of the image (the outer
+            edges of the pixels).
+
+        Yields
+        ------
+        vfile : str
+            The name of virtual file. Pass this as a file name argument to a
+            GMT module.
+
+        Examples
+        --------
+
+        >>> import numpy as np
+        >>> from gmt.helpers import GMTTempFile
+        >>> image = np.zeros((90, 180, 3), dtype='uint8')
+        >>> with LibGMT() as lib:
+        ...     with lib.image_to_vfile(image, [-180, 180, -90, 90]) as vfile:
+        ...         with GMTTempFile() as ofile:
+        ...             args = '{} -C ->{}'.format(vfile, ofile.name)
+        ...             lib.call_module('grdinfo', args)
+        ...             print(ofile.read().split()[1:5])
+        ['-180', '180', '-90', '90']
+
+        """
+        layout, matrix, dim, ranges, inc = image_to_matrix(image, region)
+        family = 'GMT_IS_IMAGE|GMT_VIA_MATRIX'
+        geometry = 'GMT_IS_SURFACE'
+        # GMT reads the layout when modules read the image. Restore the old
+        # one afterwards so that it doesn't apply to other images.
+        old_layout = self.get_default('API_IMAGE_LAYOUT')
+        self.set_default('API_IMAGE_LAYOUT', layout)
+        try:
+            gmt_image = self.create_data(
+                family, geometry, mode='GMT_CONTAINER_ONLY', dim=dim,
+                ranges=ranges, inc=inc, registration='GMT_GRID_PIXEL_REG')
+            # The matrix is kept referenced while GMT uses its memory
+            self.put_matrix(gmt_image, matrix)
+            args = (family, geometry, 'GMT_IN|GMT_IS_REFERENCE', gmt_image)
+            with self.open_virtual_file(*args) as vfile:
+                yield vfile
+        finally:
+            self.set_default('API_IMAGE_LAYOUT', old_layout)
+
+    @contextmanager
+    def palette_to_vfile(self, cpt):
+        """
+        Store a color palette table (CPT) in a GMT virtual file.
+
+        Use it to pass a CPT made in Python to the ``C`` argument of modules
+        instead of writing it to a file first. The text is read by GMT through
+        an operating system pipe into a ``GMT_PALETTE`` (see
+        :class:`~gmt.clib.handles.GMTPalette`), so nothing is written to disk.
+
+        Palettes given as :class:`gmt.Palette` objects are read once per
+        session and cached by their ``key``. Later calls reuse the same
+        ``GMT_PALETTE`` and virtual file. Modules that can change the palette
+        (``makecpt`` and ``grd2cpt``, which stretch it to a z range, for
+        example) remove it from the cache, so it's read again the next time.
+        CPT text is read again for every call.
+
+        Context manager (use in a ``with`` block). Yields the virtual file name
+        that you can pass as an argument to a GMT module call. Closes the
+        virtual file upon exit of the ``with`` block.
+
+        Parameters
+        ----------
+        cpt : str or :class:`gmt.Palette`
+            The contents of the CPT in the GMT text format, one slice per line
+            (e.g., ``'0 blue 10 red\\n'``), or a palette object. Text must
+            contain at least one line break or it's taken as a CPT name.
+
+        Yields
+        ------
+        vfile : str
+            The name of virtual file. Pass this as the ``C`` argument of a
+            GMT module.
+
+        Examples
+        --------
+
+        >>> from gmt.helpers import GMTTempFile
+        >>> cpt = '0 black 1 white\\n1 white 2 red\\n'
+        >>> with LibGMT() as lib:
+        ...     with lib.palette_to_vfile(cpt) as vfile:
+        ...         with GMTTempFile() as ofile:
+        ...             args = '-C{} ->{}'.format(vfile, ofile.name)
+        ...             lib.call_module('makecpt', args)
+        ...             lines = ofile.read().split('\\n')
+        >>> # Only count the color slices and not the comments or B, F, N
+        >>> print(len([line for line in lines if line[:1].isdigit()]))
+        2
+
+        """
+        if not hasattr(cpt, 'key'):
+            with GMTPalette(self, cpt) as palette:
+                yield palette.vfile
+            return
+        palette = self._palettes.get(cpt.key)
+        if palette is None or palette.closed:
+            palette = GMTPalette(self, cpt.cpt)
+            self._palettes[cpt.key] = palette
+        # Closed with the session
+        yield palette.vfile
+
     def extract_region(self):
         """
         Extract the WESN bounding box of the currently active figure.
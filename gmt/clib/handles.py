@@ -0,0 +1,181 @@
+"""
+Data registered once with a GMT session and reused by many module calls.
+"""
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+
+from ..exceptions import GMTInvalidInput
+from ..helpers import GMTInputPipe
+from .utils import vectors_to_arrays, datetime_to_numeric
+
+
+class GMTDataHandle(ABC):
+    """
+    Abstract base class for data kept in a GMT virtual file until closed.
+
+    Subclasses implement ``_open`` to put the data into GMT and open the
+    virtual file. The handle registers itself with the session so that
+    :meth:`gmt.clib.LibGMT.call_module` resets the virtual file after each
+    module that reads it (GMT only lets modules read a virtual file once
+    otherwise). Use as a context manager or call :meth:`close` when done.
+
+    Parameters
+    ----------
+    lib : :class:`gmt.clib.LibGMT`
+        A library instance with an open session. The handle can only be used
+        in module calls of this session.
+
+    """
+
+    # Modules that change the data they read. The handle is closed after
+    # them instead of being reset, so the data must be put into GMT again.
+    modified_by = ()
+
+    def __init__(self, lib, *args):
+        self.lib = lib
+        self._stack = ExitStack()
+        try:
+            self.vfile = self._open(*args)
+        except Exception:
+            self._stack.close()
+            raise
+        lib.pin(self)
+
+    @abstractmethod
+    def _open(self, *args):
+        """
+        Put the data into GMT and return the virtual file name.
+        """
+
+    def __str__(self):
+        return self.vfile
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def closed(self):
+        "True if the virtual file was closed."
+        return self.vfile is None
+
+    def close(self):
+        """
+        Close the virtual file. GMT frees the data when the session ends.
+        """
+        if self.vfile is not None:
+            self.lib.unpin(self)
+            self.vfile = None
+            self._stack.close()
+
+
+class GMTDataset(GMTDataHandle):
+    """
+    A table made of 1d arrays that can be passed to many GMT modules.
+
+    The arrays are put into a ``GMT_DATASET`` once and the virtual file is
+    opened with ``GMT_IS_REFERENCE`` so that GMT uses the memory of the arrays
+    without copying them. Pass the handle (or its ``vfile``) wherever a module
+    expects an input table file name.
+
+    Parameters
+    ----------
+    lib : :class:`gmt.clib.LibGMT`
+        A library instance with an open session.
+    vectors : 1d arrays
+        The columns of the table. All must be of the same size. Columns of
+        ``datetime64`` are passed as absolute time (see
+        :meth:`gmt.clib.LibGMT.vectors_to_vfile`).
+
+    Examples
+    --------
+
+    >>> from gmt.clib import LibGMT
+    >>> from gmt.helpers import GMTTempFile
+    >>> with LibGMT() as lib:
+    ...     with GMTDataset(lib, [1, 2, 3], [4, 5, 6]) as dataset:
+    ...         for module in ['info', 'info']:
+    ...             with GMTTempFile() as ofile:
+    ...                 args = '{} -C ->{}'.format(dataset, ofile.name)
+    ...                 lib.call_module(module, args)
+    ...                 print(ofile.read().strip())
+    1 3 4 6
+    1 3 4 6
+
+    """
+
+    family = 'GMT_IS_DATASET|GMT_VIA_VECTOR'
+    geometry = 'GMT_IS_POINT'
+
+    def _open(self, *vectors):
+        # Keep references to the arrays because GMT uses their memory
+        self.arrays, options = datetime_to_numeric(vectors_to_arrays(vectors))
+        rows = len(self.arrays[0])
+        if not all(len(i) == rows for i in self.arrays):
+            raise GMTInvalidInput("All arrays must have same size.")
+        dataset = self.lib.create_data(self.family, self.geometry,
+                                       mode='GMT_CONTAINER_ONLY',
+                                       dim=[len(self.arrays), rows, 1, 0])
+        for col, array in enumerate(self.arrays):
+            self.lib.put_vector(dataset, column=col, vector=array)
+        vfile = self._stack.enter_context(self.lib.open_virtual_file(
+            self.family, self.geometry, 'GMT_IN|GMT_IS_REFERENCE', dataset))
+        self._stack.enter_context(self.lib.attach_options(vfile, options))
+        return vfile
+
+
+class GMTGrid(GMTDataHandle):
+    """
+    An xarray.DataArray grid that can be passed to many GMT modules.
+
+    The grid is put into GMT once (see
+    :meth:`gmt.clib.LibGMT.grid_to_vfile`). Pass the handle (or its
+    ``vfile``) wherever a module expects an input grid file name.
+
+    Parameters
+    ----------
+    lib : :class:`gmt.clib.LibGMT`
+        A library instance with an open session.
+    grid : xarray.DataArray
+        The grid.
+
+    """
+
+    def _open(self, *args):
+        grid, = args
+        return self._stack.enter_context(self.lib.grid_to_vfile(grid))
+
+
+class GMTPalette(GMTDataHandle):
+    """
+    A color palette table (CPT) that can be passed to many GMT modules.
+
+    The text of the CPT is read by GMT once into a ``GMT_PALETTE`` through an
+    operating system pipe (see :class:`gmt.helpers.GMTInputPipe`). Pass the
+    handle (or its ``vfile``) to the ``C`` argument of modules.
+
+    Modules that make new CPTs from the palette (``makecpt`` and ``grd2cpt``)
+    can change it, stretching it to a new z range for example. The handle is
+    closed after any of them reads it.
+
+    Parameters
+    ----------
+    lib : :class:`gmt.clib.LibGMT`
+        A library instance with an open session.
+    cpt : str
+        The contents of the CPT in the GMT text format.
+
+    """
+
+    modified_by = ('makecpt', 'grd2cpt')
+
+    def _open(self, *args):
+        cpt, = args
+        with GMTInputPipe(cpt) as pipe:
+            palette = self.lib.read_data('GMT_IS_PALETTE', 'GMT_IS_NONE',
+                                         pipe.name)
+        return self._stack.enter_context(self.lib.open_virtual_file(
+            'GMT_IS_PALETTE', 'GMT_IS_NONE', 'GMT_IN|GMT_IS_REFERENCE',
+            palette))
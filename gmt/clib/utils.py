@@ -4,12 +4,21 @@ Miscellaneous utilities
 import os
 import sys
 import ctypes
+import weakref
 
 import numpy as np
 import pandas
 
 from ..exceptions import GMTOSError, GMTCLibError, GMTCLibNotFoundError, \
     GMTInvalidInput
+from ..helpers import file_signature
+
+
+# Grids known to hold the unmodified data of a grid file. Maps the id of the
+# data array to a weak reference to it, the file name, and the state of the
+# grid and the file when registered (see register_file_grid). Many grids
+# (like a cached and a memory-mapped one) can be registered for the same file.
+FILE_GRIDS = {}
 
 
 def dataarray_to_matrix(grid):
@@ -109,6 +118,257 @@ def dataarray_to_matrix(grid):
     return matrix, region, inc
 
 
+def dataarray_to_image(image):
+    """
+    Get the RGB array and the extent of an image stored in a DataArray.
+
+    The image must be a ``uint8`` DataArray with a band dimension of size 3
+    first or last (see :func:`image_layout`) and regularly spaced coordinates
+    at the pixel centers in the other two (rows, columns). Rows are flipped if
+    the row coordinates increase so that the top row (North) comes first, as
+    GMT expects. This makes a copy. Otherwise, the data aren't copied.
+
+    Parameters
+    ----------
+    image : xarray.DataArray
+        The image.
+
+    Returns
+    -------
+    array : 3d array
+        The RGB image with the top row first.
+    region : list
+        The West, East, South, North edges of the image pixels.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> import xarray as xr
+    >>> image = xr.DataArray(np.zeros((2, 3, 3), dtype='uint8'),
+    ...                      dims=['lat', 'lon', 'band'],
+    ...                      coords=dict(lat=[0.5, 1.5], lon=[10, 12, 14]))
+    >>> array, region = dataarray_to_image(image)
+    >>> print(array.shape, region)
+    (2, 3, 3) [9.0, 15.0, 0.0, 2.0]
+
+    """
+    layout = image_layout(image.values)[0]
+    array = image.values
+    dims = image.dims[:2] if layout == 'TRPa' else image.dims[1:]
+    region = []
+    for dim in dims[::-1]:
+        coord = image.coords[dim].values.astype('float64')
+        if coord.size < 2:
+            raise GMTInvalidInput(
+                "Images need at least two pixels in dimension '{}'."
+                .format(dim))
+        spacing = abs(coord[1] - coord[0])
+        region.extend([coord.min() - spacing/2, coord.max() + spacing/2])
+    row_coord = image.coords[dims[0]].values
+    if row_coord[1] > row_coord[0]:
+        array = array[::-1] if layout == 'TRPa' else array[:, ::-1]
+    return array, [float(i) for i in region]
+
+
+def image_layout(image):
+    """
+    Find how the bands of an RGB image are arranged in memory.
+
+    Images are 3d ``uint8`` arrays. Pixel-interleaved images have the bands
+    in the last dimension, ``(rows, columns, 3)``, and band-interleaved images
+    in the first, ``(3, rows, columns)``. Images with 3 bands in both (3x3
+    pixels) are taken as pixel-interleaved.
+
+    Parameters
+    ----------
+    image : 3d array
+        The image.
+
+    Returns
+    -------
+    layout : str
+        The GMT memory layout of the image (``API_IMAGE_LAYOUT``): top row
+        first, row-major, and pixel (``'TRPa'``) or band (``'TRBa'``)
+        interleaved.
+    bands, rows, columns : int
+        The size of the image.
+
+    Raises
+    ------
+    GMTInvalidInput
+        If the image isn't a 3d ``uint8`` array with 3 bands.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> image_layout(np.zeros((10, 20, 3), dtype='uint8'))
+    ('TRPa', 3, 10, 20)
+    >>> image_layout(np.zeros((3, 10, 20), dtype='uint8'))
+    ('TRBa', 3, 10, 20)
+
+    """
+    if image.dtype.name != 'uint8' or image.ndim != 3:
+        raise GMTInvalidInput(
+            "Images must be 3d arrays of type uint8, got {}d {}."
+            .format(image.ndim, image.dtype.name))
+    if image.shape[2] == 3:
+        return ('TRPa', 3) + image.shape[:2]
+    if image.shape[0] == 3:
+        return ('TRBa', 3) + image.shape[1:]
+    raise GMTInvalidInput(
+        "Invalid image shape {}. Must have 3 bands in the first or last "
+        "dimension.".format(image.shape))
+
+
+def image_to_matrix(image, region):
+    """
+    Get the 2D matrix and metadata needed to pass an RGB image to GMT.
+
+    Images are passed to GMT as ``GMT_IMAGE`` containers filled from a
+    ``GMT_MATRIX`` of bytes. The matrix has one row per image row (or per band
+    and row for band-interleaved images). The image is copied only if it isn't
+    C contiguous.
+
+    Parameters
+    ----------
+    image : 3d array
+        The ``uint8`` image (see :func:`image_layout`).
+    region : list
+        ``[west, east, south, north]``: the extent of the image (the outer
+        edges of the pixels).
+
+    Returns
+    -------
+    layout : str
+        The GMT memory layout of the image (``API_IMAGE_LAYOUT``).
+    matrix : 2d array
+        The C contiguous image data.
+    dim : list
+        The number of columns, rows, and bands of the image.
+    ranges : list
+        The West, East, South, North edges of the image.
+    inc : list
+        The pixel size in East-West and North-South, respectively.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> image = np.zeros((3, 10, 20), dtype='uint8')
+    >>> layout, matrix, dim, ranges, inc = image_to_matrix(image,
+    ...                                                    [0, 40, -10, 10])
+    >>> print(layout, matrix.shape, dim, ranges, inc)
+    TRBa (30, 20) [20, 10, 3, 0] [0.0, 40.0, -10.0, 10.0] [2.0, 2.0]
+
+    """
+    layout, bands, rows, columns = image_layout(image)
+    matrix = as_c_contiguous(image).reshape((-1, image.shape[-1]))
+    ranges = [float(i) for i in region[:4]]
+    inc = [(ranges[1] - ranges[0])/columns, (ranges[3] - ranges[2])/rows]
+    return layout, matrix, [columns, rows, bands, 0], ranges, inc
+
+
+def register_file_grid(grid, fname):
+    """
+    Record that a grid holds exactly the data in a grid file.
+
+    Grids registered here will be passed to GMT by file name in
+    :meth:`~gmt.clib.LibGMT.grid_to_vfile` instead of being copied into
+    memory (see :func:`dataarray_source`). Only grids with **read-only** data
+    can be registered because there is no cheap way of knowing if writable
+    data were modified. Sets ``grid.encoding['source']`` to *fname*.
+
+    Parameters
+    ----------
+    grid : xarray.DataArray
+        The grid loaded from *fname*.
+    fname : str
+        The grid file that GMT can read.
+
+    """
+    data = grid.data
+    if not isinstance(data, np.ndarray) or data.flags.writeable:
+        return
+    grid.encoding['source'] = fname
+    key = id(data)
+
+    def forget(data_ref):
+        "Remove the entry when the data array is garbage collected"
+        if FILE_GRIDS.get(key, [None])[0] is data_ref:
+            del FILE_GRIDS[key]
+
+    FILE_GRIDS[key] = (weakref.ref(data, forget), fname,
+                       _grid_fingerprint(grid), file_signature(fname))
+
+
+def dataarray_source(grid):
+    """
+    Get the file that a grid was loaded from if it hasn't been modified.
+
+    The grid must have been registered with :func:`register_file_grid` and
+    still have the same data array (not a copy or a slice of it), read-only,
+    and the same dimensions and coordinates. The file must not have changed
+    since the grid was registered.
+
+    Parameters
+    ----------
+    grid : xarray.DataArray
+        The grid to check.
+
+    Returns
+    -------
+    fname : str or None
+        The grid file name or None if GMT can't use it instead of the grid.
+
+    Examples
+    --------
+
+    >>> import xarray as xr
+    >>> from gmt.helpers import GMTTempFile
+    >>> data = np.arange(6, dtype='float32').reshape((2, 3))
+    >>> data.flags.writeable = False
+    >>> grid = xr.DataArray(data, dims=['lat', 'lon'],
+    ...                     coords=dict(lat=[0, 1], lon=[0, 1, 2]))
+    >>> with GMTTempFile(suffix='.nc') as tmpfile:
+    ...     register_file_grid(grid, tmpfile.name)
+    ...     dataarray_source(grid) == tmpfile.name
+    ...     dataarray_source(grid.copy(deep=False)) == tmpfile.name
+    ...     print(dataarray_source(grid[:, 1:]), dataarray_source(grid + 1))
+    True
+    True
+    None None
+
+    """
+    data = grid.data
+    entry = FILE_GRIDS.get(id(data))
+    if entry is None:
+        return None
+    data_ref, source, fingerprint, signature = entry
+    # The id of a collected array can be reused by a new one
+    if data_ref() is not data or data.flags.writeable:
+        return None
+    if grid.encoding.get('source') != source:
+        return None
+    if _grid_fingerprint(grid) != fingerprint:
+        return None
+    if file_signature(source) != signature:
+        return None
+    return source
+
+
+def _grid_fingerprint(grid):
+    """
+    Summarize the dimensions and coordinates of a grid to detect changes.
+    """
+    fingerprint = []
+    for dim in grid.dims:
+        coord = grid.coords[dim].values
+        fingerprint.append((dim, coord.size, coord[0], coord[-1]))
+    return fingerprint
+
+
 def vectors_to_arrays(vectors):
     """
     Convert 1d vectors (lists, arrays or pandas.Series) to C contiguous 1d
@@ -156,6 +416,78 @@ def vectors_to_arrays(vectors):
     return arrays
 
 
+def datetime_to_numeric(arrays):
+    """
+    Convert datetime64 arrays to numbers that GMT reads as absolute time.
+
+    GMT stores absolute time as the number of time units (``TIME_UNIT``)
+    since an epoch (``TIME_EPOCH``). If all datetime64 arrays have the same
+    unit and GMT supports it (seconds, minutes, hours, or days) and there are
+    no NaT values, the arrays are viewed as their int64 values without
+    copying. Otherwise, they are converted to float64 seconds (NaT becomes
+    NaN).
+
+    Other arrays are returned unchanged.
+
+    Parameters
+    ----------
+    arrays : list of 1d arrays
+        The columns of a table.
+
+    Returns
+    -------
+    arrays : list of 1d arrays
+        The columns with times converted to numbers.
+    options : str
+        The GMT options that mark the time columns as absolute time and set
+        the epoch and unit (e.g., ``'-f0T --TIME_EPOCH=1970-01-01T00:00:00
+        --TIME_UNIT=s'``). Empty if there are no time columns.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> times = np.array(['2018-01-01', '2018-01-03'], dtype='datetime64[D]')
+    >>> arrays, options = datetime_to_numeric([np.arange(2), times])
+    >>> arrays[1]
+    array([17532, 17534])
+    >>> np.shares_memory(arrays[1], times)
+    True
+    >>> print(options)
+    -f1T --TIME_EPOCH=1970-01-01T00:00:00 --TIME_UNIT=d
+    >>> times = np.array(['2018-01-01T00:00:00.5', 'NaT'],
+    ...                  dtype='datetime64[ms]')
+    >>> arrays, options = datetime_to_numeric([times])
+    >>> print(*arrays[0])
+    1514764800.5 nan
+    >>> print(options)
+    -f0T --TIME_EPOCH=1970-01-01T00:00:00 --TIME_UNIT=s
+
+    """
+    columns = [i for i, array in enumerate(arrays)
+               if np.issubdtype(array.dtype, np.datetime64)]
+    if not columns:
+        return arrays, ''
+    units = set(np.datetime_data(arrays[i].dtype) for i in columns)
+    gmt_units = {'s': 's', 'm': 'm', 'h': 'h', 'D': 'd'}
+    unit = None
+    if len(units) == 1:
+        unit, count = units.pop()
+        if count != 1 or any(np.isnat(arrays[i]).any() for i in columns):
+            unit = None
+        unit = gmt_units.get(unit)
+    arrays = list(arrays)
+    for i in columns:
+        if unit is None:
+            arrays[i] = (arrays[i] - np.datetime64(0, 's'))/np.timedelta64(
+                1, 's')
+        else:
+            arrays[i] = arrays[i].view('int64')
+    options = '-f{} --TIME_EPOCH=1970-01-01T00:00:00 --TIME_UNIT={}'.format(
+        ','.join('{}T'.format(i) for i in columns), unit or 's')
+    return arrays, options
+
+
 def as_c_contiguous(array):
     """
     Ensure a numpy array is C contiguous in memory.
@@ -204,11 +536,14 @@ def _as_array(vector):
     Convert a vector (pandas.Series, tuple, list or numpy array) to a numpy
     array.
 
-    If vector is already an array, do nothing.
+    If vector is already an array, do nothing. Objects that support the
+    buffer protocol (like :class:`array.array` or :class:`memoryview`) are
+    viewed as numpy arrays without copying. So are Apache Arrow arrays
+    without nulls (nulls are converted to NaN).
 
     Parameters
     ----------
-    vector : tuple, list, pandas.Series or numpy 1d array
+    vector : tuple, list, pandas.Series, Arrow array or numpy 1d array
         The vector to convert.
 
     Returns
@@ -234,13 +569,46 @@ def _as_array(vector):
     <class 'numpy.ndarray'>
     >>> type(_as_array(range(15)))
     <class 'numpy.ndarray'>
+    >>> import array
+    >>> buffer = array.array('d', [1, 2, 3])
+    >>> np.shares_memory(_as_array(buffer), np.frombuffer(buffer))
+    True
 
     """
     if isinstance(vector, pandas.Series):
         return vector.as_matrix()
+    if hasattr(vector, 'null_count') and hasattr(vector, 'to_numpy'):
+        return _arrow_to_numpy(vector)
     return np.asarray(vector)
 
 
+def _arrow_to_numpy(vector):
+    """
+    Convert an Apache Arrow array (or chunked array) to a numpy array.
+
+    Arrays without nulls of a numeric type are viewed without copying. Nulls
+    are converted to NaN (NaT for times), which requires a copy. Chunked
+    arrays with more than one chunk are always concatenated into a copy.
+
+    Doesn't import pyarrow so that it's not a dependency. Arrow arrays are
+    recognized by their ``null_count`` and ``to_numpy`` attributes.
+    """
+    chunks = getattr(vector, 'chunks', None)
+    if chunks is not None:
+        if len(chunks) == 1:
+            return _arrow_to_numpy(chunks[0])
+        if not chunks:
+            return np.asarray(vector)
+        return np.concatenate([_arrow_to_numpy(chunk) for chunk in chunks])
+    if vector.null_count == 0:
+        try:
+            return vector.to_numpy(zero_copy_only=True)
+        except ValueError:
+            # Types that can't be viewed as numpy arrays (booleans, strings)
+            pass
+    return vector.to_numpy(zero_copy_only=False)
+
+
 def load_libgmt(env=None):
     """
     Find and load ``libgmt`` as a :py:class:`ctypes.CDLL`.
@@ -2,4 +2,5 @@
 Load sample data included with GMT (downloaded from the GMT cache server).
 """
 from .tutorial import load_japan_quakes
-from .earth_relief import load_earth_relief
+from .earth_relief import load_earth_relief, earth_relief_cache_info, \
+    clear_earth_relief_cache, earth_relief_resolution
@@ -0,0 +1,210 @@
+"""
+Binary caches for datasets parsed from text files and decoded from netCDF.
+"""
+import os
+import json
+import shutil
+from tempfile import mkdtemp
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from ..helpers import cache_dir, file_signature
+
+
+def load_cached_table(fname, reader, name):
+    """
+    Load a table parsed from a text file, using a binary cache if possible.
+
+    The first time, the table is parsed with *reader* and each column is saved
+    to an uncompressed ``.npy`` file in the ``datasets`` cache directory (see
+    :func:`gmt.helpers.cache_dir`). Later loads memory-map these files instead
+    of parsing the text again. The cache is rebuilt if the modification time
+    or the size of *fname* change.
+
+    Tables with columns that aren't numeric (strings, for example) can't be
+    memory-mapped and are always parsed with *reader*.
+
+    Parameters
+    ----------
+    fname : str
+        The text file with the table.
+    reader : function
+        Takes *fname* and returns a :class:`pandas.DataFrame`.
+    name : str
+        A unique name for the cached table.
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        The parsed table.
+
+    Examples
+    --------
+
+    >>> from gmt.helpers import GMTTempFile
+    >>> def reader(fname):
+    ...     return pd.read_table(fname, sep=r'\\s+', names=['a', 'b'])
+    >>> with GMTTempFile() as tmpfile:
+    ...     with open(tmpfile.name, 'w') as ftable:
+    ...         print('1 2\\n3 4', file=ftable)
+    ...     data = load_cached_table(tmpfile.name, reader, 'doctest-table')
+    ...     cached = load_cached_table(tmpfile.name, reader, 'doctest-table')
+    >>> print(cached.b.values)
+    [2 4]
+    >>> clear_dataset_cache('doctest-table')
+
+    """
+    signature = file_signature(fname)
+    path = _cache_path(name)
+    meta = _read_meta(path, signature)
+    if meta is not None:
+        try:
+            columns = _read_arrays(path, len(meta['columns']))
+        except (OSError, ValueError):
+            columns = None
+        if columns is not None:
+            # Build the frame from Series so that pandas doesn't consolidate
+            # (copy) the memory-mapped columns into a single block.
+            return pd.DataFrame(
+                {name: pd.Series(column, copy=False)
+                 for name, column in zip(meta['columns'], columns)},
+                columns=meta['columns'], copy=False)
+    data = reader(fname)
+    if signature is not None and _cacheable_table(data):
+        try:
+            _write_cache(path, [data[column].values
+                                for column in data.columns],
+                         dict(columns=[str(column)
+                                       for column in data.columns],
+                              signature=signature))
+        except OSError:
+            # Can't cache this table but the parsed version is still good
+            pass
+    return data
+
+
+def load_cached_grid(fname, name):
+    """
+    Load a grid from a netCDF file as a memory-mapped array.
+
+    The first time, the grid is decoded from *fname* and saved to an
+    uncompressed ``.npy`` file (with the coordinates and attributes next to
+    it) in the ``datasets`` cache directory. Later loads memory-map this file,
+    which takes almost no time and lets all processes loading the same grid
+    share it through the operating system page cache. The data are only read
+    from disk when accessed. The cache is rebuilt if the modification time or
+    the size of *fname* change.
+
+    Parameters
+    ----------
+    fname : str
+        The netCDF grid file.
+    name : str
+        A unique name for the cached grid.
+
+    Returns
+    -------
+    grid : xarray.DataArray
+        The grid. The data are a **read-only** :class:`numpy.memmap`.
+
+    """
+    signature = file_signature(fname)
+    path = _cache_path(name)
+    meta = _read_meta(path, signature)
+    if meta is None:
+        with xr.open_dataarray(fname) as dataarray:
+            grid = dataarray.load()
+        meta = dict(dims=[str(dim) for dim in grid.dims],
+                    name=None if grid.name is None else str(grid.name),
+                    attrs={key: value for key, value in grid.attrs.items()
+                           if isinstance(value, (str, int, float))},
+                    signature=signature)
+        arrays = [grid.values] + [grid[dim].values for dim in grid.dims]
+        try:
+            _write_cache(path, arrays, meta)
+        except OSError:
+            # Can't cache this grid but the decoded version is still good
+            return grid
+    data, *coords = _read_arrays(path, 1 + len(meta['dims']))
+    return xr.DataArray(data, coords=dict(zip(meta['dims'], coords)),
+                        dims=meta['dims'], name=meta['name'],
+                        attrs=meta['attrs'])
+
+
+def clear_dataset_cache(name):
+    """
+    Remove a table or grid from the binary dataset cache.
+
+    Parameters
+    ----------
+    name : str
+        The name used when caching the dataset.
+
+    """
+    path = _cache_path(name)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+
+def _cache_path(name):
+    """
+    The directory with the cached arrays of a dataset.
+    """
+    return os.path.join(cache_dir('datasets'), name)
+
+
+def _read_meta(path, signature):
+    """
+    Read the metadata of a cached dataset. Returns None if missing or stale.
+    """
+    try:
+        with open(os.path.join(path, 'meta.json')) as fmeta:
+            meta = json.load(fmeta)
+    except (OSError, ValueError):
+        return None
+    if signature is None or meta['signature'] != signature:
+        return None
+    return meta
+
+
+def _read_arrays(path, count):
+    """
+    Memory-map the arrays saved in a cache directory.
+    """
+    return [np.load(os.path.join(path, '{}.npy'.format(i)), mmap_mode='r')
+            for i in range(count)]
+
+
+def _write_cache(path, arrays, meta):
+    """
+    Save arrays and their metadata to the cache.
+
+    The files are written to a temporary directory that replaces the old
+    cache when complete, so other processes never see a partial dataset.
+    """
+    tmpdir = mkdtemp(dir=os.path.dirname(path), prefix='.gmt-python-')
+    try:
+        for i, array in enumerate(arrays):
+            np.save(os.path.join(tmpdir, '{}.npy'.format(i)),
+                    np.ascontiguousarray(array))
+        with open(os.path.join(tmpdir, 'meta.json'), 'w') as fmeta:
+            json.dump(meta, fmeta)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmpdir, path)
+    finally:
+        if os.path.exists(tmpdir):
+            shutil.rmtree(tmpdir)
+
+
+def _cacheable_table(data):
+    """
+    Check if all columns of a table are numeric and have unique names.
+    """
+    columns = [str(column) for column in data.columns]
+    if len(set(columns)) != len(columns):
+        return False
+    return all(pd.api.types.is_numeric_dtype(data[column].values.dtype)
+               for column in data.columns)
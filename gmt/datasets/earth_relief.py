@@ -2,13 +2,34 @@
 Functions to download the Earth relief datasets from the GMT data sever.
 The grids are available in various resolutions.
 """
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import xarray as xr
 
 from .. import which
+from ..clib.utils import register_file_grid
 from ..exceptions import GMTInvalidInput
+from ..helpers import LRUCache, projection_width, region_bounds
+from .cache import load_cached_grid
+
+
+# Grids loaded by load_earth_relief are kept in memory up to this size
+RELIEF_CACHE = LRUCache(max_bytes=2**30)
+
+# The file names of the 1x1 degree SRTM tiles for each resolution. The tag is
+# the latitude and longitude of the South-West corner (e.g., 'N37W120').
+SRTM_RESOLUTIONS = {
+    '01s': '@{tag}.SRTMGL1.nc',
+    '03s': '@{tag}.SRTMGL3.nc',
+}
 
+# The maximum number of threads used to read SRTM tiles
+SRTM_MAX_THREADS = 8
 
-def load_earth_relief(resolution='60m'):
+
+def load_earth_relief(resolution='60m', region=None, cache=True,
+                      memmap=False):
     """
     Load Earth relief grids (topography and bathymetry) in various resolutions.
 
@@ -19,13 +40,51 @@ def load_earth_relief(resolution='60m'):
     These grids can also be accessed by passing in the file name
     ``'@earth_relief_XXm'`` to any grid plotting/processing function. Higher
     resolution SRTM grids can be accessed by using the ``'@earth_relief_XXs'``
-    special file names but they cannot be loaded using this function.
+    special file names.
+
+    The SRTM resolutions (``'01s'`` and ``'03s'``) are split into 1x1 degree
+    tiles over land and can only be loaded for a *region*. The tiles covering
+    the region are found in a single call to :func:`gmt.which` (and downloaded
+    if needed), the part of each tile inside the region is read in parallel
+    threads, and the parts are joined into a single grid. Points not covered
+    by any tile (the oceans) are NaN.
+
+    Loaded grids are kept in an in-memory cache (bounded by size, see
+    :func:`gmt.datasets.earth_relief_cache_info`) so that loading the same
+    resolution again doesn't read the file. The cached data are shared by all
+    returned grids and are **read-only**. Make a copy (``grid.copy()``) if you
+    need to modify them. Because they are unmodified, full grids are passed to
+    GMT modules by file name instead of being copied into GMT.
+
+    Use *region* to get only a part of the grid. If the full grid isn't
+    already in the cache, the file is opened lazily and only the data inside
+    the region are read from it. Regions can use longitudes from -180 to 180
+    or from 0 to 360 and can cross the antimeridian.
+
+    Use ``memmap=True`` to skip decoding the netCDF file every time a new
+    Python process loads a grid. The grid is converted once to an
+    uncompressed binary file in the GMT/Python cache (usually
+    ``~/.gmt/gmt-python/datasets``) that is then memory-mapped. Loading is
+    almost instantaneous and processes loading the same grid share its memory
+    through the operating system.
 
     Parameters
     ----------
     resolution : str
         The grid resolution. The prefix ``m`` stands for arc-minute. It can be
         ``'60m'``, ``'30m'``, ``'10m'``, ``'05m'``, ``'02m'``, or ``'01m'``.
+        The prefix ``s`` stands for arc-second, which can be ``'03s'`` or
+        ``'01s'`` (requires a *region*).
+    region : list or None
+        ``[west, east, south, north]`` in degrees. If given, return only the
+        part of the grid inside this region (edges included).
+    cache : bool
+        If ``False``, don't use the in-memory cache and return the grid opened
+        lazily from the file (the data are only read when accessed).
+    memmap : bool
+        If ``True``, return a **read-only** grid memory-mapped from a binary
+        copy of the file (created the first time). Not available for the SRTM
+        resolutions. The in-memory cache isn't used in this case.
 
     Returns
     -------
@@ -36,14 +95,366 @@ def load_earth_relief(resolution='60m'):
     """
     valid_resolutions = ['{:02d}m'.format(res)
                          for res in [60, 30, 10, 5, 2, 1]]
+    if resolution in SRTM_RESOLUTIONS:
+        if memmap:
+            raise GMTInvalidInput(
+                "The SRTM resolution '{}' can't be memory-mapped."
+                .format(resolution))
+        if region is None:
+            raise GMTInvalidInput(
+                "The SRTM resolution '{}' can only be loaded for a region."
+                .format(resolution))
+        return _load_srtm_tiles(resolution, region)
     if resolution not in valid_resolutions:
         raise GMTInvalidInput("Invalid Earth relief resolution '{}'."
                               .format(resolution))
+    if memmap:
+        fname = which('@earth_relief_{}'.format(resolution), download='u')
+        grid = load_cached_grid(fname, 'earth_relief_{}'.format(resolution))
+        register_file_grid(grid, fname)
+        if region is not None:
+            return _subset_region(grid, region)
+        return grid
+    if region is not None:
+        return _load_earth_relief_region(resolution, region, cache)
+    if not cache:
+        fname = which('@earth_relief_{}'.format(resolution), download='u')
+        return xr.open_dataarray(fname)
+    grid = RELIEF_CACHE.get(resolution)
+    if grid is None:
+        fname = which('@earth_relief_{}'.format(resolution), download='u')
+        with xr.open_dataarray(fname) as dataarray:
+            grid = dataarray.load()
+        grid.values.flags.writeable = False
+        register_file_grid(grid, fname)
+        RELIEF_CACHE.put(resolution, grid, nbytes=grid.nbytes)
+    # Shallow copy so that changes to the metadata of the returned grid don't
+    # affect the cached one. The data array is shared.
+    return grid.copy(deep=False)
+
+
+def earth_relief_resolution(region, projection=None, width=None, dpi=300):
+    """
+    Pick the coarsest Earth relief grid that is still enough for a map.
+
+    A map that is *width* inches wide at *dpi* has ``width*dpi`` pixels across
+    the longitude range of the *region*. There is no gain in using a grid
+    with more points than that. This function returns the coarsest resolution
+    with a grid spacing smaller than or equal to the size of a pixel.
+
+    Use the result with :func:`gmt.datasets.load_earth_relief` or in the
+    special file names ``'@earth_relief_XXm'``.
+
+    Parameters
+    ----------
+    region : str or list
+        The map region ``[west, east, south, north]`` or
+        ``'west/east/south/north'``.
+    projection : str or None
+        The GMT projection string (*J*) used for the map. The width of the map
+        is taken from it (see :func:`gmt.helpers.projection_width`).
+    width : float or None
+        The width of the map in inches. Use if the projection is given by
+        scale instead of width. Overrides the width in *projection*.
+    dpi : int
+        The resolution (dots per inch) of the final figure.
+
+    Returns
+    -------
+    resolution : str
+        The grid resolution, like ``'05m'``.
+
+    Examples
+    --------
+
+    >>> # A world map 6 inches wide at 300 dpi has 0.2 degree pixels
+    >>> earth_relief_resolution([-180, 180, -90, 90], projection='W6i')
+    '10m'
+    >>> # Thumbnails don't need more than the coarsest grid
+    >>> earth_relief_resolution([-180, 180, -90, 90], projection='W2i',
+    ...                         dpi=100)
+    '60m'
+    >>> # Small regions need the finest grid
+    >>> res = earth_relief_resolution('-10/-5/35/40', projection='M6i')
+    >>> print(res, '@earth_relief_{}'.format(res))
+    01m @earth_relief_01m
+
+    """
+    bounds = region_bounds(region)
+    if bounds is None:
+        raise GMTInvalidInput(
+            "Invalid region '{}'. Must be numerical.".format(region))
+    if width is None and projection is not None:
+        width = projection_width(projection)
+    if width is None:
+        raise GMTInvalidInput(
+            "Couldn't get the map width from projection '{}'. "
+            "Use the 'width' argument.".format(projection))
+    west, east = bounds[:2]
+    # The size of a pixel in arc-minutes
+    pixel = (east - west)*60/(width*dpi)
+    for minutes in [60, 30, 10, 5, 2]:
+        if minutes <= pixel:
+            return '{:02d}m'.format(minutes)
+    return '01m'
+
+
+def _load_earth_relief_region(resolution, region, cache):
+    """
+    Load the part of an Earth relief grid inside the given region.
+
+    Uses the full grid from the cache if it's there. Otherwise, opens the file
+    lazily and only reads the data inside the region.
+    """
+    grid = RELIEF_CACHE.get(resolution) if cache else None
+    if grid is not None:
+        return _subset_region(grid, region)
     fname = which('@earth_relief_{}'.format(resolution), download='u')
-    grid = xr.open_dataarray(fname)
+    with xr.open_dataarray(fname) as dataarray:
+        subset = _subset_region(dataarray, region).load()
+    return subset
+
+
+def _load_srtm_tiles(resolution, region):
+    """
+    Load the part of the SRTM grid inside a region from the 1x1 degree tiles.
+    """
+    bounds = _srtm_bounds(region)
+    # Spacing in degrees of the grids: 1 or 3 arc-seconds
+    spacing = int(resolution[:2])/3600
+    lon, lat = [np.arange(np.ceil(round(start/spacing, 6)),
+                          np.floor(round(stop/spacing, 6)) + 1)*spacing
+                for start, stop in [bounds[:2], bounds[2:]]]
+    mosaic = np.full((lat.size, lon.size), np.nan, dtype='float32')
+    # Tiles over the oceans don't exist and are left as NaN
+    paths = which([SRTM_RESOLUTIONS[resolution].format(tag=_srtm_tag(*tile))
+                   for tile in _srtm_tiles(bounds)],
+                  download='u', missing_ok=True)
+    existing = [path for path in paths if path is not None]
+    if lon.size and lat.size and existing:
+        window = [lon[0], lon[-1], lat[0], lat[-1]]
+        for part in _read_tiles(existing, window):
+            col = int(round((part.lon.values[0] - lon[0])/spacing))
+            row = int(round((part.lat.values[0] - lat[0])/spacing))
+            mosaic[row:row + part.shape[0],
+                   col:col + part.shape[1]] = part.values
+    grid = xr.DataArray(mosaic, coords=dict(lat=lat, lon=lon),
+                        dims=['lat', 'lon'], name='z')
     return grid
 
 
+def _srtm_bounds(region):
+    """
+    Check that a region can be cut from the SRTM tiles and get its bounds.
+
+    Longitudes can be in any range (like 0 to 360) and cross the antimeridian,
+    as in :func:`_subset_region`. The bounds are kept in the same range.
+    """
+    bounds = region_bounds(region)
+    if bounds is None:
+        raise GMTInvalidInput(
+            "Invalid region '{}'. Must be [west, east, south, north]."
+            .format(region))
+    west, east, south, north = bounds
+    if not 0 <= east - west <= 360 or not -90 <= south <= north <= 90:
+        raise GMTInvalidInput(
+            "Invalid region '{}' for SRTM tiles. Longitudes must span at "
+            "most 360 degrees and latitudes be in [-90, 90].".format(region))
+    return bounds
+
+
+def _read_tiles(paths, window):
+    """
+    Read the parts of the tile files inside a window in parallel threads.
+
+    Yields the non-empty parts with latitudes in increasing order.
+    """
+    def read_tile(path):
+        "Read the part of a tile inside the window"
+        with xr.open_dataarray(path) as tile:
+            tile = tile.rename({tile.dims[0]: 'lat', tile.dims[1]: 'lon'})
+            part = _subset_region(tile, window).load()
+        return part
+
+    nthreads = min(SRTM_MAX_THREADS, len(paths))
+    with ThreadPoolExecutor(max_workers=nthreads) as pool:
+        for part in pool.map(read_tile, paths):
+            if not part.size:
+                continue
+            if part.lat.values[0] > part.lat.values[-1]:
+                part = part.isel(lat=slice(None, None, -1))
+            yield part
+
+
+def _srtm_tiles(bounds):
+    """
+    List the South-West corners of the 1x1 degree tiles covering a region.
+
+    Longitudes of the corners are moved into [-180, 180), where the tiles are.
+
+    Examples
+    --------
+
+    >>> _srtm_tiles([-120.5, -119, 37, 37.2])
+    [(37, -121), (37, -120)]
+    >>> _srtm_tiles([10, 11, -1, 0])
+    [(-1, 10)]
+    >>> _srtm_tiles([179.5, 180.5, 0, 1])
+    [(0, 179), (0, -180)]
+    >>> _srtm_tiles([240, 241, 0, 1])
+    [(0, -120)]
+
+    """
+    west, east, south, north = bounds
+    # A region ending on a tile edge doesn't need the next tile
+    lons = range(int(np.floor(west)), max(int(np.ceil(east)),
+                                          int(np.floor(west)) + 1))
+    lats = range(int(np.floor(south)), max(int(np.ceil(north)),
+                                           int(np.floor(south)) + 1))
+    return [(lat, (lon + 180) % 360 - 180) for lat in lats for lon in lons]
+
+
+def _srtm_tag(lat, lon):
+    """
+    The name of the SRTM tile with the given South-West corner.
+
+    Examples
+    --------
+
+    >>> _srtm_tag(37, -120)
+    'N37W120'
+    >>> _srtm_tag(-5, 7)
+    'S05E007'
+
+    """
+    return '{}{:02d}{}{:03d}'.format('N' if lat >= 0 else 'S', abs(lat),
+                                     'E' if lon >= 0 else 'W', abs(lon))
+
+
+def _subset_region(grid, region):
+    """
+    Cut the part of a global longitude/latitude grid inside a region.
+
+    If the grid is lazily loaded from a file, only the data inside the region
+    will be read when the result is loaded. Regions crossing the antimeridian
+    are joined from two parts of the grid, with longitudes continuing past
+    180 degrees.
+
+    Parameters
+    ----------
+    grid : xarray.DataArray
+        Grid with ``lon`` (from -180 to 180) and ``lat`` coordinates.
+    region : list
+        ``[west, east, south, north]`` in degrees.
+
+    Returns
+    -------
+    subset : xarray.DataArray
+        The grid inside the region (edges included) with longitudes in the
+        same range as the region.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> grid = xr.DataArray(
+    ...     np.arange(5*9).reshape((5, 9)), dims=['lat', 'lon'],
+    ...     coords=dict(lat=np.linspace(-90, 90, 5),
+    ...                 lon=np.linspace(-180, 180, 9)))
+    >>> subset = _subset_region(grid, [-90, 45, 0, 90])
+    >>> print(subset.lon.values, subset.lat.values)
+    [-90. -45.   0.  45.] [ 0. 45. 90.]
+    >>> subset = _subset_region(grid, [135, 225, -90, -45])
+    >>> print(subset.lon.values)
+    [135. 180. 225.]
+    >>> print(subset.values)
+    [[ 7  8  1]
+     [16 17 10]]
+    >>> print(_subset_region(grid, [225, 315, -90, -90]).lon.values)
+    [225. 270. 315.]
+
+    """
+    if len(region) != 4:
+        raise GMTInvalidInput(
+            "Invalid region '{}'. Must be [west, east, south, north]."
+            .format(region))
+    west, east, south, north = [float(i) for i in region]
+    if west > east or south > north:
+        raise GMTInvalidInput(
+            "Invalid region '{}'. Must be [west, east, south, north]."
+            .format(region))
+    if east - west > 360:
+        raise GMTInvalidInput(
+            "Invalid region '{}'. Longitude range is larger than 360 degrees."
+            .format(region))
+    lat = grid.lat.values
+    if lat[0] <= lat[-1]:
+        grid = grid.sel(lat=slice(south, north))
+    else:
+        grid = grid.sel(lat=slice(north, south))
+    # Move the region to start in [-180, 180) and shift the coordinates back
+    # in the end.
+    shift = 360*np.floor((west + 180)/360)
+    west, east = west - shift, east - shift
+    if east <= 180:
+        subset = grid.sel(lon=slice(west, east))
+    else:
+        first = grid.sel(lon=slice(west, 180))
+        second = grid.sel(lon=slice(-180, east - 360))
+        second = second.assign_coords(lon=second.lon.values + 360)
+        # The -180 and 180 meridians are the same points in global grids
+        if first.lon.size and second.lon.size \
+                and first.lon.values[-1] == second.lon.values[0]:
+            second = second.isel(lon=slice(1, None))
+        subset = xr.concat([first, second], dim='lon')
+    if shift != 0:
+        subset = subset.assign_coords(lon=subset.lon.values + shift)
+    return subset
+
+
+def earth_relief_cache_info():
+    """
+    Get the state of the in-memory cache of Earth relief grids.
+
+    Returns
+    -------
+    info : dict
+        The cached resolutions (``keys``, least recently used first), their
+        total size in bytes (``nbytes``), the size limit (``max_bytes``), and
+        the number of loads that used the cache (``hits``) or read the file
+        (``misses``).
+
+    Examples
+    --------
+
+    >>> clear_earth_relief_cache()
+    >>> grid = load_earth_relief('60m')
+    >>> grid = load_earth_relief('60m')
+    >>> info = earth_relief_cache_info()
+    >>> print(info['keys'], info['hits'], info['misses'])
+    ['60m'] 1 1
+    >>> info['nbytes'] == grid.nbytes
+    True
+
+    """
+    return RELIEF_CACHE.info()
+
+
+def clear_earth_relief_cache(max_bytes=None):
+    """
+    Discard all grids in the in-memory cache of Earth relief grids.
+
+    Parameters
+    ----------
+    max_bytes : int or None
+        If given, set a new size limit for the cache. The default is 1 GiB.
+
+    """
+    RELIEF_CACHE.clear()
+    if max_bytes is not None:
+        RELIEF_CACHE.max_bytes = max_bytes
+
+
 def _shape_from_resolution(resolution):
     """
     Calculate the shape of the global Earth relief grid given a resolution.
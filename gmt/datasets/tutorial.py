@@ -4,9 +4,10 @@ Functions to load sample data from the GMT tutorials.
 import pandas as pd
 
 from .. import which
+from .cache import load_cached_table
 
 
-def load_japan_quakes():
+def load_japan_quakes(cache=True):
     """
     Load a table of earthquakes around Japan as a pandas.Dataframe.
 
@@ -17,6 +18,15 @@ def load_japan_quakes():
     first time you invoke this function. Afterwards, it will load the data from
     the cache. So you'll need an internet connection the first time around.
 
+    The parsed table is also kept in a binary format in the GMT/Python cache
+    (usually ``~/.gmt/gmt-python/datasets``) so that later loads don't have to
+    parse the text file again.
+
+    Parameters
+    ----------
+    cache : bool
+        If False, always parse the text file and don't use the binary cache.
+
     Returns
     -------
     data :  pandas.Dataframe
@@ -25,6 +35,15 @@ def load_japan_quakes():
 
     """
     fname = which('@tut_quakes.ngdc', download='c')
+    if cache:
+        return load_cached_table(fname, _read_japan_quakes, 'tut_quakes')
+    return _read_japan_quakes(fname)
+
+
+def _read_japan_quakes(fname):
+    """
+    Parse the text file of the Japan earthquakes dataset.
+    """
     data = pd.read_table(fname, header=1, sep=r'\s+')
     data.columns = ['year', 'month', 'day', 'latitude', 'longitude',
                     'depth_km', 'magnitude']
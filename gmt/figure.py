@@ -2,9 +2,14 @@
 Define the Figure class that handles all plotting.
 """
 import os
+import re
+import json
+import hashlib
 from tempfile import TemporaryDirectory
 import base64
 
+import numpy as np
+
 try:
     from IPython.display import Image
 except ImportError:
@@ -14,7 +19,8 @@ from .clib import LibGMT
 from .base_plotting import BasePlotting
 from .exceptions import GMTError, GMTInvalidInput
 from .helpers import build_arg_string, fmt_docstring, use_alias, \
-    kwargs_to_strings, launch_external_viewer, unique_name, worldwind_show
+    kwargs_to_strings, launch_external_viewer, unique_name, worldwind_show, \
+    cache_dir, projection_width
 
 
 class Figure(BasePlotting):
@@ -215,6 +221,97 @@ class Figure(BasePlotting):
         if show:
             launch_external_viewer(fname)
 
+    def static_layers(self, region, projection, layers, frame=None, dpi=300):
+        """
+        Plot layers that many figures share from a cache of rendered images.
+
+        Use this for the background of maps that only differ in the data
+        plotted on top (coastlines, land and water colors, etc). The first
+        time a combination of *region*, *projection*, *layers*, and *dpi* is
+        used, the layers are plotted on a separate figure and saved as a PNG
+        in the ``layers`` cache directory (see :func:`gmt.helpers.cache_dir`).
+        Afterwards, the PNG is placed on the map with :meth:`~gmt.Figure.image`
+        instead of plotting the layers again, which skips all the processing
+        (like the coastlines of :meth:`~gmt.Figure.coast`).
+
+        The layers are rendered inside the map frame on a white background.
+        The frame is plotted afterwards (and not cached) with
+        :meth:`~gmt.Figure.basemap`, which also sets the region and projection
+        for the plotting commands that follow.
+
+        The image is placed from the lower left corner of the map with the map
+        width, so only rectangular maps are supported: Cartesian (``X``) and
+        cylindrical (``M``, ``Q``, ``J``, ``Y``) projections, or any
+        projection with a region given by its corners (ending in ``+r``).
+
+        Parameters
+        ----------
+        region : str or list
+            The region of the map (*R*).
+        projection : str
+            The projection of the map (*J*). Must be given by width (like
+            ``'M6i'``) so that the image can be placed with the same size.
+        layers : list
+            The plotting commands of the layers as ``(method, kwargs)`` pairs,
+            like ``[('coast', dict(land='gray', water='skyblue'))]``. Don't
+            include the frame (*B*) in the layers. Use *frame* instead. The
+            arguments are part of the cache key. They can be strings, numbers,
+            booleans, lists, dicts, and numpy arrays (whose data are hashed).
+        frame : str, list, or None
+            The frame of the map (*B*). If None, no frame is plotted.
+        dpi : int
+            The resolution of the rendered layers.
+
+        Returns
+        -------
+        fname : str
+            The file name of the rendered layers.
+
+        Raises
+        ------
+        GMTInvalidInput
+            If the map isn't rectangular, the projection isn't given by width,
+            or the layers have arguments that can't be part of the cache key.
+
+        """
+        width = projection_width(projection)
+        if width is None:
+            raise GMTInvalidInput(
+                "Static layers need a projection given by width, not '{}'."
+                .format(projection))
+        if not _is_rectangular(region, projection):
+            raise GMTInvalidInput(
+                "Static layers need a rectangular map. Use a cylindrical "
+                "projection or a region ending in '+r', not '{}'."
+                .format(projection))
+        for method, kwargs in layers:
+            if 'B' in kwargs or 'frame' in kwargs:
+                raise GMTInvalidInput(
+                    "Can't use a frame in static layer '{}'. Use argument "
+                    "'frame' instead.".format(method))
+        key = hashlib.sha1(json.dumps(
+            [region, projection, layers, dpi], sort_keys=True,
+            default=_key_value).encode()).hexdigest()
+        fname = os.path.join(cache_dir('layers'), '{}.png'.format(key))
+        if not os.path.exists(fname):
+            background = Figure()
+            # Fill the map so that the cropped image is the map area
+            background.basemap(region=region, projection=projection,
+                               frame='+n+gwhite')
+            for method, kwargs in layers:
+                getattr(background, method)(**kwargs)
+            # Save to a temporary file first so that other processes never
+            # see a partial image
+            tmpname = os.path.join(os.path.dirname(fname),
+                                   '.{}.png'.format(unique_name()))
+            background.savefig(tmpname, dpi=dpi)
+            os.replace(tmpname, fname)
+            self._activate_figure()
+        self.image(fname, position='x0/0+w{}i'.format(width))
+        self.basemap(region=region, projection=projection,
+                     frame='+n' if frame is None else frame)
+        return fname
+
     def show(self, dpi=300, width=500, method='static', globe_center=None):
         """
         Display a preview of the figure.
@@ -329,3 +426,58 @@ class Figure(BasePlotting):
         base64_png = base64.encodebytes(raw_png)
         html = '<img src="data:image/png;base64,{image}" width="{width}px">'
         return html.format(image=base64_png.decode('utf-8'), width=500)
+
+
+def _is_rectangular(region, projection):
+    """
+    Check if a map has the shape of its bounding rectangle.
+
+    True for Cartesian and cylindrical projections and for regions given by
+    the lower left and upper right corners (``+r``).
+
+    >>> _is_rectangular([0, 10, 0, 10], 'M6i')
+    True
+    >>> _is_rectangular([0, 10, 0, 10], 'Cyl_stere/6i')
+    True
+    >>> _is_rectangular([0, 10, 0, 10], 'L0/0/5/10/6i')
+    False
+    >>> _is_rectangular('-10/-10/10/10+r', 'L0/0/5/10/6i')
+    True
+
+    """
+    if isinstance(region, str) and region.endswith('+r'):
+        return True
+    code = re.match(r'^([A-Za-z_]*)', projection.strip()).group(1)
+    return code.upper() in ['X', 'M', 'MERC', 'Q', 'J', 'Y', 'CYL_STERE']
+
+
+def _key_value(value):
+    """
+    Make arrays and numpy scalars part of the JSON cache key of static layers.
+
+    Arrays are replaced by a hash of their type, shape, and data so that
+    different arrays never give the same key.
+
+    >>> _key_value(np.float32(1.5))
+    1.5
+    >>> len(_key_value(np.arange(3)))
+    40
+    >>> _key_value(np.arange(3)) == _key_value(np.arange(3.0))
+    False
+
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        digest = hashlib.sha1(
+            '{}{}'.format(array.dtype.str, array.shape).encode())
+        if array.dtype.hasobject:
+            digest.update(json.dumps(array.tolist(),
+                                     default=_key_value).encode())
+        else:
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+    raise GMTInvalidInput(
+        "Can't use a '{}' in the arguments of static layers."
+        .format(type(value).__name__))
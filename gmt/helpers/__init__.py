@@ -3,6 +3,13 @@ Functions, classes, decorators, and context managers to help wrap GMT modules.
 """
 from .decorators import fmt_docstring, use_alias, kwargs_to_strings
 from .tempfile import GMTTempFile, unique_name
+from .capture import GMTOutputPipe, GMTInputPipe, call_module_output, \
+    text_output, table_output, columns_output
 from .utils import data_kind, dummy_context, build_arg_string, \
-    is_nonstr_iter, launch_external_viewer
+    build_arg_list, parse_arg_string, is_nonstr_iter, launch_external_viewer, \
+    projection_width, region_bounds
 from .worldwind import worldwind_show
+from .decimate import grid_block_factors, block_average_grid, crop_grid, \
+    decimate_points, clip_points, clip_line
+from .caching import gmt_user_dir, cache_dir, file_signature, PathIndex, \
+    LRUCache
@@ -0,0 +1,326 @@
+"""
+Caches for the paths and data loaded by GMT/Python, in memory and on disk in
+the GMT user directory.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+from tempfile import NamedTemporaryFile
+
+
+def gmt_user_dir(env=None):
+    """
+    Get the GMT user directory.
+
+    This is where GMT keeps the downloaded remote data files. It's given by
+    the ``GMT_USERDIR`` environment variable and defaults to ``~/.gmt``.
+
+    Parameters
+    ----------
+    env : dict or None
+        A dictionary containing the environment variables. If ``None``, will
+        default to ``os.environ``.
+
+    Returns
+    -------
+    path : str
+        The path to the user directory.
+
+    Examples
+    --------
+
+    >>> print(gmt_user_dir(env={'GMT_USERDIR': '/data/gmt'}))
+    /data/gmt
+
+    """
+    if env is None:
+        env = os.environ
+    if 'GMT_USERDIR' in env:
+        return env['GMT_USERDIR']
+    return os.path.join(os.path.expanduser('~'), '.gmt')
+
+
+def cache_dir(*subdirs):
+    """
+    Get (and create if needed) a directory for the caches of GMT/Python.
+
+    The directories are placed in ``gmt-python`` inside of the GMT user
+    directory (see :func:`gmt_user_dir`).
+
+    Parameters
+    ----------
+    subdirs : str
+        Names of nested subdirectories.
+
+    Returns
+    -------
+    path : str
+        The path to the cache directory.
+
+    """
+    path = os.path.join(gmt_user_dir(), 'gmt-python', *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_signature(path):
+    """
+    Get the modification time and size of a file to detect changes to it.
+
+    Parameters
+    ----------
+    path : str
+        The file name.
+
+    Returns
+    -------
+    signature : list or None
+        ``[mtime_ns, size]`` or ``None`` if the file doesn't exist.
+
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class PathIndex():
+    """
+    A persistent mapping of keys to file paths.
+
+    Entries are kept in memory and saved to a JSON file in the cache
+    directory (see :func:`cache_dir`) so that they survive across Python
+    sessions. Each entry records the modification time and size of the file
+    and is dropped if the file changes or is removed.
+
+    Parameters
+    ----------
+    name : str
+        The name of the index file.
+
+    Examples
+    --------
+
+    >>> import os
+    >>> from gmt.helpers import GMTTempFile
+    >>> with GMTTempFile() as tmpfile:
+    ...     index = PathIndex('doctest-index.json')
+    ...     index.set('@some_file', tmpfile.name)
+    ...     index.get('@some_file') == tmpfile.name
+    True
+    >>> # The file was deleted so the entry is no longer valid
+    >>> print(index.get('@some_file'))
+    None
+    >>> index.clear()
+    >>> os.path.exists(index.fname)
+    False
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @property
+    def fname(self):
+        "The full path to the index file."
+        return os.path.join(cache_dir(), self.name)
+
+    def _load(self):
+        """
+        Read the index from disk. Returns an empty dict if it can't be read.
+        """
+        try:
+            with open(self.fname) as findex:
+                entries = json.load(findex)
+        except (OSError, ValueError):
+            entries = {}
+        return entries
+
+    def _save(self):
+        """
+        Write the index to disk atomically.
+
+        Merges entries saved by other processes in the meantime.
+        """
+        entries = self._load()
+        entries.update(self._entries)
+        with NamedTemporaryFile('w', dir=os.path.dirname(self.fname),
+                                prefix='.gmt-python-', delete=False) as tmp:
+            json.dump(entries, tmp)
+        os.replace(tmp.name, self.fname)
+
+    def get(self, key):
+        """
+        Get the path stored for a key.
+
+        Parameters
+        ----------
+        key : str
+            The key used when storing the path.
+
+        Returns
+        -------
+        path : str or None
+            The stored path or ``None`` if there isn't one or if the file
+            changed since it was stored.
+
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            path, signature = entry
+            if file_signature(path) != signature:
+                del self._entries[key]
+                return None
+            return path
+
+    def set(self, key, path):
+        """
+        Store a path for a key.
+
+        Parameters
+        ----------
+        key : str
+            The key used to retrieve the path.
+        path : str
+            The file path. Must exist.
+
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            self._entries[key] = [path, file_signature(path)]
+            try:
+                self._save()
+            except OSError:
+                # Not being able to persist the index shouldn't break anything
+                pass
+
+    def clear(self):
+        """
+        Remove all entries from memory and from disk.
+        """
+        with self._lock:
+            self._entries = {}
+            if os.path.exists(self.fname):
+                os.remove(self.fname)
+
+
+class LRUCache():
+    """
+    An in-memory least recently used cache bounded by size in bytes.
+
+    When adding an item would go over the limit, the least recently used
+    items are discarded until it fits. Items larger than the limit are not
+    stored at all. Safe to use from multiple threads.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The maximum total size of the cached items.
+
+    Examples
+    --------
+
+    >>> cache = LRUCache(max_bytes=100)
+    >>> cache.put('a', 'first', nbytes=60)
+    >>> cache.put('b', 'second', nbytes=30)
+    >>> cache.get('a')
+    'first'
+    >>> # 'b' is now the least recently used so it's discarded to make room
+    >>> cache.put('c', 'third', nbytes=40)
+    >>> print(cache.get('b'))
+    None
+    >>> info = cache.info()
+    >>> print(info['keys'], info['nbytes'], info['hits'], info['misses'])
+    ['a', 'c'] 100 1 1
+
+    """
+
+    def __init__(self, max_bytes):
+        self._items = OrderedDict()
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self):
+        "The size limit. Setting it discards items until the cache fits."
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        with self._lock:
+            self._max_bytes = value
+            self._evict(0)
+
+    @property
+    def nbytes(self):
+        "The total size of the cached items."
+        return sum(nbytes for _, nbytes in self._items.values())
+
+    def _evict(self, nbytes):
+        """
+        Discard least recently used items until *nbytes* more fit.
+        """
+        while self._items and self.nbytes + nbytes > self._max_bytes:
+            self._items.popitem(last=False)
+
+    def get(self, key):
+        """
+        Get an item and mark it as the most recently used.
+
+        Returns ``None`` if the key is not in the cache.
+        """
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def put(self, key, value, nbytes):
+        """
+        Store an item of the given size, replacing any with the same key.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            if nbytes > self._max_bytes:
+                return
+            self._evict(nbytes)
+            self._items[key] = (value, nbytes)
+
+    def clear(self):
+        """
+        Discard all items and reset the hit and miss counts.
+        """
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Get the state of the cache.
+
+        Returns
+        -------
+        info : dict
+            The cached ``keys`` (least recently used first), their total size
+            ``nbytes``, the ``max_bytes`` limit, and the number of ``hits``
+            and ``misses`` of :meth:`~gmt.helpers.LRUCache.get`.
+
+        """
+        with self._lock:
+            return dict(keys=list(self._items), nbytes=self.nbytes,
+                        max_bytes=self._max_bytes, hits=self.hits,
+                        misses=self.misses)
@@ -0,0 +1,298 @@
+"""
+Capture the text output of GMT modules in memory and decode it. Feed text
+input to GMT from memory.
+"""
+import io
+import os
+import threading
+
+import numpy as np
+
+from .tempfile import GMTTempFile
+
+
+# Pipes are passed to GMT as /dev/fd/N paths (not available on Windows)
+FD_PATHS = os.path.isdir('/dev/fd')
+
+
+class GMTOutputPipe():
+    """
+    Context manager for capturing module output through an operating system
+    pipe instead of a file on disk.
+
+    Has the same ``name`` and ``read`` interface as
+    :class:`~gmt.helpers.GMTTempFile`. Pass ``'->' + pipe.name`` to a module
+    to redirect its output into the pipe. A background thread drains the pipe
+    while the module is running, so outputs larger than the pipe buffer don't
+    block GMT.
+
+    The pipe is passed to GMT as ``/dev/fd/N``. On systems that don't have
+    these paths (Windows), a temporary file is used instead.
+
+    Examples
+    --------
+
+    >>> with GMTOutputPipe() as pipe:
+    ...     with open(pipe.name, 'w') as output:
+    ...         print('1\\t2\\t3', file=output)
+    ...     print(pipe.read().strip())
+    1 2 3
+
+    """
+
+    def __init__(self):
+        self._content = None
+        if not FD_PATHS:
+            self._tmpfile = GMTTempFile()
+            self.name = self._tmpfile.name
+            return
+        self._tmpfile = None
+        self._read_fd, self._write_fd = os.pipe()
+        self.name = '/dev/fd/{}'.format(self._write_fd)
+        self._chunks = []
+        self._reader = threading.Thread(target=self._drain, daemon=True)
+        self._reader.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if self._tmpfile is not None:
+            self._tmpfile.__exit__(exc_type, *args)
+        elif exc_type is None:
+            self._finish()
+        elif self._write_fd is not None:
+            # If the module failed, GMT might not have closed its end of the
+            # pipe. Don't wait forever for an end of file that will never come
+            # since the output is discarded anyway.
+            os.close(self._write_fd)
+            self._write_fd = None
+            self._reader.join(timeout=1)
+
+    def _drain(self):
+        """
+        Read everything written to the pipe until all writers close it.
+        """
+        try:
+            while True:
+                chunk = os.read(self._read_fd, 65536)
+                if not chunk:
+                    break
+                self._chunks.append(chunk)
+        finally:
+            os.close(self._read_fd)
+
+    def _finish(self):
+        """
+        Close our end of the pipe and wait for the reader to get everything.
+        """
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+            self._write_fd = None
+            self._reader.join()
+            self._content = b''.join(self._chunks).decode()
+            self._chunks = []
+
+    def read(self, keep_tabs=False):
+        """
+        Read the entire output sent to the pipe as a Unicode string.
+
+        Closes the pipe, so call it only after the module has finished.
+
+        Parameters
+        ----------
+        keep_tabs : bool
+            If False, replace the tabs that GMT uses with spaces.
+
+        Returns
+        -------
+        content : str
+            Everything written to the pipe.
+
+        """
+        if self._tmpfile is not None:
+            return self._tmpfile.read(keep_tabs=keep_tabs)
+        self._finish()
+        content = self._content
+        if not keep_tabs:
+            content = content.replace('\t', ' ')
+        return content
+
+
+class GMTInputPipe():
+    """
+    Context manager for feeding text to GMT through an operating system pipe
+    instead of a file on disk.
+
+    The counterpart of :class:`GMTOutputPipe`. Pass ``pipe.name`` to GMT
+    where it expects an input file name. A background thread writes the text
+    into the pipe while GMT reads it, so inputs larger than the pipe buffer
+    don't block. On systems without ``/dev/fd/N`` paths (Windows), the text is
+    written to a temporary file instead.
+
+    Parameters
+    ----------
+    content : str
+        The text that GMT will read.
+
+    Examples
+    --------
+
+    >>> with GMTInputPipe('1 2 3\\n4 5 6\\n') as pipe:
+    ...     with open(pipe.name) as source:
+    ...         print(source.read().strip())
+    1 2 3
+    4 5 6
+
+    """
+
+    def __init__(self, content):
+        if not FD_PATHS:
+            self._tmpfile = GMTTempFile()
+            self.name = self._tmpfile.name
+            with open(self.name, 'w') as source:
+                source.write(content)
+            return
+        self._tmpfile = None
+        self._read_fd, self._write_fd = os.pipe()
+        self.name = '/dev/fd/{}'.format(self._read_fd)
+        self._content = content.encode()
+        self._writer = threading.Thread(target=self._feed, daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self._tmpfile is not None:
+            self._tmpfile.__exit__(*args)
+            return
+        # Closing our end of the pipe makes the writer stop if GMT didn't read
+        # everything (if it failed, for example).
+        os.close(self._read_fd)
+        self._writer.join()
+
+    def _feed(self):
+        """
+        Write all of the content to the pipe and close it to signal the end.
+        """
+        content = memoryview(self._content)
+        try:
+            while content:
+                content = content[os.write(self._write_fd, content):]
+        except OSError:
+            pass
+        finally:
+            os.close(self._write_fd)
+
+
+def call_module_output(lib, module, args, decoder=None):
+    """
+    Run a GMT module and return its decoded output.
+
+    The output is captured in memory using a :class:`GMTOutputPipe` instead of
+    a temporary file. Use this in module wrappers that return the text that
+    GMT prints instead of repeating the capture in each one of them.
+
+    Parameters
+    ----------
+    lib : :class:`gmt.clib.LibGMT`
+        A library instance with an open session.
+    module : str
+        The module name (``'info'``, ``'grdinfo'``, etc).
+    args : str
+        The module arguments, without any output redirection.
+    decoder : function or None
+        Converts the output text into the returned value. For example,
+        :func:`text_output` (the default), :func:`table_output`, or
+        ``functools.partial(columns_output, names=[...])``.
+
+    Returns
+    -------
+    output
+        Whatever the decoder returns.
+
+    """
+    if decoder is None:
+        decoder = text_output
+    with GMTOutputPipe() as pipe:
+        lib.call_module(module, ' '.join([args, '->' + pipe.name]))
+        output = pipe.read()
+    return decoder(output)
+
+
+def text_output(text):
+    """
+    Decode module output as plain text (the default).
+
+    Parameters
+    ----------
+    text : str
+        The captured output.
+
+    Returns
+    -------
+    text : str
+        The same text.
+
+    """
+    return text
+
+
+def table_output(text):
+    """
+    Decode a numeric table printed by a module into a 2d numpy array.
+
+    Parameters
+    ----------
+    text : str
+        The captured output. Every line must have the same number of numeric
+        columns.
+
+    Returns
+    -------
+    table : 2d array
+        One row per line of output.
+
+    Examples
+    --------
+
+    >>> table_output('1 2 3\\n4 5 6\\n')
+    array([[1., 2., 3.],
+           [4., 5., 6.]])
+    >>> table_output('').shape
+    (0, 0)
+
+    """
+    if not text.strip():
+        return np.empty((0, 0))
+    return np.loadtxt(io.StringIO(text), ndmin=2)
+
+
+def columns_output(text, names):
+    """
+    Decode the single line of ``-C`` style column output into a dictionary.
+
+    Parameters
+    ----------
+    text : str
+        The captured output. Only the first line is used.
+    names : list of str
+        The names of each column. Extra values at the end of the line that
+        don't have a name are ignored.
+
+    Returns
+    -------
+    columns : dict
+        The values of each column converted to floats.
+
+    Examples
+    --------
+
+    >>> columns = columns_output('-180 180 -90 90\\n', ['w', 'e', 's', 'n'])
+    >>> print(', '.join('{}={}'.format(k, columns[k]) for k in 'wesn'))
+    w=-180.0, e=180.0, s=-90.0, n=90.0
+
+    """
+    values = text.split('\n', 1)[0].split()
+    return {name: float(value) for name, value in zip(names, values)}
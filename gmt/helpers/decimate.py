@@ -0,0 +1,372 @@
+"""
+Reduce the size of data before sending them to GMT, keeping only the detail
+that will be visible in the final figure.
+"""
+import warnings
+
+import numpy as np
+import xarray as xr
+
+
+def grid_block_factors(grid, region, width, dpi, height=None):
+    """
+    Get how many grid points fit inside a pixel of a map in each direction.
+
+    A map that is *width* inches wide at *dpi* has ``width*dpi`` pixels across
+    the x range of the *region* and, if *height* is given, ``height*dpi``
+    pixels across the y range. That way, maps with different x and y scales
+    (like Mercator) use the right pixel size in each direction. Without a
+    *height*, pixels are assumed to be square in data units and the x pixel
+    size is used for the y direction as well.
+
+    Parameters
+    ----------
+    grid : xarray.DataArray
+        A 2D grid with regularly spaced coordinates (rows, columns).
+    region : list
+        ``[west, east, south, north]`` of the map. Only ``[west, east]`` are
+        needed without a *height*.
+    width : float
+        The width of the map in inches.
+    dpi : int
+        The resolution (dots per inch) of the final figure.
+    height : float or None
+        The height of the map in inches.
+
+    Returns
+    -------
+    factors : tuple of int
+        The number of grid points per pixel in each dimension of the grid
+        (rows, columns). At least 1.
+
+    Examples
+    --------
+
+    >>> grid = xr.DataArray(np.zeros((181, 361)), dims=['lat', 'lon'],
+    ...                     coords=dict(lat=np.linspace(-90, 90, 181),
+    ...                                 lon=np.linspace(-180, 180, 361)))
+    >>> # A 2 inch map at 20 dpi has 40 pixels of 9 degrees
+    >>> grid_block_factors(grid, [-180, 180, -90, 90], width=2, dpi=20)
+    (9, 9)
+    >>> # If the map is 2 inches tall as well, pixels are 4.5 degrees tall
+    >>> grid_block_factors(grid, [-180, 180, -90, 90], width=2, dpi=20,
+    ...                    height=2)
+    (4, 9)
+    >>> # Small maps of large grids only use a few points per pixel
+    >>> grid_block_factors(grid, [0, 10, 0, 10], width=6, dpi=300)
+    (1, 1)
+
+    """
+    pixels = [abs(region[1] - region[0])/(width*dpi)]*2
+    if height is not None:
+        pixels[0] = abs(region[3] - region[2])/(height*dpi)
+    factors = []
+    for dim, pixel in zip(grid.dims, pixels):
+        coord = grid.coords[dim].values
+        spacing = abs(coord[1] - coord[0]) if coord.size > 1 else pixel
+        factors.append(max(int(np.floor(pixel/spacing + 1e-9)), 1))
+    return tuple(factors)
+
+
+def block_average_grid(grid, factors):
+    """
+    Average blocks of grid points to make a coarser grid.
+
+    Each block of ``factors[0]`` rows by ``factors[1]`` columns is replaced
+    by the mean of its non-NaN values. The new coordinates are the centers of
+    the blocks and are regularly spaced, as GMT requires. If the grid size
+    isn't a multiple of the factor, the points left over at the end (less than
+    a block, so less than a pixel of the figure) are dropped. That way, the
+    coordinates of the coarse grid are always inside of the original grid.
+
+    Parameters
+    ----------
+    grid : xarray.DataArray
+        A 2D grid with regularly spaced coordinates.
+    factors : tuple of int
+        The block size in each dimension (rows, columns). Factors larger than
+        the grid are reduced to its size.
+
+    Returns
+    -------
+    coarse : xarray.DataArray
+        The averaged grid. The input grid is returned if both factors are 1.
+
+    Examples
+    --------
+
+    >>> grid = xr.DataArray(np.arange(20, dtype='float64').reshape((4, 5)),
+    ...                     dims=['y', 'x'],
+    ...                     coords=dict(y=np.arange(4), x=np.arange(5)))
+    >>> coarse = block_average_grid(grid, (2, 2))
+    >>> print(coarse.values)
+    [[ 3.  5.]
+     [13. 15.]]
+    >>> print(coarse.y.values, coarse.x.values)
+    [0.5 2.5] [0.5 2.5]
+    >>> print(block_average_grid(grid, (3, 1)).y.values)
+    [1.]
+
+    """
+    factors = [min(factor, size) for factor, size in zip(factors, grid.shape)]
+    if all(factor == 1 for factor in factors):
+        return grid
+    sizes = [size//factor for size, factor in zip(grid.shape, factors)]
+    values = np.asarray(grid.values, dtype='float64')[
+        :sizes[0]*factors[0], :sizes[1]*factors[1]]
+    blocks = values.reshape((sizes[0], factors[0], sizes[1], factors[1]))
+    with warnings.catch_warnings():
+        # Blocks with only NaNs are NaN in the result. Don't warn about it.
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        coarse = np.nanmean(blocks, axis=(1, 3))
+    coords = {}
+    for dim, factor, size in zip(grid.dims, factors, sizes):
+        coord = grid.coords[dim].values[:size*factor]
+        coords[dim] = coord.reshape((size, factor)).mean(axis=1)
+    # Keep float32 grids in single precision. Averages of integers are floats.
+    if np.issubdtype(grid.dtype, np.floating):
+        coarse = coarse.astype(grid.dtype)
+    return xr.DataArray(coarse, coords=coords, dims=grid.dims, name=grid.name,
+                        attrs=grid.attrs)
+
+
+def crop_grid(grid, region):
+    """
+    Cut the part of a grid needed to plot a region.
+
+    The grid points inside the region are kept, plus one more on each side so
+    that the edges of the region are still covered. If the grid doesn't
+    overlap the region in a dimension (longitudes in a different range, for
+    example), that dimension is left as it is.
+
+    Parameters
+    ----------
+    grid : xarray.DataArray
+        A 2D grid with dimensions in the order (y, x).
+    region : list
+        ``[west, east, south, north]`` of the map.
+
+    Returns
+    -------
+    subset : xarray.DataArray
+        The grid around the region.
+
+    Examples
+    --------
+
+    >>> grid = xr.DataArray(np.zeros((7, 10)), dims=['lat', 'lon'],
+    ...                     coords=dict(lat=np.linspace(90, -90, 7),
+    ...                                 lon=np.arange(0., 360, 36)))
+    >>> subset = crop_grid(grid, [40, 100, 0, 30])
+    >>> print(subset.lat.values, subset.lon.values)
+    [ 60.  30.   0. -30.] [ 36.  72. 108.]
+    >>> # Longitudes outside of the grid are left alone
+    >>> print(crop_grid(grid, [-100, -40, 0, 30]).lon.size)
+    10
+
+    """
+    west, east, south, north = [float(i) for i in region[:4]]
+    subset = {}
+    for dim, (start, stop) in zip(grid.dims, [(south, north), (west, east)]):
+        coord = grid.coords[dim].values
+        inside = np.flatnonzero((coord >= start) & (coord <= stop))
+        if inside.size == 0:
+            continue
+        subset[dim] = slice(max(inside[0] - 1, 0), inside[-1] + 2)
+    return grid.isel(**subset)
+
+
+def decimate_points(x, y, spacing, values=None):
+    """
+    Keep only a few of the points that fall inside the same cell.
+
+    Points are binned into cells of size *spacing* (in data units) starting
+    at the minimum x and y. If *values* is not given, the first point in each
+    cell is kept. Otherwise, the points with the smallest and largest values
+    in each cell are kept so that the extremes (of a color scale, for
+    example) are still visible. Use cells the size of a pixel of the final
+    figure to drop points that would be drawn on top of each other.
+
+    Parameters
+    ----------
+    x, y : 1d arrays
+        The coordinates of the points.
+    spacing : float or tuple
+        The size of the cells. Give the x and y sizes as a tuple for cells
+        that aren't square in data units (the pixels of a map with different
+        scales in x and y, for example).
+    values : 1d array or None
+        Values associated with each point (colors or sizes).
+
+    Returns
+    -------
+    index : 1d array
+        The indices of the points that are kept, in their original order.
+
+    Examples
+    --------
+
+    >>> x = np.array([0.1, 0.2, 0.3, 1.5, 1.6])
+    >>> y = np.array([0.1, 0.9, 0.5, 0.5, 0.6])
+    >>> decimate_points(x, y, spacing=1)
+    array([0, 3])
+    >>> # Point 2 is dropped because its value is in between 1 and 5
+    >>> decimate_points(x, y, spacing=1, values=[5, 1, 3, 2, 4])
+    array([0, 1, 3, 4])
+    >>> # Cells that are narrow in x and tall in y
+    >>> decimate_points(x, y, spacing=(0.15, 1))
+    array([0, 2, 3, 4])
+
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    if x.size == 0:
+        return np.arange(0)
+    xspacing, yspacing = np.broadcast_to(spacing, (2,))
+    xmin = np.nanmin(x)
+    ncolumns = int(np.floor((np.nanmax(x) - xmin)/xspacing)) + 1
+    columns = np.floor((x - xmin)/xspacing)
+    rows = np.floor((y - np.nanmin(y))/yspacing)
+    # Points with NaN coordinates aren't plotted so drop them here as well
+    valid = np.isfinite(columns) & np.isfinite(rows)
+    cells = (rows*ncolumns + columns)[valid].astype('int64')
+    points = np.arange(x.size)[valid]
+    if values is None:
+        index = points[np.unique(cells, return_index=True)[1]]
+    else:
+        index = points[_cell_extremes(cells, np.asarray(values)[valid])]
+    return np.sort(index)
+
+
+def _cell_extremes(cells, values):
+    """
+    Find the points with the smallest and largest value in each cell.
+
+    Returns the indices of these points. Cells where all values are the same
+    only get one point.
+    """
+    order = np.lexsort((values, cells))
+    sorted_cells = cells[order]
+    boundary = sorted_cells[1:] != sorted_cells[:-1]
+    first = np.concatenate([[True], boundary])
+    last = np.concatenate([boundary, [True]])
+    smallest, largest = order[first], order[last]
+    largest = largest[values[largest] != values[smallest]]
+    return np.union1d(smallest, largest)
+
+
+def clip_points(x, y, region, margin=0, geographic=False):
+    """
+    Find the points inside a region, extended by a margin.
+
+    Parameters
+    ----------
+    x, y : 1d arrays
+        The coordinates of the points.
+    region : list
+        ``[west, east, south, north]``.
+    margin : float or tuple
+        Extend the region by this much on all sides (in data units) to keep
+        symbols that are centered outside but still partly visible. Give the
+        x and y margins as a tuple to use different ones.
+    geographic : bool
+        If True, x are longitudes and points 360 degrees away from the region
+        are also inside.
+
+    Returns
+    -------
+    index : 1d array
+        The indices of the points inside the region.
+
+    Examples
+    --------
+
+    >>> x = np.array([-10, 0, 5, 10, 365])
+    >>> y = np.array([0, 0, 20, 0, 0])
+    >>> clip_points(x, y, [0, 10, -5, 5])
+    array([1, 3])
+    >>> clip_points(x, y, [0, 10, -5, 5], margin=15)
+    array([0, 1, 2, 3])
+    >>> clip_points(x, y, [0, 10, -5, 5], margin=1, geographic=True)
+    array([1, 3, 4])
+    >>> clip_points(x, y, [0, 10, -5, 5], margin=(15, 1))
+    array([0, 1, 3])
+
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    west, east, south, north = _extend_region(region, margin)
+    inside = (y >= south) & (y <= north)
+    if geographic:
+        if east - west < 360:
+            inside &= np.mod(x - west, 360) <= east - west
+    else:
+        inside &= (x >= west) & (x <= east)
+    return np.flatnonzero(inside)
+
+
+def clip_line(x, y, region, margin=0, geographic=False):
+    """
+    Find the points of a line needed to draw it inside a region.
+
+    Points are dropped only if the line segments on both sides of them are
+    entirely beyond the same edge of the region (extended by a margin). The
+    line joining the points left on either side of the dropped ones is
+    beyond that edge as well, so nothing changes inside the region. Each edge
+    is handled in turn.
+
+    Parameters
+    ----------
+    x, y : 1d arrays
+        The coordinates of the line vertices, in order.
+    region : list
+        ``[west, east, south, north]``.
+    margin : float or tuple
+        Extend the region by this much on all sides (in data units). Give the
+        x and y margins as a tuple to use different ones.
+    geographic : bool
+        If True, x are longitudes. Lines can wrap around the globe so only
+        the South and North edges are used.
+
+    Returns
+    -------
+    index : 1d array
+        The indices of the vertices that are kept, in order.
+
+    Examples
+    --------
+
+    >>> # A line that leaves the region through the East and comes back
+    >>> x = np.array([0, 5, 15, 20, 25, 20, 15, 5])
+    >>> y = np.array([0, 0, 0, 1, 2, 3, 4, 4])
+    >>> clip_line(x, y, [0, 10, 0, 10])
+    array([0, 1, 2, 6, 7])
+
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    west, east, south, north = _extend_region(region, margin)
+    beyond = [y < south, y > north]
+    if not geographic:
+        beyond = [x < west, x > east] + beyond
+    index = np.arange(x.size)
+    for outside in beyond:
+        outside = outside[index]
+        if outside.size < 2:
+            continue
+        drop = np.zeros(outside.size, dtype='bool')
+        drop[1:-1] = outside[:-2] & outside[1:-1] & outside[2:]
+        # The end points only have one segment
+        drop[0] = outside[0] & outside[1]
+        drop[-1] = outside[-1] & outside[-2]
+        index = index[~drop]
+    return index
+
+
+def _extend_region(region, margin):
+    """
+    Add a margin (or x and y margins) to all sides of a region.
+    """
+    west, east, south, north = [float(i) for i in region[:4]]
+    xmargin, ymargin = np.broadcast_to(margin, (2,))
+    return west - xmargin, east + xmargin, south - ymargin, north + ymargin
@@ -186,17 +186,27 @@ def use_alias(**aliases):
     def alias_decorator(module_func):
         """
         Decorator that replaces the aliases for arguments.
+
+        If *module_func* was decorated by ``kwargs_to_strings``, its
+        conversions are fused with the aliases into a single converter that
+        calls the undecorated function directly.
         """
+        conversions = getattr(module_func, 'conversions', None)
+        if conversions is None:
+            convert = compile_converter(aliases, convert_bools=False)
+            func = module_func
+        else:
+            convert = compile_converter(
+                aliases, conversions=conversions,
+                convert_bools=module_func.convert_bools)
+            func = module_func.__wrapped__
 
         @functools.wraps(module_func)
         def new_module(*args, **kwargs):
             """
             New module that parses and replaces the registered aliases.
             """
-            for arg, alias in aliases.items():
-                if alias in kwargs:
-                    kwargs[arg] = kwargs.pop(alias)
-            return module_func(*args, **kwargs)
+            return func(*args, **convert(kwargs))
 
         new_module.aliases = aliases
 
@@ -270,7 +280,8 @@ def kwargs_to_strings(convert_bools=True, **conversions):
                 "Invalid conversion type '{}' for argument '{}'."
                 .format(fmt, arg))
 
-    separators = {'sequence': '/', 'sequence_comma': ','}
+    convert = compile_converter(conversions=conversions,
+                                convert_bools=convert_bools)
 
     # Make the actual decorator function
     def converter(module_func):
@@ -279,46 +290,83 @@ def kwargs_to_strings(convert_bools=True, **conversions):
         @functools.wraps(module_func)
         def new_module(*args, **kwargs):
             "New module instance that converts the arguments first"
-            if convert_bools:
-                kwargs = remove_bools(kwargs)
-            for arg, fmt in conversions.items():
-                if arg in kwargs:
-                    value = kwargs[arg]
-                    issequence = fmt == 'sequence' or fmt == 'sequence_comma'
-                    if issequence and is_nonstr_iter(value):
-                        kwargs[arg] = separators[fmt].join(
-                            '{}'.format(item) for item in value)
             # Execute the original function and return its output
-            return module_func(*args, **kwargs)
+            return module_func(*args, **convert(kwargs))
+
+        # Let use_alias fuse these conversions with the aliases
+        new_module.conversions = conversions
+        new_module.convert_bools = convert_bools
 
         return new_module
 
     return converter
 
 
-def remove_bools(kwargs):
+def compile_converter(aliases=None, conversions=None, convert_bools=True):
     """
-    Remove booleans from arguments.
+    Make a function that processes keyword arguments in a single pass.
 
-    If ``True``, replace it with an empty string. If ``False``, completely
-    remove the entry from the argument list.
+    Used by the decorators to do all the work of ``use_alias`` and
+    ``kwargs_to_strings`` with one loop over the given arguments and
+    dictionary lookups, instead of one loop over all aliases and conversions
+    per call. The lookup tables are built once, when the module function is
+    decorated.
 
     Parameters
     ----------
-    kwargs : dict
-        Dictionary with the keyword arguments.
+    aliases : dict or None
+        The argument names and their aliases (like in ``use_alias``). If both
+        are given, the value of the alias is used.
+    conversions : dict or None
+        The argument names and their conversion types (like in
+        ``kwargs_to_strings``).
+    convert_bools : bool
+        If ``True``, replace ``True`` by ``''`` and remove ``False``
+        arguments.
 
     Returns
     -------
-    new_kwargs : dict
-        A copy of `kwargs` with the booleans parsed.
+    convert : function
+        Takes a dictionary of keyword arguments and returns a new one with
+        the aliases replaced and the conversions done.
+
+    Examples
+    --------
+
+    >>> convert = compile_converter(aliases=dict(R='region'),
+    ...                             conversions=dict(R='sequence'))
+    >>> kwargs = convert(dict(region=[1, 2, 3, 4], P=True, A=False))
+    >>> print(sorted(kwargs.items()))
+    [('P', ''), ('R', '1/2/3/4')]
 
     """
-    new_kwargs = {}
-    for arg, value in kwargs.items():
-        if isinstance(value, bool):
-            if value:
-                new_kwargs[arg] = ''
-        else:
+    separators = {'sequence': '/', 'sequence_comma': ','}
+    names = {alias: arg for arg, alias in (aliases or {}).items()}
+    joiners = {arg: separators[fmt]
+               for arg, fmt in (conversions or {}).items()}
+
+    def convert(kwargs):
+        "Replace aliases and convert arguments to strings"
+        new_kwargs = {}
+        given = set()
+        for key, value in kwargs.items():
+            arg = names.get(key)
+            if arg is None:
+                if key in given:
+                    # The alias was also given and takes precedence
+                    continue
+                arg = key
+            given.add(arg)
+            if convert_bools and isinstance(value, bool):
+                if value:
+                    new_kwargs[arg] = ''
+                else:
+                    new_kwargs.pop(arg, None)
+                continue
+            joiner = joiners.get(arg)
+            if joiner is not None and is_nonstr_iter(value):
+                value = joiner.join('{}'.format(item) for item in value)
             new_kwargs[arg] = value
-    return new_kwargs
+        return new_kwargs
+
+    return convert
@@ -1,11 +1,13 @@
 """
 Utilities and common tasks for wrapping the GMT modules.
 """
+import re
 import sys
 import shutil
 import subprocess
 import webbrowser
 from contextlib import contextmanager
+from functools import lru_cache
 
 import xarray as xr
 
@@ -121,6 +123,10 @@ def build_arg_string(kwargs):
     same command line argument. For example, the kwargs entry ``'B': ['xa',
     'yaf']`` will be converted to ``-Bxa -Byaf`` in the argument string.
 
+    Strings are memoized for the most recently used arguments made only of
+    strings (or lists of strings), so repeated calls with the same arguments
+    don't have to sort and format them again.
+
     Parameters
     ----------
     kwargs : dict
@@ -143,22 +149,131 @@ def build_arg_string(kwargs):
     -Bxaf -Byaf -BWSen -I1/1p,blue -I2/0.25p,blue -JX4i -R1/2/3/4
 
     """
-    sorted_args = []
+    items = []
+    for key, value in kwargs.items():
+        # Only cache strings. Numbers that compare equal (1 and 1.0) would be
+        # formatted differently.
+        if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+            items.append((key, value))
+        elif isinstance(value, (list, tuple)) and all(
+                type(item) is str  # pylint: disable=unidiomatic-typecheck
+                for item in value):
+            items.append((key, tuple(value)))
+        else:
+            return _arg_string(tuple(kwargs.items()))
+    return _cached_arg_string(tuple(items))
+
+
+def build_arg_list(kwargs, infile=None):
+    """
+    Transform keyword arguments into a list of GMT options.
+
+    Like :func:`build_arg_string` but each option is kept separate as an
+    ``(option, argument)`` pair, so arguments with spaces don't need quoting.
+    Pass the list to :meth:`gmt.clib.LibGMT.call_module` to skip the parsing
+    of an argument string by GMT. Quotes aren't removed from the arguments,
+    so don't add them. The plotting methods call modules this way.
+
+    Keys with more than one letter (like ``'Td'``) use the first letter as the
+    option and the rest as the start of the argument.
+
+    Parameters
+    ----------
+    kwargs : dict
+        Parsed keyword arguments.
+    infile : str or None
+        An input file name (or virtual file) to put first in the list. GMT
+        uses ``'<'`` as the option for input files.
+
+    Returns
+    -------
+    options : list of tuples
+        The ``(option, argument)`` pairs sorted by option.
+
+    Examples
+    --------
+
+    >>> build_arg_list(dict(R='1/2/3/4', J="X4i", B=['xaf', 'yaf'],
+    ...                     Td='g0/0'), infile='data.txt')
+    ... # doctest: +NORMALIZE_WHITESPACE
+    [('<', 'data.txt'), ('B', 'xaf'), ('B', 'yaf'), ('J', 'X4i'),
+     ('R', '1/2/3/4'), ('T', 'dg0/0')]
+    >>> build_arg_list(dict(B='+tA title with spaces'))
+    [('B', '+tA title with spaces')]
+
+    """
+    options = [] if infile is None else [('<', str(infile))]
     for key in sorted(kwargs):
-        if is_nonstr_iter(kwargs[key]):
-            for value in kwargs[key]:
-                sorted_args.append('-{}{}'.format(key, value))
+        values = kwargs[key] if is_nonstr_iter(kwargs[key]) else [kwargs[key]]
+        for value in values:
+            options.append((key[0], '{}{}'.format(key[1:], value)))
+    return options
+
+
+def parse_arg_string(args):
+    """
+    Split a GMT argument string into ``(option, argument)`` pairs.
+
+    The reverse of building the string with :func:`build_arg_string`.
+    Arguments are split on white space and quotes aren't handled. Tokens that
+    don't start with ``-`` are input files (option ``'<'``) and long options
+    (``--PAR=value``) have option ``'-'``, as in GMT.
+
+    Parameters
+    ----------
+    args : str
+        The argument string.
+
+    Returns
+    -------
+    options : list of tuples
+        The ``(option, argument)`` pairs, in order.
+
+    Examples
+    --------
+
+    >>> parse_arg_string('data.txt -R1/2/3/4 -P --TIME_UNIT=s')
+    [('<', 'data.txt'), ('R', '1/2/3/4'), ('P', ''), ('-', 'TIME_UNIT=s')]
+
+    """
+    options = []
+    for token in args.split():
+        if token.startswith('--'):
+            options.append(('-', token[2:]))
+        elif token.startswith('-') and len(token) > 1:
+            options.append((token[1], token[2:]))
+        else:
+            options.append(('<', token))
+    return options
+
+
+def _arg_string(items):
+    """
+    Build the argument string from a tuple of (key, value) pairs.
+    """
+    sorted_args = []
+    for key, value in sorted(items, key=lambda item: item[0]):
+        if is_nonstr_iter(value):
+            for item in value:
+                sorted_args.append('-{}{}'.format(key, item))
         else:
-            sorted_args.append('-{}{}'.format(key, kwargs[key]))
+            sorted_args.append('-{}{}'.format(key, value))
 
     arg_str = ' '.join(sorted_args)
     return arg_str
 
 
+_cached_arg_string = lru_cache(maxsize=1024)(_arg_string)
+
+
 def is_nonstr_iter(value):
     """
     Check if the value is not a string but is iterable (list, tuple, array)
 
+    Only asks for an iterator without going through the items, so it takes
+    the same time for large arrays as for short lists. Generators are not
+    consumed.
+
     Parameters
     ----------
     value
@@ -180,14 +295,117 @@ def is_nonstr_iter(value):
     True
     >>> is_nonstr_iter((1, 2, 3))
     True
+    >>> import numpy as np
+    >>> is_nonstr_iter(np.arange(10))
+    True
+    >>> is_nonstr_iter(np.float64(1.5))
+    False
+    >>> is_nonstr_iter(np.array(1.5))
+    False
 
     """
+    if isinstance(value, str):
+        return False
     try:
-        [item for item in value]  # pylint: disable=pointless-statement
-        is_iterable = True
+        # Raises TypeError for non-iterables and 0d arrays
+        iter(value)
     except TypeError:
-        is_iterable = False
-    return bool(not isinstance(value, str) and is_iterable)
+        return False
+    return True
+
+
+def projection_width(projection):
+    """
+    Get the width of the map from a GMT projection string (*J* argument).
+
+    Only works for projections specified by width (upper case projection
+    codes, like ``'M6i'``). Projections given by scale (lower case codes,
+    like ``'m1:1000000'``) don't define a width and return ``None``.
+
+    Units can be ``c`` (centimeters, the GMT default), ``i`` (inches), or
+    ``p`` (points).
+
+    Parameters
+    ----------
+    projection : str
+        The GMT projection string, without the leading ``-J``.
+
+    Returns
+    -------
+    width : float or None
+        The width of the map in inches or ``None`` if it can't be determined.
+
+    Examples
+    --------
+
+    >>> projection_width('M6i')
+    6.0
+    >>> projection_width('X4i/3i')
+    4.0
+    >>> projection_width('Q0/72p')
+    1.0
+    >>> projection_width('W7.62c')
+    3.0
+    >>> print(projection_width('m1:1000000'))
+    None
+
+    """
+    match = re.match(r'^([A-Za-z_]+)(.*)$', projection.strip())
+    if match is None:
+        return None
+    code, params = match.groups()
+    if code[0].islower():
+        return None
+    tokens = params.split('/')
+    # Cartesian projections have the width first (and an optional height)
+    token = tokens[0] if code.upper() == 'X' else tokens[-1]
+    match = re.match(r'^-?(\d*\.?\d+)([cip]?)', token)
+    if match is None:
+        return None
+    value, unit = match.groups()
+    inches_per_unit = {'c': 1/2.54, 'i': 1, 'p': 1/72, '': 1/2.54}
+    return float(value)*inches_per_unit[unit]
+
+
+def region_bounds(region):
+    """
+    Get the west, east, south, and north bounds from a GMT region argument.
+
+    Only works for numerical regions. Other kinds of regions (like ISO country
+    codes or ``'g'``) return ``None``.
+
+    Parameters
+    ----------
+    region : str or list
+        The region as a list ``[west, east, south, north]`` or a string
+        ``'west/east/south/north'``.
+
+    Returns
+    -------
+    bounds : list of float or None
+        ``[west, east, south, north]`` or ``None`` if the region isn't
+        numerical.
+
+    Examples
+    --------
+
+    >>> region_bounds([0, 10, -5, 5])
+    [0.0, 10.0, -5.0, 5.0]
+    >>> region_bounds('-180/180/-90/90')
+    [-180.0, 180.0, -90.0, 90.0]
+    >>> print(region_bounds('JP'))
+    None
+
+    """
+    if isinstance(region, str):
+        region = region.split('/')
+    try:
+        bounds = [float(value) for value in region]
+    except (TypeError, ValueError):
+        return None
+    if len(bounds) != 4:
+        return None
+    return bounds
 
 
 def launch_external_viewer(fname):
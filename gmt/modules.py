@@ -1,9 +1,15 @@
 """
 Non-plot GMT modules.
 """
+import os
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+
 from .clib import LibGMT
-from .helpers import build_arg_string, fmt_docstring, GMTTempFile, use_alias, \
-    data_kind, dummy_context
+from .helpers import build_arg_string, fmt_docstring, use_alias, data_kind, \
+    dummy_context, call_module_output, table_output, PathIndex
 from .exceptions import GMTInvalidInput
 
 
@@ -28,43 +34,163 @@ def grdinfo(grid, **kwargs):
 
     """
     kind = data_kind(grid, None, None)
-    with GMTTempFile() as outfile:
-        with LibGMT() as lib:
-            if kind == 'file':
-                file_context = dummy_context(grid)
-            elif kind == 'grid':
-                file_context = lib.grid_to_vfile(grid)
-            else:
-                raise GMTInvalidInput("Unrecognized data type: {}"
-                                      .format(type(grid)))
-            with file_context as infile:
-                arg_str = ' '.join([infile, build_arg_string(kwargs),
-                                    "->" + outfile.name])
-                lib.call_module('grdinfo', arg_str)
-        result = outfile.read()
+    with LibGMT() as lib:
+        if kind == 'file':
+            file_context = dummy_context(grid)
+        elif kind == 'grid':
+            file_context = lib.grid_to_vfile(grid)
+        else:
+            raise GMTInvalidInput("Unrecognized data type: {}"
+                                  .format(type(grid)))
+        with file_context as infile:
+            arg_str = ' '.join([infile, build_arg_string(kwargs)])
+            result = call_module_output(lib, 'grdinfo', arg_str)
     return result
 
 
+# The columns printed by 'grdinfo -C' followed by the registration
+GRDINFO_COLUMNS = ['west', 'east', 'south', 'north', 'z_min', 'z_max',
+                   'x_inc', 'y_inc', 'n_columns', 'n_rows', 'registration']
+
+
+def grdinfo_batch(grids, chunk_size=200):
+    """
+    Get the header information of many grids as a table.
+
+    Runs ``grdinfo`` on chunks of grids at a time (one module call per chunk,
+    all in a single GMT API session) instead of once per grid and decodes the
+    output into a :class:`pandas.DataFrame`.
+
+    The data range is taken from the grid headers for files (no need to read
+    the data) and calculated from the data for DataArrays.
+
+    Parameters
+    ----------
+    grids : list of str or xarray.DataArray
+        The file names of the grids or the grids loaded as DataArrays.
+    chunk_size : int
+        The maximum number of grids passed to a single ``grdinfo`` call.
+
+    Returns
+    -------
+    table : pandas.DataFrame
+        One row per grid, in the order given. Columns are: west, east, south,
+        north, z_min, z_max, x_inc, y_inc, n_columns, n_rows, and registration
+        (``'gridline'`` or ``'pixel'``, as reported by ``grdinfo``). The
+        index has the file names (or the DataArray names).
+
+    Examples
+    --------
+
+    >>> table = grdinfo_batch(['@earth_relief_60m', '@earth_relief_30m'])
+    >>> print(table[['x_inc', 'n_columns', 'n_rows']])
+                       x_inc  n_columns  n_rows
+    @earth_relief_60m    1.0        361     181
+    @earth_relief_30m    0.5        721     361
+
+    """
+    grids = list(grids)
+    for grid in grids:
+        if data_kind(grid, None, None) not in ['file', 'grid']:
+            raise GMTInvalidInput("Unrecognized data type: {}"
+                                  .format(type(grid)))
+    rows = []
+    # The C library isn't thread-safe so the chunks are run one at a time
+    with LibGMT() as lib:
+        for start in range(0, len(grids), chunk_size):
+            rows.extend(_grdinfo_rows(lib, grids[start:start + chunk_size]))
+    names = [grid if isinstance(grid, str) else grid.name for grid in grids]
+    table = pd.DataFrame(rows, columns=GRDINFO_COLUMNS, index=names)
+    for column in ['n_columns', 'n_rows']:
+        table[column] = table[column].astype('int64')
+    return table
+
+
+def _grdinfo_rows(lib, grids):
+    """
+    Run grdinfo on a list of grids in the given session.
+
+    Files are all passed to a single grdinfo call. DataArrays are passed as
+    virtual files to a second call that reads the data range from the data
+    (``-L0``).
+
+    Returns a list with one row (list of values) per grid in the given order.
+    """
+    rows = [None]*len(grids)
+    files = [i for i, grid in enumerate(grids) if isinstance(grid, str)]
+    arrays = [i for i, grid in enumerate(grids) if not isinstance(grid, str)]
+    if files:
+        arg_str = ' '.join([grids[i] for i in files] + ['-Cn'])
+        table = call_module_output(lib, 'grdinfo', arg_str,
+                                   decoder=table_output)
+        for i, values in zip(files, table):
+            rows[i] = _grdinfo_row(values)
+    if arrays:
+        with ExitStack() as stack:
+            vfiles = [stack.enter_context(lib.grid_to_vfile(grids[i]))
+                      for i in arrays]
+            arg_str = ' '.join(vfiles + ['-L0', '-Cn'])
+            table = call_module_output(lib, 'grdinfo', arg_str,
+                                       decoder=table_output)
+        for i, values in zip(arrays, table):
+            rows[i] = _grdinfo_row(values)
+    if any(row is None for row in rows):
+        raise GMTInvalidInput("grdinfo didn't report all of the given grids.")
+    return rows
+
+
+def _grdinfo_row(values):
+    """
+    Convert the numbers of a 'grdinfo -C' line to a row of the table.
+
+    The registration is appended to the output in newer versions of GMT
+    (0 for gridline and 1 for pixel). If it's not there, it will be None.
+    """
+    row = list(values[:10])
+    registration = None
+    if len(values) > 10:
+        registration = 'pixel' if values[10] == 1 else 'gridline'
+    row.append(registration)
+    return row
+
+
 @fmt_docstring
-def info(fname, **kwargs):
+def info(fname, per_column=False, method='gmt', **kwargs):
     """
     Get information about data tables.
 
-    Reads from files and finds the extreme values in each of the columns.
-    It recognizes NaNs and will print warnings if the number of columns vary
-    from record to record. As an option, it will find the extent of the first
-    n columns rounded up and down to the nearest multiple of the supplied
-    increments. By default, this output will be in the form *-Rw/e/s/n*,
-    or the output will be in column form for as many columns as there are
-    increments provided. The *T* option will provide a *-Tzmin/zmax/dz* string
-    for makecpt.
+    Reads from files or in-memory tables and finds the extreme values in each
+    of the columns. It recognizes NaNs and will print warnings if the number of
+    columns vary from record to record. As an option, it will find the extent
+    of the first n columns rounded up and down to the nearest multiple of the
+    supplied increments. By default, this output will be in the form
+    *-Rw/e/s/n*, or the output will be in column form for as many columns as
+    there are increments provided. The *T* option will provide a
+    *-Tzmin/zmax/dz* string for makecpt.
+
+    In-memory tables are passed to GMT through virtual files, without writing
+    them to disk.
 
     {gmt_module_docs}
 
     Parameters
     ----------
-    fname : str
-        The file name of the input data table file.
+    fname : str, 1d or 2d array, or pandas.DataFrame
+        The file name of the input data table file or the table itself. A 1d
+        array is a single column and a 2d array has one column per data
+        column. The columns of a DataFrame are passed in without copying them
+        into a single array.
+    per_column : bool
+        If ``True``, return the min/max values of each column as a numpy
+        array (``[min0, max0, min1, max1, ...]``) instead of the text output.
+        Same as using *C* but decoded into numbers.
+    method : str
+        How to calculate the extreme values: ``'gmt'`` (default) runs the GMT
+        module; ``'numpy'`` calculates the min/max of each column of an
+        in-memory table directly with numpy, skipping the call to the C
+        library. The ``'numpy'`` method always returns the same array as
+        ``per_column=True`` and can't be used with GMT specific options (like
+        *I* and *T*) or with file names.
     C : bool
         Report the min/max values per column in separate columns.
     I : str
@@ -76,21 +202,130 @@ def info(fname, **kwargs):
         ``'dz[+ccol]'``
         Report the min/max of the first (0'th) column to the nearest multiple
         of dz and output this as the string *-Tzmin/zmax/dz*.
+
+    Returns
+    -------
+    output : str or 1d array
+        The text output of the module or, if ``per_column=True`` or
+        ``method='numpy'``, the min/max values of each column.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> table = np.array([[1, 4], [2, 6], [3, 5]])
+    >>> print(info(table, per_column=True))
+    [1. 3. 4. 6.]
+    >>> print(info(table, method='numpy'))
+    [1. 3. 4. 6.]
+
     """
-    if not isinstance(fname, str):
-        raise GMTInvalidInput("'info' only accepts file names.")
+    if method not in ['gmt', 'numpy']:
+        raise GMTInvalidInput("Invalid info method '{}'.".format(method))
+    if isinstance(fname, str):
+        if method == 'numpy':
+            raise GMTInvalidInput(
+                "The 'numpy' method only works for in-memory tables.")
+        columns = None
+    else:
+        columns = _table_columns(fname)
+
+    if method == 'numpy':
+        return _numpy_info(columns, kwargs)
+
+    decoder = None
+    if per_column:
+        if 'T' in kwargs:
+            raise GMTInvalidInput("Can't use option T with per_column=True.")
+        kwargs['C'] = ''
+        decoder = _per_column_output
 
-    with GMTTempFile() as tmpfile:
-        arg_str = ' '.join([fname, build_arg_string(kwargs),
-                            "->" + tmpfile.name])
-        with LibGMT() as lib:
-            lib.call_module('info', arg_str)
-        return tmpfile.read()
+    with LibGMT() as lib:
+        if columns is None:
+            file_context = dummy_context(fname)
+        elif isinstance(columns, np.ndarray):
+            file_context = lib.matrix_to_vfile(columns)
+        else:
+            file_context = lib.vectors_to_vfile(*columns)
+        with file_context as infile:
+            arg_str = ' '.join([infile, build_arg_string(kwargs)])
+            return call_module_output(lib, 'info', arg_str, decoder=decoder)
+
+
+def _numpy_info(columns, kwargs):
+    """
+    Calculate the min/max of each column of an in-memory table with numpy.
+
+    Only the *C* option is allowed since the output is always per column.
+    """
+    if set(kwargs) - {'C'}:
+        raise GMTInvalidInput(
+            "The 'numpy' method can't be used with options {}.".format(
+                ', '.join(sorted(set(kwargs) - {'C'}))))
+    if isinstance(columns, np.ndarray):
+        extremes = np.stack([np.nanmin(columns, axis=0),
+                             np.nanmax(columns, axis=0)], axis=1)
+    else:
+        extremes = np.array([[np.nanmin(col), np.nanmax(col)]
+                             for col in columns])
+    return extremes.astype('float64').ravel()
+
+
+def _per_column_output(text):
+    """
+    Decode the output of ``info -C`` into a 1d array of min/max pairs.
+    """
+    return table_output(text).ravel()
+
+
+def _table_columns(table):
+    """
+    Split an in-memory table into the form it should be passed to GMT.
+
+    Parameters
+    ----------
+    table : 1d or 2d array-like or pandas.DataFrame
+        The data table.
+
+    Returns
+    -------
+    columns : 2d array or list of 1d arrays
+        The table as a 2d array (passed as a matrix) or a list of columns
+        (passed as vectors). DataFrames are split into their columns to
+        avoid copying them into a single array.
+
+    Raises
+    ------
+    GMTInvalidInput
+        If the table isn't 1d or 2d.
+
+    Examples
+    --------
+
+    >>> import pandas as pd
+    >>> columns = _table_columns(pd.DataFrame(dict(x=[1, 2], y=[3, 4])))
+    >>> [list(col) for col in columns]
+    [[1, 2], [3, 4]]
+    >>> _table_columns([1, 2, 3])
+    [array([1, 2, 3])]
+    >>> _table_columns([[1, 2], [3, 4]]).shape
+    (2, 2)
+
+    """
+    if isinstance(table, pd.DataFrame):
+        return [table[column] for column in table.columns]
+    array = np.asarray(table)
+    if array.ndim == 1:
+        return [array]
+    if array.ndim == 2:
+        return array
+    raise GMTInvalidInput(
+        "Invalid table with {} dimensions. Must be 1 or 2.".format(array.ndim))
 
 
 @fmt_docstring
 @use_alias(G='download')
-def which(fname, **kwargs):
+def which(fname, cache=True, missing_ok=False, **kwargs):
     """
     Find the full path to specified files.
 
@@ -104,14 +339,28 @@ def which(fname, **kwargs):
     to set the desired behavior. If *download* is not used (or False), the file
     will not be found.
 
+    Give a list of file names to find all of them with a single module call.
+
+    The paths of ``@`` files downloaded to the cache (``download='c'``) or user
+    data (``download='u'``) directories are remembered in an index stored in
+    the GMT user directory. Later calls get the path from the index without
+    running the module, as long as the file hasn't changed or been removed.
+
     {gmt_module_docs}
 
     {aliases}
 
     Parameters
     ----------
-    fname : str
-        The file name that you want to check.
+    fname : str or list of str
+        The file name(s) that you want to check.
+    cache : bool
+        If ``False``, always run the module instead of looking up the path in
+        the index (the result is still stored in the index).
+    missing_ok : bool
+        If ``True``, return ``None`` for the files that aren't found instead
+        of raising an exception. A list of files is still resolved in a single
+        module call when some of them are missing.
     G : bool or str
         If the file is downloadable and not found, we will try to download the
         it. Use True or 'l' (default) to download to the current directory. Use
@@ -120,21 +369,97 @@ def which(fname, **kwargs):
 
     Returns
     -------
-    path : str
-        The path of the file, depending on the options used.
+    path : str or list of str
+        The path of the file, depending on the options used. A list of paths
+        (in the same order) if given a list of file names. ``None`` for
+        missing files if ``missing_ok=True``.
 
     Raises
     ------
     FileNotFoundError
-        If the file is not found.
-
-    """
-    with GMTTempFile() as tmpfile:
-        arg_str = ' '.join([fname, build_arg_string(kwargs),
-                            "->" + tmpfile.name])
-        with LibGMT() as lib:
-            lib.call_module('which', arg_str)
-        path = tmpfile.read().strip()
-    if not path:
-        raise FileNotFoundError("File '{}' not found.".format(fname))
-    return path
+        If the file is not found and ``missing_ok=False``.
+
+    """
+    names = [fname] if isinstance(fname, str) else list(fname)
+    # Only the paths of remote files placed in the cache or user directories
+    # don't depend on the current directory.
+    indexable = kwargs.get('G') in ['c', 'u'] and set(kwargs) == {'G'}
+    paths = {}
+    if indexable and cache:
+        for name in names:
+            if name.startswith('@'):
+                path = WHICH_INDEX.get(_which_key(name, kwargs['G']))
+                if path is not None:
+                    paths[name] = path
+    missing = [name for name in dict.fromkeys(names) if name not in paths]
+    if missing:
+        for name, path in zip(missing, _which(missing, kwargs, missing_ok)):
+            paths[name] = path
+            if indexable and path is not None and name.startswith('@'):
+                WHICH_INDEX.set(_which_key(name, kwargs['G']), path)
+    if isinstance(fname, str):
+        return paths[fname]
+    return [paths[name] for name in names]
+
+
+# Index of the paths found by 'which' for remote files
+WHICH_INDEX = PathIndex('which-index.json')
+
+
+def _which_key(fname, download):
+    """
+    The key used to store the path of a file in the which index.
+    """
+    return '{}|{}'.format(fname, download)
+
+
+def _which(names, kwargs, missing_ok=False):
+    """
+    Run the which module for several files at once.
+
+    Returns the list of paths in the same order as *names*. If not all files
+    are found and *missing_ok* is True, the paths that were printed are
+    matched to the names and the missing ones are None. Otherwise, run the
+    module again for each file to find the missing one.
+    """
+    arg_str = ' '.join(names + [build_arg_string(kwargs)])
+    with LibGMT() as lib:
+        paths = call_module_output(lib, 'which', arg_str).split('\n')
+        paths = [path.strip() for path in paths if path.strip()]
+        if len(paths) == len(names):
+            return paths
+        if missing_ok:
+            return _match_paths(names, paths)
+        for name in names:
+            arg_str = ' '.join([name, build_arg_string(kwargs)])
+            if not call_module_output(lib, 'which', arg_str).strip():
+                raise FileNotFoundError("File '{}' not found.".format(name))
+    raise FileNotFoundError(
+        "Could not find all of the files: {}".format(', '.join(names)))
+
+
+def _match_paths(names, paths):
+    """
+    Match the paths printed by which to the file names that were given.
+
+    Missing files aren't printed, so the paths (in the same order as the
+    names) are matched to the names by the start of their base names. Remote
+    files can get an extension when downloaded.
+
+    Examples
+    --------
+
+    >>> _match_paths(['@N00E000.nc', '@N00E001.nc', '@earth_relief_60m'],
+    ...              ['/data/N00E000.nc', '/data/earth_relief_60m.grd'])
+    ['/data/N00E000.nc', None, '/data/earth_relief_60m.grd']
+
+    """
+    matched = []
+    remaining = list(paths)
+    for name in names:
+        base = os.path.basename(name.lstrip('@'))
+        if remaining and os.path.basename(remaining[0]).startswith(base):
+            matched.append(remaining.pop(0))
+        else:
+            matched.append(None)
+    return matched
@@ -0,0 +1,123 @@
+"""
+Color palette tables (CPTs) made from numpy arrays and kept in memory.
+"""
+import hashlib
+
+import numpy as np
+
+from .exceptions import GMTInvalidInput
+from .helpers import LRUCache
+
+
+# The CPT text of recently used palettes, by hash of their arrays
+CPT_CACHE = LRUCache(max_bytes=2**24)
+
+
+class Palette():
+    """
+    A color palette table (CPT) built from arrays of z values and colors.
+
+    Pass it to the *cmap* (C) argument of plotting methods instead of the name
+    of a CPT file. The palette is sent to GMT in memory as a
+    ``GMT_IS_PALETTE`` virtual file (see
+    :meth:`gmt.clib.LibGMT.palette_to_vfile`), so nothing is written to disk.
+
+    The text of the CPT is generated once for each combination of arrays and
+    kept in a cache by the hash of their contents (the ``key``). Creating a
+    palette from the same arrays again doesn't generate it again. Within a
+    GMT session, the palette read by GMT is also cached by ``key`` (see
+    :meth:`gmt.clib.LibGMT.palette_to_vfile`). Use :meth:`save` to write the
+    CPT to a file for use outside of Python.
+
+    Parameters
+    ----------
+    z : 1d array
+        The z values of the slice boundaries, in increasing order. A palette
+        with *n* slices has *n + 1* boundaries.
+    rgb : 2d array
+        Red, green, and blue values from 0 to 255. If it has the same number
+        of rows as *z*, colors are interpolated between boundaries
+        (continuous palette). If it has one row less, each slice has a single
+        color (discrete palette).
+    background, foreground, nan : list or None
+        The RGB colors for values below the first boundary, above the last
+        one, and for NaNs. If ``None``, use the GMT defaults.
+
+    Examples
+    --------
+
+    >>> palette = Palette(z=[0, 10, 20], rgb=[[0, 0, 255], [255, 0, 0]],
+    ...                   nan=[128, 128, 128])
+    >>> print(palette.cpt)
+    0 0/0/255 10 0/0/255
+    10 255/0/0 20 255/0/0
+    N 128/128/128
+    <BLANKLINE>
+    >>> Palette([0, 1], [[0, 0, 0], [255, 255, 255]]).key == \\
+    ...     Palette([0, 1], [[0, 0, 0], [255, 255, 255]]).key
+    True
+
+    """
+
+    def __init__(self, z, rgb, background=None, foreground=None, nan=None):
+        self.z = np.asarray(z, dtype='float64')
+        self.rgb = np.asarray(rgb)
+        if self.z.ndim != 1 or self.z.size < 2:
+            raise GMTInvalidInput("Palettes need at least two z values.")
+        if np.any(np.diff(self.z) <= 0):
+            raise GMTInvalidInput("Palette z values must be increasing.")
+        if self.rgb.ndim != 2 or self.rgb.shape[1] != 3 or \
+                self.rgb.shape[0] not in (self.z.size, self.z.size - 1):
+            raise GMTInvalidInput(
+                "Invalid palette colors with shape {}. Must have 3 columns "
+                "and as many rows as z values (or one less)."
+                .format(self.rgb.shape))
+        if np.any(self.rgb < 0) or np.any(self.rgb > 255):
+            raise GMTInvalidInput("Palette colors must be between 0 and 255.")
+        self.special = [(code, color) for code, color in
+                        zip('BFN', [background, foreground, nan])
+                        if color is not None]
+        content = [self.z.tobytes(), self.rgb.astype('float64').tobytes()]
+        content.extend('{}{}'.format(code, list(color)).encode()
+                       for code, color in self.special)
+        self.key = hashlib.sha1(b'|'.join(content)).hexdigest()
+
+    @property
+    def cpt(self):
+        "The palette in the GMT text format."
+        cpt = CPT_CACHE.get(self.key)
+        if cpt is None:
+            cpt = self._make_cpt()
+            CPT_CACHE.put(self.key, cpt, nbytes=len(cpt))
+        return cpt
+
+    def save(self, fname):
+        """
+        Write the palette to a CPT file.
+
+        Parameters
+        ----------
+        fname : str
+            The name of the file.
+
+        """
+        with open(fname, 'w') as fcpt:
+            fcpt.write(self.cpt)
+
+    def _make_cpt(self):
+        """
+        Generate the text of the CPT.
+        """
+        colors = ['/'.join('{:g}'.format(value) for value in color)
+                  for color in self.rgb]
+        if self.rgb.shape[0] == self.z.size:
+            lower, upper = colors[:-1], colors[1:]
+        else:
+            lower = upper = colors
+        lines = ['{:.10g} {} {:.10g} {}'.format(z0, color0, z1, color1)
+                 for z0, color0, z1, color1
+                 in zip(self.z[:-1], lower, self.z[1:], upper)]
+        for code, color in self.special:
+            lines.append('{} {}'.format(
+                code, '/'.join('{:g}'.format(value) for value in color)))
+        return '\n'.join(lines + [''])
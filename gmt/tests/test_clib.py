@@ -13,11 +13,15 @@ import xarray as xr
 from packaging.version import Version
 
 from ..clib.core import LibGMT
+from ..clib.handles import GMTDataHandle, GMTDataset, GMTGrid
 from ..clib.utils import clib_extension, load_libgmt, check_libgmt, \
-    dataarray_to_matrix, get_clib_path
+    dataarray_to_matrix, get_clib_path, register_file_grid, dataarray_source, \
+    dataarray_to_image, image_layout, datetime_to_numeric, vectors_to_arrays, \
+    FILE_GRIDS
 from ..exceptions import GMTCLibError, GMTOSError, GMTCLibNotFoundError, \
     GMTCLibNoSessionError, GMTInvalidInput, GMTVersionError
 from ..helpers import GMTTempFile
+from ..datasets import load_earth_relief
 from .. import Figure
 
 
@@ -203,6 +207,77 @@ def test_call_module():
             assert output == '11.5309 61.7074 -2.9289 7.8648 0.1412 0.9338'
 
 
+def test_call_module_options():
+    "Option lists give the same output as argument strings"
+    data_fname = os.path.join(TEST_DATA_DIR, 'points.txt')
+    with LibGMT() as lib:
+        for _ in range(2):
+            with GMTTempFile() as out_fname:
+                options = [('<', data_fname), ('C', ''),
+                           ('>', out_fname.name)]
+                lib.call_module('info', options)
+                output = out_fname.read().strip()
+                assert output == \
+                    '11.5309 61.7074 -2.9289 7.8648 0.1412 0.9338'
+        # The temporary file names differ so there are two lists
+        assert len(lib._options) == 2
+        head = lib._create_options([('C', ''), ('I', '1')])
+        assert head is not None
+        lib._destroy_options(head)
+        with pytest.raises(GMTInvalidInput):
+            lib._create_options([('C', ''), ('CI', '')])
+
+
+def test_call_module_options_cache():
+    "Option lists are reused and the least recently used are freed"
+    options = [[('B', 'af'), ('J', 'X{}i'.format(width)), ('R', '0/10/0/10')]
+               for width in range(3)]
+    with LibGMT() as lib:
+        lib.max_option_lists = 2
+        lib.call_module('figure', [('<', 'test-options-cache')])
+        for i in [0, 1, 0, 2]:
+            lib.call_module('basemap', options[i])
+        assert list(lib._options) == [tuple(options[0]), tuple(options[2])]
+    assert not lib._options
+
+
+def test_options_may_change():
+    "Lists that modern mode would complete with -R and -J are copied"
+    assert LibGMT._options_may_change([('B', 'af')])
+    assert LibGMT._options_may_change([('R', ''), ('J', 'X4i')])
+    assert LibGMT._options_may_change([('R', '0/1/0/1'), ('B', 'af')])
+    assert not LibGMT._options_may_change([('R', '0/1/0/1'), ('J', 'X4i')])
+
+
+def test_call_module_string_not_split(monkeypatch):
+    "Argument strings are only split if there are virtual files to find"
+    def fail(args):
+        "Shouldn't be called"
+        raise AssertionError("Split '{}'".format(args))
+    monkeypatch.setattr('gmt.clib.core.parse_arg_string', fail)
+    data_fname = os.path.join(TEST_DATA_DIR, 'points.txt')
+    with LibGMT() as lib:
+        with GMTTempFile() as out_fname:
+            lib.call_module('info',
+                            '{} -C ->{}'.format(data_fname, out_fname.name))
+            assert out_fname.read().strip()
+
+
+def test_call_module_options_vfile_spaces():
+    "Virtual files and arguments with spaces in option lists"
+    times = np.array(['2018-01-01', '2018-01-03'], dtype='datetime64[D]')
+    with LibGMT() as lib:
+        with lib.vectors_to_vfile(times, [1, 2]) as vfile:
+            with GMTTempFile() as out_fname:
+                lib.call_module('info', [('<', vfile), ('C', ''),
+                                         ('>', out_fname.name)])
+                output = out_fname.read().split()
+        assert output[:2] == ['2018-01-01T00:00:00', '2018-01-03T00:00:00']
+        lib.call_module('figure', [('<', 'test-options')])
+        lib.call_module('basemap', [('R', '0/10/0/10'), ('J', 'X4i'),
+                                    ('B', '+tA title with spaces')])
+
+
 def test_call_module_error_message():
     "Check that the exception has the error message from call_module"
     data_file = 'bogus-data.bla'
@@ -762,6 +837,242 @@ def test_dataarray_to_matrix_inc_fails():
         dataarray_to_matrix(grid)
 
 
+def test_grid_to_vfile_file_source():
+    "Unmodified grids loaded from files are passed by file name"
+    grid = load_earth_relief(resolution='60m')
+    fname = grid.encoding['source']
+    modified = grid.copy()
+    modified.values[0, 0] = 0
+    with LibGMT() as lib:
+        for data in [grid, modified, grid[1:, :], grid.copy(deep=False) + 1]:
+            with lib.grid_to_vfile(data) as vfile:
+                assert (vfile == fname) == (data is grid)
+                with GMTTempFile() as outfile:
+                    lib.call_module('grdinfo', '{} -C ->{}'.format(
+                        vfile, outfile.name))
+                    assert outfile.read().strip()
+
+
+def test_dataarray_source_changes():
+    "Grids stop being passed by file name if anything changes"
+    data = np.ones((4, 5), dtype='float32')
+    grid = xr.DataArray(data, coords=[('y', np.arange(4)),
+                                      ('x', np.arange(5))])
+    with GMTTempFile(suffix='.nc') as tmpfile:
+        # Writable data might be modified so they can't be registered
+        register_file_grid(grid, tmpfile.name)
+        assert dataarray_source(grid) is None
+        data.flags.writeable = False
+        register_file_grid(grid, tmpfile.name)
+        assert dataarray_source(grid) == tmpfile.name
+        shifted = grid.assign_coords(x=grid.x + 1)
+        assert dataarray_source(shifted) is None
+        with open(tmpfile.name, 'w') as changed:
+            changed.write('not the same file')
+        assert dataarray_source(grid) is None
+
+
+def test_dataarray_source_many_grids():
+    "Grids with different data can be registered for the same file"
+
+    def read_only_grid():
+        "A grid with new read-only data"
+        data = np.ones((4, 5), dtype='float32')
+        data.flags.writeable = False
+        return xr.DataArray(data, coords=[('y', np.arange(4)),
+                                          ('x', np.arange(5))])
+
+    grids = [read_only_grid(), read_only_grid()]
+    with GMTTempFile(suffix='.nc') as tmpfile:
+        for grid in grids:
+            register_file_grid(grid, tmpfile.name)
+        assert [dataarray_source(item) for item in grids] == \
+            [tmpfile.name]*2
+    # Entries are removed with their data
+    entries = len(FILE_GRIDS)
+    del grids, grid
+    assert len(FILE_GRIDS) == entries - 2
+
+
+def test_dataset_handle_reuse():
+    "Pinned datasets can be read by many module calls"
+    x = np.arange(10, dtype='float64')
+    y = x**2
+    with LibGMT() as lib:
+        dataset = GMTDataset(lib, x, y)
+        for args in ['-C', '-C', '-I1']:
+            with GMTTempFile() as outfile:
+                lib.call_module('info', '{} {} ->{}'.format(dataset, args,
+                                                            outfile.name))
+                assert outfile.read().strip()
+        dataset.close()
+        assert dataset.closed
+    with LibGMT() as lib:
+        with pytest.raises(GMTInvalidInput):
+            GMTDataset(lib, x, y[:5])
+        # Open handles are closed with the session
+        handle = GMTDataset(lib, x, y)
+    assert handle.closed
+
+
+def test_grid_handle_reuse():
+    "Pinned grids can be read by many module calls"
+    data = np.arange(20, dtype='float64').reshape((4, 5))
+    grid = xr.DataArray(data, coords=[('y', np.arange(4)),
+                                      ('x', np.arange(5))])
+    with LibGMT() as lib:
+        with GMTGrid(lib, grid) as handle:
+            for _ in range(3):
+                with GMTTempFile() as outfile:
+                    lib.call_module('grdinfo', '{} -C ->{}'.format(
+                        handle.vfile, outfile.name))
+                    values = outfile.read().split()
+                assert values[1:5] == ['0', '4', '0', '3']
+        assert handle.closed
+
+
+def test_data_handle_abstract():
+    "The base class of the handles can't be used directly"
+    with pytest.raises(TypeError):
+        GMTDataHandle(LibGMT())  # pylint: disable=abstract-class-instantiated
+
+
+def test_vectors_to_vfile_strings():
+    "Trailing text is passed with the vectors"
+    x = np.arange(5, dtype='float64')
+    strings = np.array(['label {}'.format(i) for i in range(5)])
+    with LibGMT() as lib:
+        with lib.vectors_to_vfile(x, x**2, strings=strings) as vfile:
+            with GMTTempFile() as outfile:
+                lib.call_module('convert', '{} ->{}'.format(vfile,
+                                                            outfile.name))
+                lines = outfile.read().strip().split('\n')
+        assert [line.split(None, 2)[2] for line in lines] == list(strings)
+        with pytest.raises(GMTInvalidInput):
+            with lib.vectors_to_vfile(x, x, strings=strings[:3]):
+                pass
+
+
+def test_put_strings_fails_for_old_version():
+    "GMT_Put_Strings doesn't exist before GMT 6.1"
+
+    def mock_defaults(api, name, value):  # pylint: disable=unused-argument
+        "Return an old version"
+        value.value = b"6.0.0"
+        return 0
+
+    with LibGMT() as lib:
+        dataset = lib.create_data(family='GMT_IS_DATASET|GMT_VIA_VECTOR',
+                                  geometry='GMT_IS_POINT',
+                                  mode='GMT_CONTAINER_ONLY', dim=[2, 5, 1, 0])
+        with mock(lib, 'GMT_Get_Default', mock_func=mock_defaults):
+            with pytest.raises(GMTVersionError):
+                lib.put_strings(dataset, family='GMT_IS_VECTOR',
+                                strings=np.array(['a'] * 5))
+
+
+def test_vectors_to_vfile_arrow():
+    "Arrow arrays are passed without copying unless they have nulls"
+    pyarrow = pytest.importorskip('pyarrow')
+    x = pyarrow.array(np.arange(5, dtype='float64'))
+    y = pyarrow.chunked_array([pyarrow.array([10, 11, None, 13, 14])])
+    arrays = vectors_to_arrays([x, y])
+    assert np.shares_memory(arrays[0], np.frombuffer(x.buffers()[1]))
+    npt.assert_allclose(arrays[1], [10, 11, np.nan, 13, 14])
+    with LibGMT() as lib:
+        with lib.vectors_to_vfile(x, y) as vfile:
+            with GMTTempFile() as outfile:
+                lib.call_module('info', '{} -C ->{}'.format(vfile,
+                                                            outfile.name))
+                assert outfile.read().split() == ['0', '4', '10', '14']
+
+
+def test_vectors_to_vfile_datetime():
+    "Times are read by GMT as absolute time in any unit"
+    values = np.arange(3, dtype='float64')
+    for unit in ['D', 's', 'ns']:
+        times = np.array(['2018-01-01', '2018-01-02', '2018-01-04'],
+                         dtype='datetime64[{}]'.format(unit))
+        with LibGMT() as lib:
+            with lib.vectors_to_vfile(times, values) as vfile:
+                with GMTTempFile() as outfile:
+                    lib.call_module('info', '{} -C ->{}'.format(
+                        vfile, outfile.name))
+                    output = outfile.read().split()
+        assert output[:2] == ['2018-01-01T00:00:00', '2018-01-04T00:00:00']
+        assert output[2:] == ['0', '2']
+
+
+def test_attach_options():
+    "Options are added for whole virtual file names and aren't duplicated"
+    lib = LibGMT()
+    vfile = '@GMTAPI@-000001'
+    with lib.attach_options(vfile, '-f0T --TIME_UNIT=s'):
+        assert not lib._vfile_read_options([('<', vfile + '0')])
+        assert lib._vfile_read_options([('<', vfile), ('R', '0/1/0/1')]) == [
+            ('f', '0T'), ('-', 'TIME_UNIT=s')]
+        assert lib._vfile_read_options([('I', vfile), ('f', '0x,1y')]) == [
+            ('-', 'TIME_UNIT=s')]
+        assert lib._vfile_read_options(
+            [('<', vfile), ('-', 'TIME_UNIT=d')]) == [('f', '0T')]
+    assert not lib._vfile_read_options([('<', vfile)])
+
+
+def test_datetime_to_numeric():
+    "Zero-copy views only for GMT units without NaT"
+    seconds = np.array([0, 60], dtype='datetime64[s]')
+    minutes = seconds.astype('datetime64[m]')
+    arrays, options = datetime_to_numeric([seconds, minutes])
+    npt.assert_allclose(arrays[0], [0, 60])
+    npt.assert_allclose(arrays[1], [0, 60])
+    assert arrays[0].dtype == arrays[1].dtype == 'float64'
+    assert options.startswith('-f0T,1T ')
+    arrays, options = datetime_to_numeric([minutes])
+    assert np.shares_memory(arrays[0], minutes)
+    assert options.endswith('--TIME_UNIT=m')
+    arrays, options = datetime_to_numeric([np.arange(2)])
+    assert options == ''
+
+
+def test_image_to_vfile():
+    "Pixel and band interleaved images give the same GMT image"
+    image = np.random.default_rng(0).integers(0, 256, size=(10, 20, 3),
+                                              dtype='uint8')
+    region = [0, 40, -10, 10]
+    with LibGMT() as lib:
+        layout = lib.get_default('API_IMAGE_LAYOUT')
+        for data in [image, np.moveaxis(image, 2, 0).copy(), image[:, ::-1]]:
+            with lib.image_to_vfile(data, region) as vfile:
+                with GMTTempFile() as outfile:
+                    lib.call_module('grdinfo', '{} -C ->{}'.format(
+                        vfile, outfile.name))
+                    values = outfile.read().split()
+            assert values[1:5] == ['0', '40', '-10', '10']
+            assert values[7:9] == ['2', '2']
+            # The image layout only applies while the virtual file is open
+            assert lib.get_default('API_IMAGE_LAYOUT') == layout
+
+
+def test_image_layout_fails():
+    "Images must be uint8 with 3 bands first or last"
+    for image in [np.zeros((10, 20, 3)), np.zeros((10, 20), dtype='uint8'),
+                  np.zeros((10, 20, 4), dtype='uint8')]:
+        with pytest.raises(GMTInvalidInput):
+            image_layout(image)
+
+
+def test_dataarray_to_image():
+    "Rows of images with increasing row coordinates are flipped"
+    data = np.arange(12, dtype='uint8').reshape((3, 2, 2))
+    image = xr.DataArray(data, dims=['band', 'y', 'x'],
+                         coords=dict(y=[1, 3], x=[-1, 1]))
+    array, region = dataarray_to_image(image)
+    npt.assert_allclose(array, data[:, ::-1])
+    assert region == [-2, 2, 0, 4]
+    array, region = dataarray_to_image(image.isel(y=slice(None, None, -1)))
+    assert np.shares_memory(array, data[:, ::-1])
+
+
 def test_get_default():
     "Make sure get_default works without crashing and gives reasonable results"
     with LibGMT() as lib:
@@ -4,8 +4,14 @@ Test basic functionality for loading datasets.
 import pytest
 import numpy as np
 import numpy.testing as npt
+import pandas as pd
+import xarray as xr
 
-from ..datasets import load_japan_quakes, load_earth_relief
+from ..datasets import earth_relief
+from ..datasets.cache import load_cached_table, load_cached_grid, \
+    clear_dataset_cache
+from ..datasets import load_japan_quakes, load_earth_relief, \
+    earth_relief_cache_info, clear_earth_relief_cache, earth_relief_resolution
 from ..exceptions import GMTInvalidInput
 
 
@@ -50,3 +56,248 @@ def test_earth_relief_30():
     npt.assert_allclose(data.lon, np.arange(-180, 180.5, 0.5))
     npt.assert_allclose(data.min(), -9214)
     npt.assert_allclose(data.max(), 5859)
+
+
+def test_earth_relief_cache():
+    "Loading the same resolution twice should share the read-only data"
+    clear_earth_relief_cache()
+    first = load_earth_relief(resolution='60m')
+    second = load_earth_relief(resolution='60m')
+    assert first is not second
+    assert np.shares_memory(first.values, second.values)
+    assert not first.values.flags.writeable
+    with pytest.raises(ValueError):
+        first[0, 0] = 1
+    info = earth_relief_cache_info()
+    assert info['keys'] == ['60m']
+    assert info['hits'] == 1
+    assert info['misses'] == 1
+    # Not using the cache gives a writable grid
+    uncached = load_earth_relief(resolution='60m', cache=False)
+    npt.assert_allclose(uncached, first)
+    assert earth_relief_cache_info()['hits'] == 1
+
+
+def test_earth_relief_cache_max_bytes():
+    "Grids shouldn't be cached past the size limit"
+    grid = load_earth_relief(resolution='60m', cache=False)
+    clear_earth_relief_cache(max_bytes=grid.nbytes)
+    load_earth_relief(resolution='60m')
+    assert earth_relief_cache_info()['keys'] == ['60m']
+    # The 30m grid is larger than the limit so it's not stored
+    load_earth_relief(resolution='30m')
+    assert earth_relief_cache_info()['keys'] == ['60m']
+    clear_earth_relief_cache(max_bytes=2**30)
+
+
+def test_earth_relief_memmap():
+    "Memory-mapped grids have the same data as the netCDF file"
+    grid = load_earth_relief(resolution='60m', cache=False)
+    clear_dataset_cache('earth_relief_60m')
+    for _ in range(2):
+        mapped = load_earth_relief(resolution='60m', memmap=True)
+        assert isinstance(mapped.data, np.memmap)
+        assert not mapped.values.flags.writeable
+        npt.assert_allclose(mapped, grid)
+        npt.assert_allclose(mapped.lat, grid.lat)
+        npt.assert_allclose(mapped.lon, grid.lon)
+    subset = load_earth_relief(resolution='60m', region=[-10, 5, 30, 40],
+                               memmap=True)
+    assert subset.shape == (11, 16)
+
+
+def test_earth_relief_region():
+    "Loading a region should give the same values as cutting the full grid"
+    clear_earth_relief_cache()
+    # Without the full grid in the cache, the region is read from the file
+    subset = load_earth_relief(resolution='60m', region=[-10, 5, 30, 40])
+    assert earth_relief_cache_info()['keys'] == []
+    assert subset.shape == (11, 16)
+    npt.assert_allclose(subset.lon, np.arange(-10, 6, 1))
+    npt.assert_allclose(subset.lat, np.arange(30, 41, 1))
+    grid = load_earth_relief(resolution='60m')
+    npt.assert_allclose(subset, grid.sel(lon=slice(-10, 5), lat=slice(30, 40)))
+    # Now the region is cut from the cached grid
+    cached = load_earth_relief(resolution='60m', region=[-10, 5, 30, 40])
+    npt.assert_allclose(cached, subset)
+
+
+def test_earth_relief_region_antimeridian():
+    "Regions crossing the antimeridian or using 0-360 longitudes"
+    grid = load_earth_relief(resolution='60m')
+    subset = load_earth_relief(resolution='60m', region=[170, 190, -10, 10])
+    assert subset.shape == (21, 21)
+    npt.assert_allclose(subset.lon, np.arange(170, 191, 1))
+    npt.assert_allclose(subset.sel(lon=185),
+                        grid.sel(lon=-175, lat=slice(-10, 10)))
+    shifted = load_earth_relief(resolution='60m', region=[200, 210, 0, 5])
+    npt.assert_allclose(shifted.lon, np.arange(200, 211, 1))
+    npt.assert_allclose(shifted.values,
+                        grid.sel(lon=slice(-160, -150), lat=slice(0, 5)))
+
+
+def test_earth_relief_region_fails():
+    "Invalid regions should raise an exception"
+    for region in [[0, 1, 2], [10, 0, 0, 1], [0, 10, 5, 1], [0, 361, 0, 1]]:
+        with pytest.raises(GMTInvalidInput):
+            load_earth_relief(resolution='60m', region=region)
+
+
+def test_earth_relief_resolution():
+    "Check the resolution picked for different map sizes"
+    region = [-180, 180, -90, 90]
+    assert earth_relief_resolution(region, projection='W6i') == '10m'
+    assert earth_relief_resolution(region, projection='W15c', dpi=72) == '30m'
+    assert earth_relief_resolution(region, width=1, dpi=72) == '60m'
+    assert earth_relief_resolution(region, width=50, dpi=600) == '01m'
+    # The width argument overrides the projection
+    assert earth_relief_resolution([0, 10, 0, 10], projection='m1:100000',
+                                   width=2, dpi=20) == '10m'
+
+
+def test_earth_relief_resolution_fails():
+    "Fail if the region isn't numerical or the width can't be determined"
+    with pytest.raises(GMTInvalidInput):
+        earth_relief_resolution('JP', projection='M6i')
+    with pytest.raises(GMTInvalidInput):
+        earth_relief_resolution([0, 10, 0, 10], projection='m1:100000')
+    with pytest.raises(GMTInvalidInput):
+        earth_relief_resolution([0, 10, 0, 10])
+
+
+def test_earth_relief_srtm_fails():
+    "SRTM resolutions need a region inside the tiled area"
+    with pytest.raises(GMTInvalidInput):
+        load_earth_relief(resolution='03s')
+    for region in [[0, 361, 0, 1], [0, 1, 89, 91], [1, 0, 0, 1], 'JP']:
+        with pytest.raises(GMTInvalidInput):
+            load_earth_relief(resolution='03s', region=region)
+
+
+def test_earth_relief_srtm_fails_memmap():
+    "SRTM tiles aren't memory-mapped"
+    with pytest.raises(GMTInvalidInput):
+        load_earth_relief(resolution='03s', region=[0, 1, 0, 1], memmap=True)
+
+
+def test_earth_relief_srtm_tiles(tmpdir, monkeypatch):
+    "Assemble a region from fake SRTM tiles, leaving missing tiles as NaN"
+    spacing = 3/3600
+    coords = np.arange(0, 1201)*spacing
+    # Only the tile at N00E000 exists. The one at N00E001 is in the ocean.
+    tile = xr.DataArray(np.ones((1201, 1201), dtype='float32'), name='z',
+                        coords=dict(y=coords, x=coords), dims=['y', 'x'])
+    fname = str(tmpdir.join('N00E000.SRTMGL3.nc'))
+    tile.to_netcdf(fname)
+
+    def fake_which(fnames, **kwargs):
+        "Resolve only the tile that exists, all in a single call"
+        assert kwargs == dict(download='u', missing_ok=True)
+        assert fnames == ['@N00E000.SRTMGL3.nc', '@N00E001.SRTMGL3.nc']
+        return [fname, None]
+
+    monkeypatch.setattr(earth_relief, 'which', fake_which)
+    grid = load_earth_relief(resolution='03s', region=[0.5, 1.5, 0, 0.1])
+    assert grid.shape == (121, 1201)
+    npt.assert_allclose(grid.lon[[0, -1]], [0.5, 1.5])
+    npt.assert_allclose(grid.lat[[0, -1]], [0, 0.1])
+    assert np.all(grid.sel(lon=slice(0.5, 1)) == 1)
+    assert np.all(np.isnan(grid.sel(lon=slice(1.001, 1.5))))
+
+
+def test_earth_relief_srtm_tiles_0_360(tmpdir, monkeypatch):
+    "Regions with longitudes from 0 to 360 can cross the prime meridian"
+    spacing = 3/3600
+    coords = np.arange(0, 1201)*spacing
+    tile = xr.DataArray(np.ones((1201, 1201), dtype='float32'), name='z',
+                        coords=dict(y=coords, x=coords), dims=['y', 'x'])
+    fname = str(tmpdir.join('N00E000.SRTMGL3.nc'))
+    tile.to_netcdf(fname)
+
+    def fake_which(fnames, **kwargs):
+        "Only the tile East of the prime meridian exists"
+        assert kwargs == dict(download='u', missing_ok=True)
+        assert fnames == ['@N00W001.SRTMGL3.nc', '@N00E000.SRTMGL3.nc']
+        return [None, fname]
+
+    monkeypatch.setattr(earth_relief, 'which', fake_which)
+    grid = load_earth_relief(resolution='03s', region=[359.5, 360.5, 0, 0.1])
+    assert grid.shape == (121, 1201)
+    npt.assert_allclose(grid.lon[[0, -1]], [359.5, 360.5])
+    assert np.all(np.isnan(grid.sel(lon=slice(359.5, 359.999))))
+    assert np.all(grid.sel(lon=slice(360, 360.5)) == 1)
+
+
+def test_japan_quakes_cache():
+    "The cached version of the dataset is the same as the parsed one"
+    parsed = load_japan_quakes(cache=False)
+    npt.assert_allclose(load_japan_quakes(), parsed)
+    cached = load_japan_quakes()
+    assert list(cached.columns) == list(parsed.columns)
+    npt.assert_allclose(cached, parsed)
+
+
+def test_cached_table(tmpdir):
+    "Tables are only parsed again if the source file changes"
+    fname = str(tmpdir.join('table.txt'))
+    calls = []
+
+    def reader(fname):
+        "Parse the table and count the calls"
+        calls.append(fname)
+        return pd.read_table(fname, sep=r'\s+', names=['x', 'y'])
+
+    tmpdir.join('table.txt').write('1 2.5\n3 4.5\n')
+    clear_dataset_cache('test-table')
+    first = load_cached_table(fname, reader, 'test-table')
+    second = load_cached_table(fname, reader, 'test-table')
+    assert len(calls) == 1
+    # The columns are memory-mapped from the cache, not copied into memory
+    for column in second:
+        array = second[column].values
+        while not isinstance(array, np.memmap) and array.base is not None:
+            array = array.base
+        assert isinstance(array, np.memmap)
+    npt.assert_allclose(second, first)
+    tmpdir.join('table.txt').write('5 6.5\n7 8.5\n9 10.5\n')
+    third = load_cached_table(fname, reader, 'test-table')
+    assert len(calls) == 2
+    npt.assert_allclose(third.y, [6.5, 8.5, 10.5])
+    clear_dataset_cache('test-table')
+
+
+def test_cached_table_strings(tmpdir):
+    "Tables with text columns are parsed every time"
+    fname = str(tmpdir.join('table.txt'))
+    tmpdir.join('table.txt').write('1 a\n2 b\n')
+    calls = []
+
+    def reader(fname):
+        "Parse the table and count the calls"
+        calls.append(fname)
+        return pd.read_table(fname, sep=r'\s+', names=['x', 'label'])
+
+    for _ in range(2):
+        data = load_cached_table(fname, reader, 'test-strings')
+    assert len(calls) == 2
+    assert list(data.label) == ['a', 'b']
+
+
+def test_cached_grid(tmpdir):
+    "Grids are decoded again only if the source file changes"
+    fname = str(tmpdir.join('grid.nc'))
+    grid = xr.DataArray(np.arange(12, dtype='float32').reshape((3, 4)),
+                        coords=dict(lat=[0, 1, 2], lon=[0, 1, 2, 3]),
+                        dims=['lat', 'lon'], name='z',
+                        attrs=dict(units='m'))
+    grid.to_netcdf(fname)
+    clear_dataset_cache('test-grid')
+    cached = load_cached_grid(fname, 'test-grid')
+    assert isinstance(cached.data, np.memmap)
+    assert cached.name == 'z'
+    assert cached.attrs['units'] == 'm'
+    npt.assert_allclose(cached, grid)
+    npt.assert_allclose(cached.lon, grid.lon)
+    (grid*2).to_netcdf(fname)
+    npt.assert_allclose(load_cached_grid(fname, 'test-grid'), grid*2)
+    clear_dataset_cache('test-grid')
@@ -121,3 +121,42 @@ def test_figure_show():
                 F=True)
     img = fig.show(width=800)
     assert img.width == 800
+
+
+def test_figure_static_layers(tmpdir, monkeypatch):
+    "Static layers are rendered once and reused by other figures"
+    from .. import figure
+    monkeypatch.setattr(figure, 'cache_dir', lambda *subdirs: str(tmpdir))
+    layers = [('coast', dict(land='gray', water='skyblue'))]
+    kwargs = dict(region=[-30, 30, -20, 20], projection='M4i', layers=layers,
+                  dpi=100)
+    fig = Figure()
+    fname = fig.static_layers(frame='af', **kwargs)
+    assert os.path.exists(fname)
+    mtime = os.stat(fname).st_mtime_ns
+    fig.plot(x=[0, 10], y=[0, 10], style='c0.2c', color='red')
+    fig.savefig(str(tmpdir.join('first.png')))
+    fig = Figure()
+    assert fig.static_layers(**kwargs) == fname
+    assert os.stat(fname).st_mtime_ns == mtime
+    fig.savefig(str(tmpdir.join('second.png')))
+    # Anything else makes a new image
+    other = dict(kwargs)
+    other['dpi'] = 50
+    fig = Figure()
+    assert fig.static_layers(**other) != fname
+
+
+def test_figure_static_layers_fails():
+    "Static layers need a width and no frame in the layers"
+    fig = Figure()
+    with pytest.raises(GMTInvalidInput):
+        fig.static_layers([0, 1, 0, 1], 'x1i', layers=[])
+    with pytest.raises(GMTInvalidInput):
+        fig.static_layers([0, 1, 0, 1], 'X1i',
+                          layers=[('coast', dict(frame=True))])
+    with pytest.raises(GMTInvalidInput):
+        fig.static_layers([0, 1, 0, 1], 'L0/0/0/1/1i', layers=[])
+    with pytest.raises(GMTInvalidInput):
+        fig.static_layers([0, 1, 0, 1], 'X1i',
+                          layers=[('plot', dict(data=object()))])
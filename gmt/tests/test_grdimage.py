@@ -1,8 +1,11 @@
+# pylint: disable=redefined-outer-name
 """
 Test Figure.grdimage
 """
 import pytest
 import numpy as np
+import xarray as xr
+from matplotlib.testing.compare import compare_images
 
 from .. import Figure
 from ..exceptions import GMTInvalidInput
@@ -23,6 +26,73 @@ def test_grdimage_fails():
     fig = Figure()
     with pytest.raises(GMTInvalidInput):
         fig.grdimage(np.arange(20).reshape((4, 5)))
-    grid = load_earth_relief()
-    with pytest.raises(NotImplementedError):
-        fig.grdimage(grid)
+
+
+@pytest.mark.mpl_image_compare(filename='test_grdimage_file.png')
+def test_grdimage_dataarray():
+    "DataArray input gives the same image as the file"
+    # Modify the grid so that it isn't passed by file name
+    grid = load_earth_relief(resolution='60m').copy() + 0
+    fig = Figure()
+    fig.grdimage(grid, cmap='ocean', region='-180/180/-70/70',
+                 projection='W0/10i', shading=True)
+    return fig
+
+
+def test_grdimage_shading_cpt_in_memory(tmpdir):
+    "Intensity grid and CPT in memory give the same image as files"
+    grid = load_earth_relief(resolution='60m', region=[-180, 180, -70, 70])
+    # Compute the intensity in Python from the gradient of the relief
+    gradient = np.gradient(grid.values)[1]
+    shading = xr.DataArray(gradient/np.abs(gradient).max(), coords=grid.coords,
+                           dims=grid.dims)
+    cpt = '\n'.join(['-8000 black 0 blue', '0 green 6000 white', ''])
+    shading_file = str(tmpdir.join('shading.nc'))
+    shading.to_netcdf(shading_file)
+    cpt_file = str(tmpdir.join('relief.cpt'))
+    tmpdir.join('relief.cpt').write(cpt)
+    images = []
+    for shade, cmap in [(shading, cpt), (shading_file, cpt_file)]:
+        fig = Figure()
+        fig.grdimage(grid, cmap=cmap, region='-180/180/-70/70',
+                     projection='W0/10i', shading=shade)
+        images.append(str(tmpdir.join('{}.png'.format(len(images)))))
+        fig.savefig(images[-1])
+    assert compare_images(images[0], images[1], tol=0) is None
+
+
+def test_grdimage_dpi(tmpdir):
+    "Downsampling grids to the figure resolution"
+    grid = load_earth_relief(resolution='30m')
+    kwargs = dict(cmap='ocean', region='-180/180/-70/70', projection='W0/2i')
+    fig = Figure()
+    # 2 inches at 30 dpi gives 6 degree pixels
+    fig.grdimage(grid, dpi=30, shading=xr.zeros_like(grid), **kwargs)
+    fig.savefig(str(tmpdir.join('downsampled.png')))
+    # Projections given by scale don't have a width
+    with pytest.raises(GMTInvalidInput):
+        fig.grdimage(grid, dpi=30, region='-180/180/-70/70',
+                     projection='w0/0.01i')
+
+
+@pytest.fixture(scope='module')
+def image():
+    "A random RGB image covering the globe with 2 degree pixels"
+    data = np.random.default_rng(0).integers(0, 256, size=(90, 180, 3),
+                                             dtype='uint8')
+    return xr.DataArray(data, dims=['lat', 'lon', 'band'],
+                        coords=dict(lat=np.arange(89, -90, -2),
+                                    lon=np.arange(-179, 180, 2)))
+
+
+def test_grdimage_image(image, tmpdir):
+    "RGB images give the same figure in any band layout and row order"
+    images = []
+    for rgb in [image, image.transpose('band', 'lat', 'lon'),
+                image.isel(lat=slice(None, None, -1))]:
+        fig = Figure()
+        fig.grdimage(rgb, region='-180/180/-90/90', projection='W0/6i')
+        images.append(str(tmpdir.join('{}.png'.format(len(images)))))
+        fig.savefig(images[-1])
+    for other in images[1:]:
+        assert compare_images(images[0], other, tol=0) is None
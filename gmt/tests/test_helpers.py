@@ -4,8 +4,15 @@ Tests the helper functions/classes/etc used in wrapping GMT
 import os
 
 import pytest
+import numpy as np
+import numpy.testing as npt
+import xarray as xr
 
-from ..helpers import kwargs_to_strings, GMTTempFile, unique_name
+from ..helpers import kwargs_to_strings, GMTTempFile, unique_name, \
+    GMTOutputPipe, call_module_output, table_output, columns_output, \
+    PathIndex, gmt_user_dir, grid_block_factors, block_average_grid, \
+    decimate_points, clip_line, is_nonstr_iter, use_alias, build_arg_string
+from ..helpers import capture
 from ..exceptions import GMTInvalidInput
 
 
@@ -35,6 +42,43 @@ def test_kwargs_to_strings_no_bools():
     assert my_module(**args) == args
 
 
+def test_is_nonstr_iter_no_iteration():
+    "Checking iterables doesn't go through their items"
+    generator = (i for i in range(3))
+    assert is_nonstr_iter(generator)
+    assert list(generator) == [0, 1, 2]
+    assert is_nonstr_iter({'a': 1})
+    assert not is_nonstr_iter(None)
+    assert not is_nonstr_iter('text')
+
+
+def test_use_alias_kwargs_to_strings_fused():
+    "Aliases and conversions done in one pass give the same results"
+
+    @use_alias(R='region', i='columns')
+    @kwargs_to_strings(R='sequence', i='sequence_comma')
+    def my_module(**kwargs):
+        "Function that returns the arguments"
+        return kwargs
+
+    assert my_module(region=[1, 2, 3, 4], columns=[0, 1], P=True,
+                     A=False) == dict(R='1/2/3/4', i='0,1', P='')
+    # Aliases take precedence no matter the order
+    assert my_module(R='1/2/3/4', region=[5, 6, 7, 8]) == dict(R='5/6/7/8')
+    assert my_module(region=[5, 6, 7, 8], R='1/2/3/4') == dict(R='5/6/7/8')
+    assert my_module(region=False, R='1/2/3/4') == {}
+    assert my_module.aliases == dict(R='region', i='columns')
+
+
+def test_build_arg_string_memoized():
+    "Cached argument strings don't mix up equal values of different types"
+    assert build_arg_string(dict(E=1)) == '-E1'
+    assert build_arg_string(dict(E=1.0)) == '-E1.0'
+    for _ in range(2):
+        assert build_arg_string(dict(B=['xaf', 'yaf'], J='X4i')) == \
+            '-Bxaf -Byaf -JX4i'
+
+
 def test_gmttempfile():
     "Check that file is really created and deleted."
     with GMTTempFile() as tmpfile:
@@ -74,3 +118,149 @@ def test_gmttempfile_read():
             ftmp.write('in.dat: N = 2\t<1/3>\t<2/4>\n')
         assert tmpfile.read() == 'in.dat: N = 2 <1/3> <2/4>\n'
         assert tmpfile.read(keep_tabs=True) == 'in.dat: N = 2\t<1/3>\t<2/4>\n'
+
+
+def test_gmtoutputpipe_read():
+    "Make sure GMTOutputPipe captures everything written to it"
+    with GMTOutputPipe() as pipe:
+        with open(pipe.name, "w") as fpipe:
+            fpipe.write('in.dat: N = 2\t<1/3>\t<2/4>\n')
+        assert pipe.read() == 'in.dat: N = 2 <1/3> <2/4>\n'
+        assert pipe.read(keep_tabs=True) == 'in.dat: N = 2\t<1/3>\t<2/4>\n'
+
+
+def test_gmtoutputpipe_large_output():
+    "Output larger than the pipe buffer shouldn't block the writer"
+    line = '1.2345 6.7890 1.0\n'
+    with GMTOutputPipe() as pipe:
+        with open(pipe.name, "w") as fpipe:
+            fpipe.write(line*100000)
+        assert pipe.read() == line*100000
+
+
+def test_gmtoutputpipe_no_fd_paths(monkeypatch):
+    "Fall back to temporary files where /dev/fd doesn't exist"
+    monkeypatch.setattr(capture, 'FD_PATHS', False)
+    with GMTOutputPipe() as pipe:
+        assert not pipe.name.startswith('/dev/fd')
+        with open(pipe.name, "w") as fpipe:
+            fpipe.write('1\t2\n')
+        assert pipe.read() == '1 2\n'
+    assert not os.path.exists(pipe.name)
+    with capture.GMTInputPipe('3 4\n') as pipe:
+        assert not pipe.name.startswith('/dev/fd')
+        with open(pipe.name) as fpipe:
+            assert fpipe.read() == '3 4\n'
+    assert not os.path.exists(pipe.name)
+
+
+def test_call_module_output_decoders():
+    "Check that the runner captures the output and applies the decoder"
+
+    class FakeLib():  # pylint: disable=too-few-public-methods
+        "Writes a fixed table to the output file of the module"
+
+        def call_module(self, module, args):  # pylint: disable=no-self-use
+            "Pretend to be a module that prints a table"
+            assert module == 'info'
+            outfile = args.split('->')[-1]
+            with open(outfile, 'w') as fout:
+                fout.write('0\t4\t5\t9\n1\t3\t4\t6\n')
+
+    lib = FakeLib()
+    text = call_module_output(lib, 'info', '-C')
+    assert text == '0 4 5 9\n1 3 4 6\n'
+    table = call_module_output(lib, 'info', '-C', decoder=table_output)
+    npt.assert_allclose(table, [[0, 4, 5, 9], [1, 3, 4, 6]])
+    columns = columns_output(text, names=['xmin', 'xmax', 'ymin'])
+    assert columns == dict(xmin=0, xmax=4, ymin=5)
+
+
+def test_gmt_user_dir():
+    "Check that GMT_USERDIR is used if set"
+    assert gmt_user_dir(env={'GMT_USERDIR': 'bla'}) == 'bla'
+    assert gmt_user_dir(env={}).endswith('.gmt')
+
+
+def test_pathindex_invalidation():
+    "Entries should be dropped when the file changes"
+    index = PathIndex('test-index-{}.json'.format(unique_name()))
+    with GMTTempFile() as tmpfile:
+        index.set('key', tmpfile.name)
+        assert index.get('key') == tmpfile.name
+        # A new index instance should read the entries from disk
+        assert PathIndex(index.name).get('key') == tmpfile.name
+        with open(tmpfile.name, 'w') as ftmp:
+            ftmp.write('modified')
+        assert index.get('key') is None
+    index.clear()
+    assert not os.path.exists(index.fname)
+
+
+def test_block_average_grid():
+    "Downsampled grids keep regular coordinates and ignore NaNs"
+    data = np.arange(7*9, dtype='float32').reshape((7, 9))
+    data[0, 0] = np.nan
+    grid = xr.DataArray(data, dims=['lat', 'lon'],
+                        coords=dict(lat=np.linspace(-3, 3, 7),
+                                    lon=np.linspace(0, 80, 9)))
+    factors = grid_block_factors(grid, [0, 80], width=1, dpi=3)
+    assert factors == (26, 2)
+    # A map 2 inches tall has 6 pixels of 1 degree along y
+    factors = grid_block_factors(grid, [0, 80, -3, 3], width=1, dpi=3,
+                                 height=2)
+    assert factors == (1, 2)
+    coarse = block_average_grid(grid, (2, 3))
+    # The last row doesn't fill a block and is dropped
+    assert coarse.shape == (3, 3)
+    assert coarse.dtype == np.float32
+    npt.assert_allclose(coarse.lon, [10, 40, 70])
+    npt.assert_allclose(coarse.lat, [-2.5, -0.5, 1.5])
+    npt.assert_allclose(coarse.values[0, 0], np.mean([1, 2, 9, 10, 11]))
+    npt.assert_allclose(coarse.values[-1, -1],
+                        np.mean([42, 43, 44, 51, 52, 53]))
+    assert block_average_grid(grid, (1, 1)) is grid
+    # Factors larger than the grid give a single block
+    assert block_average_grid(grid, (26, 2)).shape == (1, 4)
+
+
+def test_block_average_grid_inside():
+    "The coordinates of the coarse grid stay inside of the original grid"
+    grid = xr.DataArray(np.zeros((361, 721)), dims=['lat', 'lon'],
+                        coords=dict(lat=np.linspace(-90, 90, 361),
+                                    lon=np.linspace(-180, 180, 721)))
+    coarse = block_average_grid(grid, (12, 12))
+    assert coarse.lat.values.min() >= -90
+    assert coarse.lat.values.max() <= 90
+    assert coarse.lon.values.min() >= -180
+    assert coarse.lon.values.max() <= 180
+    npt.assert_allclose(np.diff(coarse.lat.values), 6)
+
+
+def test_decimate_points():
+    "Keep the extremes of each cell and drop points with NaN coordinates"
+    x = np.array([0.1, 0.2, np.nan, 0.4, 5.5, 5.6])
+    y = np.array([0.1, 0.2, 0.3, 0.4, 5.5, 5.6])
+    values = np.array([3, 10, -100, -2, 7, 7])
+    npt.assert_equal(decimate_points(x, y, spacing=1), [0, 4])
+    npt.assert_equal(decimate_points(x, y, spacing=1, values=values),
+                     [1, 3, 4])
+    assert decimate_points([], [], spacing=1).size == 0
+
+
+def test_clip_line():
+    "Only drop vertices that don't change the line inside the region"
+    # Leaves through the West and comes back through the South. Vertex 4 is
+    # kept because the line from 1 to 5 would cut through the region.
+    x = np.array([5, -1, -2, -3, -2, 3, 5])
+    y = np.array([5, 5, 3, -2, -3, -3, 5])
+    npt.assert_equal(clip_line(x, y, [0, 10, 0, 10]), [0, 1, 4, 5, 6])
+    # Runs of vertices beyond the same edge are dropped
+    x = np.array([5, 12, 13, 14, 13, 12, 5])
+    y = np.array([5, 5, 4, 3, 2, 1, 1])
+    npt.assert_equal(clip_line(x, y, [0, 10, 0, 10]), [0, 1, 5, 6])
+    # Geographic lines are only clipped in latitude
+    npt.assert_equal(clip_line(x, y, [0, 10, 0, 10], geographic=True),
+                     np.arange(7))
+    npt.assert_equal(clip_line(x, y + 20, [0, 10, 0, 10], geographic=True),
+                     [])
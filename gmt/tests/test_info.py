@@ -5,8 +5,10 @@ import os
 
 import pytest
 import numpy as np
+import numpy.testing as npt
+import pandas as pd
 
-from .. import info, grdinfo
+from .. import info, grdinfo, grdinfo_batch
 from ..exceptions import GMTInvalidInput
 from ..datasets import load_earth_relief
 
@@ -48,12 +50,56 @@ def test_info_t():
     assert output == '-T11.5/61.8/0.1\n'
 
 
+def test_info_per_column():
+    "Make sure per_column decodes the C output into an array"
+    output = info(fname=POINTS_DATA, per_column=True)
+    npt.assert_allclose(output, [11.5309, 61.7074, -2.9289, 7.8648, 0.1412,
+                                 0.9338])
+
+
+def test_info_matrix():
+    "Make sure info works for 2d arrays"
+    data = np.loadtxt(POINTS_DATA)
+    output = info(fname=data, C=True)
+    assert output == '11.5309 61.7074 -2.9289 7.8648 0.1412 0.9338\n'
+    npt.assert_allclose(info(fname=data, per_column=True),
+                        info(fname=POINTS_DATA, per_column=True))
+
+
+def test_info_dataframe_and_vector():
+    "Make sure info works for DataFrames and 1d arrays"
+    data = np.loadtxt(POINTS_DATA)
+    table = pd.DataFrame(data, columns=['x', 'y', 'z'])
+    npt.assert_allclose(info(fname=table, per_column=True),
+                        info(fname=POINTS_DATA, per_column=True))
+    npt.assert_allclose(info(fname=table.x, per_column=True),
+                        [11.5309, 61.7074])
+
+
+def test_info_numpy_method():
+    "The numpy method should match the GMT per column output"
+    data = np.loadtxt(POINTS_DATA)
+    data[3, 1] = np.nan
+    output = info(fname=data, method='numpy')
+    npt.assert_allclose(output, info(fname=data, per_column=True))
+    table = pd.DataFrame(data, columns=['x', 'y', 'z'])
+    npt.assert_allclose(info(fname=table, method='numpy'), output)
+
+
 def test_info_fails():
-    "Make sure info raises an exception if not given a file name"
+    "Make sure info raises an exception if given invalid input"
     with pytest.raises(GMTInvalidInput):
         info(fname=21)
     with pytest.raises(GMTInvalidInput):
-        info(fname=np.arange(20))
+        info(fname=np.arange(20).reshape((2, 5, 2)))
+    with pytest.raises(GMTInvalidInput):
+        info(fname=POINTS_DATA, method='numpy')
+    with pytest.raises(GMTInvalidInput):
+        info(fname=np.arange(20), method='numpy', I=0.1)
+    with pytest.raises(GMTInvalidInput):
+        info(fname=np.arange(20), method='bla')
+    with pytest.raises(GMTInvalidInput):
+        info(fname=POINTS_DATA, per_column=True, T=0.1)
 
 
 def test_grdinfo():
@@ -73,3 +119,33 @@ def test_grdinfo_fails():
     "Check that grdinfo fails correctly"
     with pytest.raises(GMTInvalidInput):
         grdinfo(np.arange(10).reshape((5, 2)))
+
+
+def test_grdinfo_batch():
+    "Check the table produced for files and DataArrays"
+    grid = load_earth_relief()
+    table = grdinfo_batch(["@earth_relief_60m", grid, "@earth_relief_30m"],
+                          chunk_size=2)
+    assert table.shape == (3, 11)
+    assert table.index[0] == "@earth_relief_60m"
+    npt.assert_allclose(table.iloc[1][['west', 'east', 'south', 'north']],
+                        [-180, 180, -90, 90])
+    npt.assert_allclose(table.iloc[1][['z_min', 'z_max']], [-8425, 5551])
+    npt.assert_allclose(table.x_inc, [1, 1, 0.5])
+    assert table.n_columns.tolist() == [361, 361, 721]
+    assert table.n_rows.tolist() == [181, 181, 361]
+    assert table.registration.iloc[1] == 'gridline'
+
+
+def test_grdinfo_batch_chunks():
+    "Splitting the grids into chunks should give the same table"
+    grids = ["@earth_relief_60m", "@earth_relief_30m"]*3
+    single = grdinfo_batch(grids)
+    chunked = grdinfo_batch(grids, chunk_size=1)
+    assert single.equals(chunked)
+
+
+def test_grdinfo_batch_fails():
+    "Check that grdinfo_batch fails for invalid grids"
+    with pytest.raises(GMTInvalidInput):
+        grdinfo_batch(["@earth_relief_60m", np.arange(10).reshape((5, 2))])
@@ -0,0 +1,129 @@
+"""
+Test the in-memory color palettes.
+"""
+import pytest
+import numpy as np
+from matplotlib.testing.compare import compare_images
+
+from .. import Figure, Palette
+from ..clib import LibGMT
+from ..exceptions import GMTInvalidInput
+from ..helpers import GMTTempFile
+from ..datasets import load_earth_relief
+
+
+def test_palette_continuous():
+    "Colors are interpolated when there is one per z value"
+    rgb = np.array([[0, 0, 0], [127.5, 0, 0], [255, 255, 255]])
+    palette = Palette(z=np.array([-1.5, 0, 2e6]), rgb=rgb,
+                      background=[0, 0, 255], foreground=[255, 0, 0])
+    assert palette.cpt.split('\n') == [
+        '-1.5 0/0/0 0 127.5/0/0',
+        '0 127.5/0/0 2000000 255/255/255',
+        'B 0/0/255',
+        'F 255/0/0',
+        '',
+    ]
+
+
+def test_palette_key():
+    "The key only depends on the contents of the palette"
+    rgb = [[0, 0, 0], [255, 255, 255]]
+    palette = Palette([0, 1], rgb)
+    assert palette.key == Palette(np.array([0.0, 1.0]), np.array(rgb)).key
+    assert palette.key != Palette([0, 2], rgb).key
+    assert palette.key != Palette([0, 1], rgb, nan=[0, 0, 0]).key
+    # The text is generated once and cached
+    assert palette.cpt is Palette([0, 1], rgb).cpt
+
+
+def test_palette_fails():
+    "Invalid z values and colors"
+    with pytest.raises(GMTInvalidInput):
+        Palette([0], [[0, 0, 0]])
+    with pytest.raises(GMTInvalidInput):
+        Palette([0, 2, 1], [[0, 0, 0]]*3)
+    with pytest.raises(GMTInvalidInput):
+        Palette([0, 1, 2], [[0, 0, 0]])
+    with pytest.raises(GMTInvalidInput):
+        Palette([0, 1], [[0, 0], [0, 0]])
+    with pytest.raises(GMTInvalidInput):
+        Palette([0, 1], [[0, 0, 0], [0, 0, 256]])
+
+
+def test_palette_save(tmpdir):
+    "Palettes can be written to CPT files"
+    palette = Palette([0, 1], [[0, 0, 0], [255, 255, 255]])
+    fname = str(tmpdir.join('palette.cpt'))
+    palette.save(fname)
+    with open(fname) as fcpt:
+        assert fcpt.read() == palette.cpt
+
+
+def test_palette_to_vfile_fresh():
+    "Every call reads a new copy of the palette"
+    palette = Palette([0, 10, 20], [[0, 0, 255], [255, 0, 0]])
+    with LibGMT() as lib:
+        for stretch in ['-T0/100/10', '']:
+            with lib.palette_to_vfile(palette) as vfile:
+                with GMTTempFile() as ofile:
+                    lib.call_module('makecpt', '-C{} {} ->{}'.format(
+                        vfile, stretch, ofile.name))
+                    slices = [line.split() for line in
+                              ofile.read().splitlines()
+                              if line and line[0] not in '#BFN']
+        # The palette stretched by the first module isn't reused
+        assert len(slices) == 2
+        assert [float(slices[0][0]), float(slices[-1][2])] == [0, 20]
+
+
+def test_palette_to_vfile_cache():
+    "Palettes are read once per session until a module changes them"
+    palette = Palette([0, 10, 20], [[0, 0, 255], [255, 0, 0]])
+    with LibGMT() as lib:
+        with lib.palette_to_vfile(palette) as vfile:
+            pass
+        with lib.palette_to_vfile(Palette(palette.z, palette.rgb)) as same:
+            assert same == vfile
+            with GMTTempFile() as ofile:
+                lib.call_module('makecpt', '-C{} -T0/100/10 ->{}'.format(
+                    same, ofile.name))
+        with lib.palette_to_vfile(palette) as new:
+            assert new != vfile
+        # CPT text isn't cached
+        with lib.palette_to_vfile(palette.cpt) as first:
+            with lib.palette_to_vfile(palette.cpt) as second:
+                assert first != second
+
+
+def test_palette_grdimage(tmpdir):
+    "Palettes made from arrays give the same grid plot as a CPT file"
+    grid = load_earth_relief(resolution='60m')
+    palette = Palette(z=[-8000, 0, 6000],
+                      rgb=[[0, 0, 0], [0, 0, 255], [255, 255, 255]])
+    cpt_file = str(tmpdir.join('palette.cpt'))
+    palette.save(cpt_file)
+    images = []
+    for cmap in [palette, cpt_file]:
+        fig = Figure()
+        fig.grdimage(grid, cmap=cmap, region='-180/180/-70/70',
+                     projection='W0/10i')
+        images.append(str(tmpdir.join('{}.png'.format(len(images)))))
+        fig.savefig(images[-1])
+    assert compare_images(images[0], images[1], tol=0) is None
+
+
+def test_palette_plot(tmpdir):
+    "Palettes made from arrays give the same symbol colors as a CPT file"
+    x, y = np.random.default_rng(0).uniform(0, 10, size=(2, 50))
+    palette = Palette(z=[0, 5, 10], rgb=[[0, 0, 255], [255, 0, 0]])
+    cpt_file = str(tmpdir.join('palette.cpt'))
+    palette.save(cpt_file)
+    images = []
+    for cmap in [palette, cpt_file]:
+        fig = Figure()
+        fig.plot(x=x, y=y, color=x, cmap=cmap, style='c0.2c',
+                 region=[0, 10, 0, 10], projection='X4i', frame='af')
+        images.append(str(tmpdir.join('{}.png'.format(len(images)))))
+        fig.savefig(images[-1])
+    assert compare_images(images[0], images[1], tol=0) is None
@@ -6,8 +6,11 @@ import os
 
 import pytest
 import numpy as np
+import pandas as pd
 
 from .. import Figure
+from ..base_plotting import _decimation_index
+from ..clib import LibGMT
 from ..exceptions import GMTInvalidInput
 
 
@@ -151,3 +154,103 @@ def test_plot_vectors():
     fig.plot(x=lon, y=lat, direction=(azimuth, lengths), region='-2/2/-2/2',
              projection='X4i', style='V0.2c+e', color='black', frame='af')
     return fig
+
+
+@pytest.mark.mpl_image_compare(filename='test_plot_red_circles.png')
+def test_plot_decimate_dpi(data, region):
+    "Points repeated on the same pixels are only plotted once"
+    repeated = np.tile(data, (50, 1))
+    fig = Figure()
+    fig.plot(x=repeated[:, 0], y=repeated[:, 1], region=region,
+             projection='X4i', style='c0.2c', color='red', frame='afg',
+             dpi=300)
+    return fig
+
+
+@pytest.mark.mpl_image_compare(filename='test_plot_colors_sizes.png')
+def test_plot_decimate_max_points(data, region):
+    "Decimating repeated points keeps the colors and sizes of each point"
+    repeated = np.tile(data, (50, 1))
+    fig = Figure()
+    fig.plot(x=repeated[:, 0], y=repeated[:, 1], color=repeated[:, 2],
+             sizes=0.5*repeated[:, 2], region=region, projection='X3i',
+             style='cc', cmap='copper', frame='af', max_points=999)
+    return fig
+
+
+def test_plot_decimate_map_scales():
+    "The decimation cells are the size of the map pixels in x and y"
+    # A vertical line on a map 4 times wider than tall: 10 pixels at 10 dpi
+    y = np.linspace(0, 10, 1001)
+    x = np.full_like(y, 5)
+    with LibGMT() as lib:
+        index = _decimation_index(lib, x, y, None, None, 10,
+                                  dict(R='0/10/0/10', J='X4i/1i'))
+    assert index.size == 11
+
+
+def test_plot_decimate_fails(data, region):
+    "Decimation only works for symbols from x and y arrays"
+    fig = Figure()
+    with pytest.raises(GMTInvalidInput):
+        fig.plot(data=data, region=region, projection='X4i', style='c0.2c',
+                 color='red', dpi=300)
+    with pytest.raises(GMTInvalidInput):
+        fig.plot(x=data[:, 0], y=data[:, 1], region=region, projection='X4i',
+                 pen='1p', max_points=10)
+    # The map width is needed for the pixel size
+    with pytest.raises(GMTInvalidInput):
+        fig.plot(x=data[:, 0], y=data[:, 1], region=region,
+                 projection='x0.1i', style='c0.2c', color='red', dpi=300)
+
+
+@pytest.mark.mpl_image_compare(filename='test_plot_red_circles.png')
+def test_plot_clip(data, region):
+    "Points far outside of the region are dropped before plotting"
+    far = np.array([[500, 0], [-300, 5], [40, 200]])
+    points = np.vstack([data[:, :2], far])
+    fig = Figure()
+    fig.plot(x=points[:, 0], y=points[:, 1], region=region, projection='X4i',
+             style='c0.2c', color='red', frame='afg', clip=True)
+    return fig
+
+
+@pytest.mark.mpl_image_compare(filename='test_plot_red_circles.png')
+def test_plot_clip_figure_region(data, region):
+    "Clip to the region of the current figure if there is no region given"
+    far = np.array([[500, 0], [-300, 5], [40, 200]])
+    points = np.vstack([data[:, :2], far])
+    fig = Figure()
+    fig.basemap(region=region, projection='X4i', frame='afg')
+    fig.plot(x=points[:, 0], y=points[:, 1], style='c0.2c', color='red',
+             clip=True)
+    return fig
+
+
+@pytest.mark.mpl_image_compare(filename='test_plot_matrix_color.png')
+def test_plot_clip_matrix(data):
+    "Clip the rows of a matrix"
+    far = np.array([[500, 0, data[0, 2]], [-300, 5, data[1, 2]]])
+    fig = Figure()
+    fig.plot(data=np.vstack([data, far]), region=[10, 70, -5, 10],
+             projection='X5i', style='c0.5c', cmap='rainbow', B='a',
+             clip=0.05)
+    return fig
+
+
+def test_plot_clip_fails(data, region):
+    "The clip margin must be a non-negative number"
+    fig = Figure()
+    for clip in ['0.1', -0.1]:
+        with pytest.raises(GMTInvalidInput):
+            fig.plot(x=data[:, 0], y=data[:, 1], region=region,
+                     projection='X4i', style='c0.2c', clip=clip)
+
+
+def test_plot_datetime(tmpdir):
+    "Plot a time series with a datetime64 x axis"
+    times = pd.date_range('2018-01-01', periods=10, freq='D')
+    fig = Figure()
+    fig.plot(x=times, y=np.arange(10), region='2017-12-31T/2018-01-11T/-1/10',
+             projection='X6i/3i', frame=['pxa2Df1d', 'yaf'], pen='1p,red')
+    fig.savefig(str(tmpdir.join('datetime.png')))
@@ -0,0 +1,57 @@
+"""
+Tests for fig.text
+"""
+import pytest
+import numpy as np
+from matplotlib.testing.compare import compare_images
+
+from .. import Figure
+from ..exceptions import GMTInvalidInput
+
+
+def test_text_arrays_file(tmpdir):
+    "Labels given as arrays give the same figure as a text file"
+    x, y = np.random.default_rng(0).uniform(1, 9, size=(2, 100))
+    labels = np.array(['station {}'.format(i) for i in range(x.size)])
+    textfile = tmpdir.join('labels.txt')
+    textfile.write('\n'.join('{} {} {}'.format(*row)
+                             for row in zip(x, y, labels)))
+    kwargs = dict(region=[0, 10, 0, 10], projection='X6i', frame=True,
+                  F='+f8p,Helvetica,black')
+    images = []
+    for args in [dict(x=x, y=y, text=labels), dict(textfile=str(textfile))]:
+        fig = Figure()
+        fig.text(**args, **kwargs)
+        images.append(str(tmpdir.join('{}.png'.format(len(images)))))
+        fig.savefig(images[-1])
+    assert compare_images(images[0], images[1], tol=0) is None
+
+
+def test_text_single_string(tmpdir):
+    "A single string is used for all points"
+    textfile = tmpdir.join('labels.txt')
+    textfile.write('1 1 same\n2 2 same\n3 3 same\n')
+    kwargs = dict(region=[0, 4, 0, 4], projection='X4i')
+    images = []
+    for args in [dict(x=[1, 2, 3], y=[1, 2, 3], text='same'),
+                 dict(textfile=str(textfile))]:
+        fig = Figure()
+        fig.text(**args, **kwargs)
+        # Single points are arrays too
+        fig.text(x=2, y=3, text='one')
+        images.append(str(tmpdir.join('{}.png'.format(len(images)))))
+        fig.savefig(images[-1])
+    assert compare_images(images[0], images[1], tol=0) is None
+
+
+def test_text_fails():
+    "Text needs either arrays or a file"
+    fig = Figure()
+    with pytest.raises(GMTInvalidInput):
+        fig.text(x=[1, 2], y=[1, 2], region=[0, 4, 0, 4], projection='X4i')
+    with pytest.raises(GMTInvalidInput):
+        fig.text(x=[1, 2], y=[1, 2], textfile='labels.txt',
+                 region=[0, 4, 0, 4], projection='X4i')
+    with pytest.raises(GMTInvalidInput):
+        fig.text(x=[1, 2], y=[1, 2], text=['a', 'b', 'c'],
+                 region=[0, 4, 0, 4], projection='X4i')
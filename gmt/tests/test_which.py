@@ -6,6 +6,7 @@ import os
 import pytest
 
 from .. import which
+from ..modules import WHICH_INDEX
 from ..helpers import unique_name
 
 
@@ -22,3 +23,39 @@ def test_which_fails():
     bogus_file = unique_name()
     with pytest.raises(FileNotFoundError):
         which(bogus_file)
+
+
+def test_which_many():
+    "Make sure a list of files is resolved in the same order"
+    fnames = ['@tut_quakes.ngdc', '@tut_bathy.nc', '@tut_quakes.ngdc']
+    paths = which(fnames, download='c', cache=False)
+    assert len(paths) == 3
+    assert [os.path.basename(path) for path in paths] == \
+        ['tut_quakes.ngdc', 'tut_bathy.nc', 'tut_quakes.ngdc']
+
+
+def test_which_many_fails():
+    "which should fail if any of the files is missing"
+    with pytest.raises(FileNotFoundError):
+        which(['@tut_quakes.ngdc', unique_name()], download='c')
+
+
+def test_which_many_missing_ok():
+    "Missing files are None with missing_ok instead of failing"
+    bogus_file = unique_name()
+    paths = which(['@tut_quakes.ngdc', bogus_file, '@tut_bathy.nc'],
+                  download='c', missing_ok=True)
+    assert paths[1] is None
+    assert [os.path.basename(paths[i]) for i in [0, 2]] == \
+        ['tut_quakes.ngdc', 'tut_bathy.nc']
+    assert which(bogus_file, missing_ok=True) is None
+
+
+def test_which_index():
+    "The paths of remote files should be stored in the index"
+    WHICH_INDEX.clear()
+    path = which('@tut_quakes.ngdc', download='c')
+    assert WHICH_INDEX.get('@tut_quakes.ngdc|c') == path
+    assert which('@tut_quakes.ngdc', download='c') == path
+    # Paths that depend on the current directory aren't indexed
+    assert WHICH_INDEX.get('@tut_quakes.ngdc|l') is None